@@ -8,7 +8,9 @@ import logging
 import os
 import subprocess
 import sys
+from collections.abc import Coroutine
 from pathlib import Path
+from typing import Any
 
 from natshell.config import load_config
 
@@ -281,21 +283,37 @@ def main() -> None:
 
     # Build the inference engine
     if use_remote:
-        from natshell.inference.ollama import ping_server
+        from natshell.inference.ollama import (
+            close_client,
+            get_model_context_length,
+            ping_server,
+        )
+
+        if config.remote.n_ctx > 0:
+            n_ctx = config.remote.n_ctx
+        elif config.ollama.n_ctx > 0:
+            n_ctx = config.ollama.n_ctx
+        else:
+            n_ctx = 0
+
+        async def _probe_remote() -> tuple[bool, int]:
+            # One loop for both probes so the context query reuses the ping's
+            # pooled connection; the pool is closed before the loop ends.
+            try:
+                if not await ping_server(remote_url, api_key=remote_api_key):
+                    return False, n_ctx
+                if n_ctx > 0:
+                    return True, n_ctx
+                return True, await get_model_context_length(remote_url, remote_model)
+            finally:
+                await close_client()
 
         print(f"Checking remote server: {remote_url}...")
-        reachable = asyncio.run(ping_server(remote_url, api_key=remote_api_key))
+        reachable, n_ctx = asyncio.run(_probe_remote())
 
         if reachable:
-            from natshell.inference.ollama import get_model_context_length
             from natshell.inference.remote import RemoteEngine
 
-            if config.remote.n_ctx > 0:
-                n_ctx = config.remote.n_ctx
-            elif config.ollama.n_ctx > 0:
-                n_ctx = config.ollama.n_ctx
-            else:
-                n_ctx = asyncio.run(get_model_context_length(remote_url, remote_model))
             engine = RemoteEngine(
                 base_url=remote_url,
                 model=remote_model,
@@ -510,7 +528,9 @@ def main() -> None:
             from natshell.headless import run_headless_plan
 
             exit_code = asyncio.run(
-                run_headless_plan(agent, args.plan, auto_approve=danger_fast_effective)
+                _closing_remote_client(
+                    run_headless_plan(agent, args.plan, auto_approve=danger_fast_effective)
+                )
             )
             sys.exit(exit_code)
 
@@ -519,10 +539,12 @@ def main() -> None:
             from natshell.headless import run_headless_exeplan
 
             exit_code = asyncio.run(
-                run_headless_exeplan(
-                    agent, args.exeplan,
-                    auto_approve=danger_fast_effective,
-                    resume=args.resume,
+                _closing_remote_client(
+                    run_headless_exeplan(
+                        agent, args.exeplan,
+                        auto_approve=danger_fast_effective,
+                        resume=args.resume,
+                    )
                 )
             )
             sys.exit(exit_code)
@@ -532,7 +554,9 @@ def main() -> None:
             from natshell.headless import run_headless
 
             exit_code = asyncio.run(
-                run_headless(agent, args.headless, auto_approve=danger_fast_effective)
+                _closing_remote_client(
+                    run_headless(agent, args.headless, auto_approve=danger_fast_effective)
+                )
             )
             sys.exit(exit_code)
 
@@ -560,6 +584,20 @@ def main() -> None:
                 pass
 
 
+async def _closing_remote_client(run: Coroutine[Any, Any, int]) -> int:
+    """Await a headless run, then close the pooled remote API client.
+
+    The client's connections belong to this run's event loop, so they are
+    closed before asyncio.run() tears the loop down.
+    """
+    from natshell.inference.ollama import close_client
+
+    try:
+        return await run
+    finally:
+        await close_client()
+
+
 def _print_vulkan_dep_hint() -> None:
     """Print distro-specific instructions for installing Vulkan build deps."""
     import shutil
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import re
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 
 _FILE_ACTION_RE = re.compile(
@@ -12,7 +12,7 @@ _FILE_ACTION_RE = re.compile(
 _VERIFY_RE = re.compile(r"^(?:Verify|Test):\s*(.+)$", re.MULTILINE)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PlanStep:
     """A single step extracted from a markdown plan."""
 
@@ -32,9 +32,13 @@ class PlanStep:
         return m.group(1).strip() if m else None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Plan:
-    """A parsed multi-step plan."""
+    """A parsed multi-step plan.
+
+    Frozen, so a parsed plan can be shared freely; derive a variant with
+    :func:`dataclasses.replace`.
+    """
 
     title: str  # From # heading
     preamble: str  # Text before first step
@@ -67,9 +71,7 @@ def parse_plan_file(path: str | Path) -> Plan:
         raise FileNotFoundError(f"Plan file not found: {path}")
 
     text = path.read_text()
-    plan = parse_plan_text(text)
-    plan.source_dir = path.parent
-    return plan
+    return replace(parse_plan_text(text), source_dir=path.parent)
 
 
 def parse_plan_text(text: str) -> Plan:
@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+import os
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
 
 from natshell.agent.plan import Plan, PlanStep
@@ -21,31 +24,70 @@ def _effective_plan_max_steps(n_ctx: int, configured: int = _DEFAULT_PLAN_MAX_ST
     return scale_for_context(n_ctx, PLAN_MAX_STEPS_TABLE, 20)
 
 
-def _shallow_tree(directory: Path, max_depth: int = 2) -> str:
-    """Build a compact directory tree string (2 levels deep, no hidden files)."""
+def _shallow_tree(directory: Path, max_depth: int = 2, max_entries: int = 200) -> str:
+    """Build a compact directory tree string (2 levels deep, no hidden files).
+
+    At most *max_entries* entries are listed; the walk stops there and the
+    tree ends with a ``... (truncated)`` line, so a huge directory costs a
+    bounded amount of work and prompt space.  Each directory is read only up
+    to the remaining budget and that slice is sorted, so a truncated listing
+    shows whichever entries the filesystem returned first.
+    """
     lines: list[str] = [f"{directory}/"]
+    remaining = max_entries
 
-    def _walk(path: Path, prefix: str, depth: int) -> None:
+    def _walk(path: Path, prefix: str, depth: int) -> bool:
+        """Walk *path*; return False once the entry budget is spent."""
+        nonlocal remaining
         if depth > max_depth:
-            return
+            return True
         try:
-            entries = sorted(path.iterdir(), key=lambda p: (not p.is_dir(), p.name.lower()))
+            with os.scandir(path) as it:
+                visible = (e for e in it if not e.name.startswith("."))
+                # One past the budget is enough to know the listing was cut short
+                entries = sorted(
+                    islice(visible, remaining + 1),
+                    key=lambda e: (not e.is_dir(), e.name.lower()),
+                )
         except OSError:
-            return
-        entries = [e for e in entries if not e.name.startswith(".")]
+            return True
         for i, entry in enumerate(entries):
+            if remaining <= 0:
+                lines.append(f"{prefix}... (truncated)")
+                return False
+            remaining -= 1
             connector = "\u2514\u2500 " if i == len(entries) - 1 else "\u251c\u2500 "
             extension = "   " if i == len(entries) - 1 else "\u2502  "
             if entry.is_dir():
                 lines.append(f"{prefix}{connector}{entry.name}/")
-                _walk(entry, prefix + extension, depth + 1)
+                if not _walk(Path(entry.path), prefix + extension, depth + 1):
+                    return False
             else:
                 lines.append(f"{prefix}{connector}{entry.name}")
+        return True
 
     _walk(directory, "  ", 1)
     return "\n".join(lines)
 
 
+# Tool guidance and scope rules close every step prompt.  They never vary, so
+# they are joined once here rather than on each of a plan's steps.
+_STEP_PROMPT_RULES = "\n".join(
+    [
+        "\nTool usage:"
+        "\n- Use write_file to create new files."
+        "\n- Use edit_file for targeted changes to existing files (read first)."
+        "\n- Read files before editing them to get exact content for old_text matching.",
+        "\nIMPORTANT — scope and termination rules:"
+        "\n- Execute ONLY the task described above. Do not modify files not mentioned in this step."
+        "\n- Do NOT re-examine, refactor, or 'improve' files you already wrote."
+        "\n- Do NOT read the plan file (PLAN.md or similar)."
+        "\n- When the step is complete, IMMEDIATELY provide a short text summary of what you did"
+        " and STOP. Do not continue with additional tool calls after the work is done.",
+    ]
+)
+
+
 def _build_step_prompt(
     step: PlanStep,
     plan: Plan,
@@ -84,14 +126,12 @@ def _build_step_prompt(
 
     if completed_summaries:
         parts.append("\nPreviously completed:")
-        for summary in completed_summaries:
-            parts.append(f"  {summary}")
+        parts.extend(f"  {summary}" for summary in completed_summaries)
 
     # Cross-step file change tracking
     if completed_files:
         parts.append("\nFiles created/modified by previous steps:")
-        for entry in completed_files:
-            parts.append(f"  {entry}")
+        parts.extend(f"  {entry}" for entry in completed_files)
 
     # Working memory (agents.md) for cross-step context.
     # Intentionally read-only: step agents receive content for context
@@ -108,22 +148,7 @@ def _build_step_prompt(
         "kill it before finishing."
     )
 
-    # Tool guidance
-    parts.append(
-        "\nTool usage:"
-        "\n- Use write_file to create new files."
-        "\n- Use edit_file for targeted changes to existing files (read first)."
-        "\n- Read files before editing them to get exact content for old_text matching."
-    )
-
-    parts.append(
-        "\nIMPORTANT — scope and termination rules:"
-        "\n- Execute ONLY the task described above. Do not modify files not mentioned in this step."
-        "\n- Do NOT re-examine, refactor, or 'improve' files you already wrote."
-        "\n- Do NOT read the plan file (PLAN.md or similar)."
-        "\n- When the step is complete, IMMEDIATELY provide a short text summary of what you did"
-        " and STOP. Do not continue with additional tool calls after the work is done."
-    )
+    parts.append(_STEP_PROMPT_RULES)
 
     return "\n".join(parts)
 
@@ -156,17 +181,32 @@ def _build_plan_prompt(description: str, directory_tree: str, *, n_ctx: int = 40
         budget = 30
     else:
         budget = 20
+
+    return "\n".join(
+        [
+            "Generate a multi-step plan file called PLAN.md in the current directory.",
+            "",
+            "User's request:",
+            description,
+            "",
+            "Current directory:",
+            directory_tree,
+            "",
+            _plan_prompt_instructions(budget, thorough),
+        ]
+    )
+
+
+@lru_cache(maxsize=16)
+def _plan_prompt_instructions(budget: int, thorough: bool) -> str:
+    """The part of the plan prompt after the request and directory tree.
+
+    It depends only on the context tier, so it is built once per tier rather
+    than on every ``/plan``.
+    """
     research_pct = int(budget * 0.4)
 
     parts = [
-        "Generate a multi-step plan file called PLAN.md in the current directory.",
-        "",
-        "User's request:",
-        description,
-        "",
-        "Current directory:",
-        directory_tree,
-        "",
         # ── Research phase ────────────────────────────────────────────────
         "═══ PHASE 1: RESEARCH ═══",
         "",
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from bisect import bisect_left
 from pathlib import Path
 from typing import Any
 
@@ -138,6 +139,26 @@ SLASH_COMMANDS = [
     ("/quit", "Exit NatShell"),
 ]
 
+# SLASH_COMMANDS positions sorted by command name.  Commands sharing a prefix
+# form one contiguous run, which bisect finds without scanning the table.
+_SLASH_INDEX = sorted((cmd, i) for i, (cmd, _) in enumerate(SLASH_COMMANDS))
+_SLASH_KEYS = [cmd for cmd, _ in _SLASH_INDEX]
+
+
+def match_slash_commands(prefix: str) -> list[tuple[str, str]]:
+    """Return the SLASH_COMMANDS entries starting with *prefix*, in table order.
+
+    Matching is case-insensitive on the prefix.  Looking up the run costs
+    O(log n + matches) per keystroke rather than a pass over every command.
+    """
+    prefix = prefix.lower()
+    positions = []
+    for i in range(bisect_left(_SLASH_KEYS, prefix), len(_SLASH_KEYS)):
+        if not _SLASH_KEYS[i].startswith(prefix):
+            break
+        positions.append(_SLASH_INDEX[i][1])
+    return [SLASH_COMMANDS[i] for i in sorted(positions)]
+
 
 class NatShellApp(App):
     """The NatShell TUI application."""
@@ -216,6 +237,12 @@ class NatShellApp(App):
                 )
             )
 
+    async def on_unmount(self) -> None:
+        """Close the pooled remote API client while its event loop is still running."""
+        from natshell.inference.ollama import close_client
+
+        await close_client()
+
     @on(Input.Changed, "#user-input")
     def on_input_changed(self, event: Input.Changed) -> None:
         """Show/hide slash command suggestions as the user types."""
@@ -228,7 +255,7 @@ class NatShellApp(App):
         self._completion_prefix = ""
 
         if text.startswith("/") and " " not in text:
-            matches = [(cmd, desc) for cmd, desc in SLASH_COMMANDS if cmd.startswith(text.lower())]
+            matches = match_slash_commands(text)
             if matches:
                 lines = [f"  [bold cyan]{cmd}[/]  [dim]{desc}[/]" for cmd, desc in matches]
                 suggestions.update("\n".join(lines))
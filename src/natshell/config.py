@@ -6,9 +6,9 @@ import logging
 import os
 import re
 import tempfile
-import tomllib
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any
 
 from natshell.platform import config_dir as _platform_config_dir
 
@@ -47,6 +47,8 @@ def _write_config_atomically(path: Path, text: str) -> None:
     If the rendered content is invalid TOML, the old file stays untouched and
     a RuntimeError propagates instead of corrupting on-disk state.
     """
+    import tomllib
+
     try:
         tomllib.loads(text)
     except tomllib.TOMLDecodeError as e:
@@ -162,7 +164,7 @@ class SkillsConfig:
     inject_in_compact: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class ProfileConfig:
     """A named configuration profile that can override settings across sections."""
     # Ollama/remote
@@ -282,21 +284,18 @@ CONFIG_ENUMS: dict[str, dict[str, list[str]]] = {
 }
 
 
-def save_config_value(section: str, key: str, value: str | int | float | bool) -> Path:
-    """Persist a single config value to the user config file.
+_SECTION_HEADER_RE = re.compile(r"^\[.+\]")
 
-    Uses simple line-based TOML editing (same pattern as save_engine_preference).
-    Returns the path to the config file.
-    """
-    cfg_dir = _get_config_dir()
-    cfg_dir.mkdir(parents=True, exist_ok=True)
-    config_path = cfg_dir / "config.toml"
 
-    if config_path.exists():
-        lines = config_path.read_text().splitlines(keepends=True)
-    else:
-        lines = []
+def _set_config_line(
+    lines: list[str], section: str, key: str, value: str | int | float | bool
+) -> None:
+    """Set ``key = value`` under ``[section]`` in *lines*, editing in place.
 
+    Replaces the key's line (or a commented-out ``# key = ...``) if the
+    section has one, otherwise appends to the section, creating it at the
+    end of the file when missing.
+    """
     # Format value as TOML (strings are escaped to prevent injection)
     if isinstance(value, bool):
         val_str = "true" if value else "false"
@@ -306,6 +305,7 @@ def save_config_value(section: str, key: str, value: str | int | float | bool) -
         val_str = str(value)
 
     section_header = f"[{section}]"
+    key_re = re.compile(rf"^#?\s*{re.escape(key)}\s*=")
     section_idx = None
     next_section_idx = None
     key_idx = None
@@ -315,11 +315,11 @@ def save_config_value(section: str, key: str, value: str | int | float | bool) -
         if stripped == section_header:
             section_idx = i
         elif section_idx is not None and next_section_idx is None:
-            if re.match(r"^\[.+\]", stripped):
+            if _SECTION_HEADER_RE.match(stripped):
                 next_section_idx = i
             elif stripped.startswith(key) or stripped.startswith(f"# {key}"):
                 # Verify this is the actual key, not a prefix match
-                if re.match(rf"^#?\s*{re.escape(key)}\s*=", stripped):
+                if key_re.match(stripped):
                     key_idx = i
 
     new_line = f"{key} = {val_str}\n"
@@ -336,8 +336,14 @@ def save_config_value(section: str, key: str, value: str | int | float | bool) -
         lines.append(f"\n{section_header}\n")
         lines.append(new_line)
 
-    _write_config_atomically(config_path, "".join(lines))
-    return config_path
+
+def save_config_value(section: str, key: str, value: str | int | float | bool) -> Path:
+    """Persist a single config value to the user config file.
+
+    Uses simple line-based TOML editing, which keeps the user's comments and
+    layout.  Returns the path to the config file.
+    """
+    return save_config_values(section, {key: value})
 
 
 def load_config(config_path: str | Path | None = None) -> NatShellConfig:
@@ -348,12 +354,7 @@ def load_config(config_path: str | Path | None = None) -> NatShellConfig:
     2. ~/.config/natshell/config.toml
     3. Built-in defaults
     """
-    config = NatShellConfig()
-
-    # Load defaults from bundled config
-    default_path = Path(__file__).parent / "config.default.toml"
-    if default_path.exists():
-        _merge_toml(config, default_path)
+    config = _default_config()
 
     # Load user config
     if config_path:
@@ -364,10 +365,7 @@ def load_config(config_path: str | Path | None = None) -> NatShellConfig:
     if user_path.exists():
         _merge_toml(config, user_path)
 
-    # Support NATSHELL_API_KEY environment variable as alternative to config file
-    env_api_key = os.environ.get("NATSHELL_API_KEY")
-    if env_api_key:
-        config.remote.api_key = env_api_key
+    _apply_env_overrides(config)
 
     # Warn if config file contains an API key and has permissive permissions
     # (Unix permission bits are meaningless on Windows — skip the check)
@@ -391,6 +389,40 @@ def load_config(config_path: str | Path | None = None) -> NatShellConfig:
     return config
 
 
+def load_config_from_string(text: str) -> NatShellConfig:
+    """Load configuration from TOML *text* layered over the built-in defaults.
+
+    Same as :func:`load_config` with the user file's contents given directly,
+    so nothing is read from disk but the bundled defaults.  Unlike a broken
+    config file, invalid *text* is an error.
+
+    Raises:
+        tomllib.TOMLDecodeError: If *text* is not valid TOML.
+    """
+    import tomllib
+
+    config = _default_config()
+    _merge_data(config, tomllib.loads(text))
+    _apply_env_overrides(config)
+    return config
+
+
+def _default_config() -> NatShellConfig:
+    """A NatShellConfig with the bundled config.default.toml merged in."""
+    config = NatShellConfig()
+    default_path = Path(__file__).parent / "config.default.toml"
+    if default_path.exists():
+        _merge_toml(config, default_path)
+    return config
+
+
+def _apply_env_overrides(config: NatShellConfig) -> None:
+    # Support NATSHELL_API_KEY environment variable as alternative to config file
+    env_api_key = os.environ.get("NATSHELL_API_KEY")
+    if env_api_key:
+        config.remote.api_key = env_api_key
+
+
 _SECTIONS = (
     "model", "remote", "ollama", "agent", "safety",
     "ui", "backup", "engine", "mcp", "kiwix", "prompt", "memory", "skills",
@@ -403,13 +435,21 @@ def _merge_toml(config: NatShellConfig, path: Path) -> None:
     If *path* is unreadable or contains invalid TOML, log a warning and skip —
     so a corrupted config file never prevents NatShell from starting.
     """
+    # Imported here: modules that only need the config dataclasses (the
+    # safety classifier, tools, tests) never pay for the TOML parser.
+    import tomllib
+
     try:
         with open(path, "rb") as f:
             data = tomllib.load(f)
     except (tomllib.TOMLDecodeError, OSError) as e:
         logger.error("Failed to load %s: %s — skipping.", path.name, e)
         return
+    _merge_data(config, data)
+
 
+def _merge_data(config: NatShellConfig, data: dict[str, Any]) -> None:
+    """Merge parsed TOML *data* into the config, overwriting only given fields."""
     for section_name in _SECTIONS:
         if section_name in data:
             section_obj = getattr(config, section_name, None)
@@ -480,11 +520,24 @@ def save_skills_disabled(disabled: list[str]) -> Path:
 def save_config_values(
     section: str, values: dict[str, str | int | float | bool]
 ) -> Path:
-    """Persist multiple config values in one section. Returns the config path."""
-    path = None
+    """Persist multiple config values in one section. Returns the config path.
+
+    The file is read and atomically rewritten once, however many keys change.
+    """
+    cfg_dir = _get_config_dir()
+    cfg_dir.mkdir(parents=True, exist_ok=True)
+    config_path = cfg_dir / "config.toml"
+
+    if config_path.exists():
+        lines = config_path.read_text().splitlines(keepends=True)
+    else:
+        lines = []
+
     for key, value in values.items():
-        path = save_config_value(section, key, value)
-    return path  # type: ignore[return-value]
+        _set_config_line(lines, section, key, value)
+
+    _write_config_atomically(config_path, "".join(lines))
+    return config_path
 
 
 def save_ollama_default(model_name: str, url: str | None = None) -> Path:
@@ -510,6 +563,25 @@ def list_profiles(config: NatShellConfig) -> list[str]:
     return sorted(config.profiles.keys())
 
 
+# (profile field, config section, section key).  n_ctx feeds both the Ollama
+# and the remote engine.
+_PROFILE_OVERRIDES: tuple[tuple[str, str, str], ...] = (
+    ("ollama_model", "ollama", "default_model"),
+    ("ollama_url", "ollama", "url"),
+    ("remote_url", "remote", "url"),
+    ("remote_model", "remote", "model"),
+    ("api_key", "remote", "api_key"),
+    ("n_ctx", "ollama", "n_ctx"),
+    ("n_ctx", "remote", "n_ctx"),
+    ("temperature", "agent", "temperature"),
+    ("engine", "engine", "preferred"),
+    ("n_gpu_layers", "model", "n_gpu_layers"),
+)
+
+# A profile's field defaults mean "don't override".
+_PROFILE_UNSET = ProfileConfig()
+
+
 def apply_profile(config: NatShellConfig, name: str) -> None:
     """Apply a named profile to the config, overriding only non-default values.
 
@@ -519,23 +591,7 @@ def apply_profile(config: NatShellConfig, name: str) -> None:
         raise KeyError(f"Unknown profile: {name}")
 
     profile = config.profiles[name]
-
-    if profile.ollama_model:
-        config.ollama.default_model = profile.ollama_model
-    if profile.ollama_url:
-        config.ollama.url = profile.ollama_url
-    if profile.remote_url:
-        config.remote.url = profile.remote_url
-    if profile.remote_model:
-        config.remote.model = profile.remote_model
-    if profile.api_key:
-        config.remote.api_key = profile.api_key
-    if profile.n_ctx:
-        config.ollama.n_ctx = profile.n_ctx
-        config.remote.n_ctx = profile.n_ctx
-    if profile.temperature:
-        config.agent.temperature = profile.temperature
-    if profile.engine:
-        config.engine.preferred = profile.engine
-    if profile.n_gpu_layers != -2:
-        config.model.n_gpu_layers = profile.n_gpu_layers
+    for field_name, section, key in _PROFILE_OVERRIDES:
+        value = getattr(profile, field_name)
+        if value != getattr(_PROFILE_UNSET, field_name):
+            setattr(getattr(config, section), key, value)
@@ -1,8 +1,11 @@
 """GPU and NPU hardware detection and best-device selection.
 
-Follows the same cached-detection pattern as ``platform.py``.
-Tries ``vulkaninfo``, ``nvidia-smi``, ``lspci`` (Linux), and
-``WMI`` (Windows) in order for GPUs.  Detects Qualcomm NPUs on Windows.
+Follows the same cached-detection pattern as ``platform.py``, except that
+GPU results expire after ``_GPU_CACHE_TTL`` seconds so a long-running
+session picks up driver or device changes.  Tries ``vulkaninfo``,
+NVML (optional ``nvidia-ml-py``), ``nvidia-smi``, ``lspci`` (Linux, with
+VRAM from ``/sys/class/drm``), and ``WMI`` (Windows) in order for GPUs.
+Detects Qualcomm NPUs on Windows.
 """
 
 from __future__ import annotations
@@ -12,13 +15,62 @@ import os
 import re
 import shutil
 import subprocess
+import time
+from collections.abc import Callable
 from dataclasses import dataclass
-from functools import lru_cache
+from functools import lru_cache, wraps
+from pathlib import Path
+from typing import TypeVar
 
 logger = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
 
-@dataclass
+_GPU_CACHE_TTL = 60.0  # seconds
+
+_SYSFS_DRM = Path("/sys/class/drm")
+_SYSFS_CARD_RE = re.compile(r"card(\d+)$")
+
+# PCI vendor IDs as published in /sys/class/drm/card*/device/vendor
+_PCI_VENDORS = {
+    "0x10de": "nvidia",
+    "0x1002": "amd",
+    "0x8086": "intel",
+    "0x5143": "qualcomm",
+}
+
+
+def _ttl_cache(ttl: float) -> Callable[[Callable[[], _T]], Callable[[], _T]]:
+    """Cache a zero-argument function's result for *ttl* seconds.
+
+    The wrapper exposes ``cache_clear()`` like :func:`functools.lru_cache`
+    so callers (and tests) can force re-detection.
+    """
+
+    def decorator(func: Callable[[], _T]) -> Callable[[], _T]:
+        value: _T | None = None
+        expires_at = 0.0
+
+        @wraps(func)
+        def wrapper() -> _T:
+            nonlocal value, expires_at
+            now = time.monotonic()
+            if value is None or now >= expires_at:
+                value = func()
+                expires_at = now + ttl
+            return value
+
+        def cache_clear() -> None:
+            nonlocal value
+            value = None
+
+        wrapper.cache_clear = cache_clear  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
+
+
+@dataclass(frozen=True, slots=True)
 class GpuInfo:
     """Describes a single GPU visible to the system."""
 
@@ -134,16 +186,13 @@ def _parse_nvidia_smi(output: str) -> list[GpuInfo]:
     """Parse ``nvidia-smi --query-gpu`` CSV output."""
     gpus: list[GpuInfo] = []
     for idx, line in enumerate(output.strip().splitlines()):
-        parts = [p.strip() for p in line.split(",")]
-        if len(parts) < 2:
+        # Two fields: "NAME, VRAM[ MiB]" — a single partition beats a CSV parser
+        name, sep, rest = line.partition(",")
+        if not sep:
             continue
-        name = parts[0]
-        vram_mb = 0
-        mem_str = parts[1].replace("MiB", "").strip()
-        try:
-            vram_mb = int(mem_str)
-        except ValueError:
-            pass
+        name = name.strip()
+        mem_str = rest.strip().removesuffix("MiB").rstrip()
+        vram_mb = int(mem_str) if mem_str.isdigit() else 0
         gpus.append(
             GpuInfo(
                 name=name,
@@ -156,8 +205,14 @@ def _parse_nvidia_smi(output: str) -> list[GpuInfo]:
     return gpus
 
 
-def _parse_lspci(output: str) -> list[GpuInfo]:
-    """Parse ``lspci`` output for VGA/3D controllers."""
+def _parse_lspci(
+    output: str, sysfs: dict[str, tuple[str, int]] | None = None
+) -> list[GpuInfo]:
+    """Parse ``lspci`` output for VGA/3D controllers.
+
+    lspci has no VRAM figures; *sysfs* (see :func:`_sysfs_cards`) fills in
+    VRAM, and the vendor when the name does not reveal it, by PCI slot.
+    """
     gpus: list[GpuInfo] = []
     idx = 0
     for line in output.splitlines():
@@ -166,6 +221,9 @@ def _parse_lspci(output: str) -> list[GpuInfo]:
             match = re.search(r":\s+(.+)$", line)
             name = match.group(1).strip() if match else line
             vendor = _classify_vendor(name)
+            sysfs_vendor, vram_mb = (sysfs or {}).get(line.split(" ", 1)[0], (vendor, 0))
+            if vendor == "unknown":
+                vendor = sysfs_vendor
             # Heuristic: NVIDIA and AMD discrete GPUs typically have PCI bus > 00
             is_discrete = vendor in ("nvidia",) or ("Radeon RX" in name)
             gpus.append(
@@ -173,7 +231,7 @@ def _parse_lspci(output: str) -> list[GpuInfo]:
                     name=name,
                     vendor=vendor,
                     device_index=idx,
-                    vram_mb=0,
+                    vram_mb=vram_mb,
                     is_discrete=is_discrete,
                 )
             )
@@ -227,10 +285,91 @@ def _parse_wmi_gpu(output: str) -> list[GpuInfo]:
     return gpus
 
 
-@lru_cache(maxsize=1)
+def _read_sysfs(path: Path) -> str:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return ""
+
+
+def _sysfs_cards() -> dict[str, tuple[str, int]]:
+    """Map PCI slot (``"01:00.0"``) to ``(vendor, vram_mb)`` from ``/sys/class/drm``.
+
+    Only ``amdgpu`` publishes ``mem_info_vram_total``; other drivers report 0.
+    """
+    cards: dict[str, tuple[str, int]] = {}
+    try:
+        entries = list(_SYSFS_DRM.iterdir())
+    except OSError:
+        return cards
+    for entry in entries:
+        if not _SYSFS_CARD_RE.match(entry.name):
+            continue
+        dev = entry / "device"
+        # PCI class 0x03xxxx = display controller
+        if not _read_sysfs(dev / "class").startswith("0x03"):
+            continue
+        try:
+            slot = dev.resolve().name
+        except OSError:
+            continue
+        # lspci omits the PCI domain when it is 0000
+        slot = slot.removeprefix("0000:")
+        vendor = _PCI_VENDORS.get(_read_sysfs(dev / "vendor").lower(), "unknown")
+        vram_str = _read_sysfs(dev / "mem_info_vram_total")
+        vram_mb = int(vram_str) // (1024 * 1024) if vram_str.isdigit() else 0
+        cards[slot] = (vendor, vram_mb)
+    return cards
+
+
+def _detect_via_nvml() -> list[GpuInfo]:
+    """Enumerate NVIDIA GPUs in-process via NVML (``nvidia-ml-py``).
+
+    Returns an empty list when ``pynvml`` is not installed or NVML cannot
+    be initialised, so the caller falls back to ``nvidia-smi``.
+    """
+    try:
+        import pynvml
+    except ImportError:
+        return []
+
+    try:
+        pynvml.nvmlInit()
+    except pynvml.NVMLError:
+        return []
+
+    gpus: list[GpuInfo] = []
+    try:
+        for idx in range(pynvml.nvmlDeviceGetCount()):
+            handle = pynvml.nvmlDeviceGetHandleByIndex(idx)
+            name = pynvml.nvmlDeviceGetName(handle)
+            if isinstance(name, bytes):  # older bindings return bytes
+                name = name.decode()
+            mem = pynvml.nvmlDeviceGetMemoryInfo(handle)
+            gpus.append(
+                GpuInfo(
+                    name=name,
+                    vendor="nvidia",
+                    device_index=idx,
+                    vram_mb=mem.total // (1024 * 1024),
+                    is_discrete=True,
+                )
+            )
+    except pynvml.NVMLError as exc:
+        logger.debug("NVML query failed: %s", exc)
+        gpus = []
+    finally:
+        try:
+            pynvml.nvmlShutdown()
+        except pynvml.NVMLError:
+            pass
+    return gpus
+
+
+@_ttl_cache(_GPU_CACHE_TTL)
 def detect_gpus() -> list[GpuInfo]:
-    """Detect GPU hardware. Tries vulkaninfo, nvidia-smi, lspci/WMI in order."""
-    from natshell.platform import is_windows
+    """Detect GPU hardware. Tries vulkaninfo, NVML, nvidia-smi, lspci/WMI in order."""
+    from natshell.platform import is_linux, is_windows
 
     # 1. vulkaninfo — cross-vendor, gives device type (discrete/integrated)
     if shutil.which("vulkaninfo"):
@@ -241,7 +380,13 @@ def detect_gpus() -> list[GpuInfo]:
                 logger.debug("GPU detection via vulkaninfo: %d device(s)", len(gpus))
                 return gpus
 
-    # 2. nvidia-smi — NVIDIA-specific, gives VRAM
+    # 2. NVML — in-process NVIDIA query, avoids the nvidia-smi start-up cost
+    gpus = _detect_via_nvml()
+    if gpus:
+        logger.debug("GPU detection via NVML: %d device(s)", len(gpus))
+        return gpus
+
+    # 3. nvidia-smi — NVIDIA-specific, gives VRAM
     if shutil.which("nvidia-smi"):
         out = _run(["nvidia-smi", "--query-gpu=name,memory.total", "--format=csv,noheader,nounits"])
         if out:
@@ -250,7 +395,7 @@ def detect_gpus() -> list[GpuInfo]:
                 logger.debug("GPU detection via nvidia-smi: %d device(s)", len(gpus))
                 return gpus
 
-    # 3. Platform-specific fallback
+    # 4. Platform-specific fallback
     if is_windows():
         # WMI via PowerShell
         out = _run(
@@ -269,11 +414,11 @@ def detect_gpus() -> list[GpuInfo]:
                 logger.debug("GPU detection via WMI: %d device(s)", len(gpus))
                 return gpus
     else:
-        # lspci — Linux, no VRAM info
+        # lspci — Linux; VRAM comes from sysfs where the driver publishes it
         if shutil.which("lspci"):
             out = _run(["lspci"])
             if out:
-                gpus = _parse_lspci(out)
+                gpus = _parse_lspci(out, _sysfs_cards() if is_linux() else None)
                 if gpus:
                     logger.debug("GPU detection via lspci: %d device(s)", len(gpus))
                     return gpus
@@ -292,9 +437,9 @@ def best_gpu_index() -> int:
     if not gpus:
         return 0
 
-    # Sort: discrete first, then by VRAM descending
-    ranked = sorted(gpus, key=lambda g: (g.is_discrete, g.vram_mb), reverse=True)
-    return ranked[0].device_index
+    # Discrete first, then highest VRAM; ties keep detection order
+    best = max(gpus, key=lambda g: (g.is_discrete, g.vram_mb))
+    return best.device_index
 
 
 def gpu_backend_available() -> bool:
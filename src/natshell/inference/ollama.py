@@ -2,13 +2,27 @@
 
 from __future__ import annotations
 
+import asyncio
+import importlib.util
 import logging
+import re
 from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
 
 import httpx
 
+try:
+    import orjson
+except ImportError:  # optional speedup (natshell[fast]); stdlib json otherwise
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Trailing /v1 path segments and slashes.  Each /v1 must follow a slash, so a
+# host literally named "v1" is kept.
+_V1_SUFFIX_RE = re.compile(r"(?:/+v1)*/*$")
+
 
 @dataclass
 class OllamaModel:
@@ -20,10 +34,24 @@ class OllamaModel:
     family: str = ""
 
 
+def _json(resp: httpx.Response) -> Any:
+    """Decode a JSON response body, using orjson when it is installed.
+
+    /api/show returns the model's full GGUF metadata, hundreds of keys on
+    some models.  Both decoders raise ValueError subclasses on bad input.
+    """
+    if orjson is not None:
+        return orjson.loads(resp.content)
+    return resp.json()
+
+
+@lru_cache(maxsize=32)
 def normalize_base_url(url: str) -> str:
     """Strip /v1 suffix and trailing slash to get the server root URL.
 
-    Adds ``http://`` if no scheme is present.
+    Adds ``http://`` if no scheme is present.  Every API helper normalizes
+    its URL first and a session only ever talks to a handful of servers, so
+    results are cached.
 
     >>> normalize_base_url("http://localhost:11434/v1")
     'http://localhost:11434'
@@ -37,13 +65,82 @@ def normalize_base_url(url: str) -> str:
     url = url.strip()
     if not url.startswith(("http://", "https://")):
         url = f"http://{url}"
-    url = url.rstrip("/")
-    if url.endswith("/v1"):
-        url = url[:-3]
-    return url
+    scheme, _, rest = url.partition("://")
+    # Repeated suffixes (".../v1/v1") all go, so the result is idempotent.
+    return f"{scheme}://{_V1_SUFFIX_RE.sub('', rest, count=1)}"
+
+
+# One pooled client per event loop, so repeated probes of the same server
+# reuse keep-alive connections instead of paying a TCP (and TLS) handshake
+# per call.  An AsyncClient's connections belong to the loop that opened
+# them, and the CLI runs separate asyncio.run() loops before the TUI starts,
+# so a client is only reused on the loop that created it.
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+# Background closes of clients replaced by _get_client, kept referenced so
+# they are not garbage-collected before they finish.
+_closing: set[asyncio.Task[None]] = set()
+
+
+# HTTP/2 needs the optional h2 package (natshell[fast]).  httpx only negotiates
+# it over TLS, so it helps https OpenAI-compatible endpoints; a plain-http
+# Ollama server keeps using pooled HTTP/1.1 connections.
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+# /api/show architecture maximums by (normalized base URL, model).  Only
+# successful lookups are stored, so an unreachable server is asked again next
+# time.  Runtime sizes from /api/ps are never cached: they change whenever the
+# server loads the model with a different n_ctx.
+_ctx_cache: dict[tuple[str, str], int] = {}
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Return the shared client for the running event loop, creating it lazily.
+
+    Timeouts are passed per request, so every caller shares one pool.  A
+    client still open from an earlier loop is closed rather than dropped, so
+    its pooled connections are not leaked.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        if _client is not None and not _client.is_closed:
+            _retire_client(_client, loop)
+        _client = httpx.AsyncClient(
+            http2=_HTTP2,
+            limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+        )
+        _client_loop = loop
+    return _client
+
+
+def _retire_client(client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop) -> None:
+    """Close a client left open by an earlier event loop, in the background."""
+    task = loop.create_task(_close_quietly(client))
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
+
 
+async def _close_quietly(client: httpx.AsyncClient) -> None:
+    try:
+        await client.aclose()
+    except Exception as exc:  # its loop may be gone; the sockets go with it
+        logger.debug("Could not close stale HTTP client: %s", exc)
+
+
+async def close_client() -> None:
+    """Close the shared client.  Call before the event loop that owns it ends."""
+    global _client, _client_loop
+    client, _client, _client_loop = _client, None, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+    if _closing:
+        await asyncio.gather(*_closing, return_exceptions=True)
 
-async def ping_server(base_url: str, api_key: str = "") -> bool:
+
+async def ping_server(
+    base_url: str, api_key: str = "", client: httpx.AsyncClient | None = None
+) -> bool:
     """Check if a server is reachable. Returns True if we get any 200 response.
 
     Tries the root URL first (Ollama), then /v1/models (OpenAI-compatible APIs).
@@ -54,13 +151,13 @@ async def ping_server(base_url: str, api_key: str = "") -> bool:
     if api_key:
         headers["Authorization"] = f"Bearer {api_key}"
     try:
-        async with httpx.AsyncClient(timeout=5.0, headers=headers) as client:
-            resp = await client.get(f"{base_url}/")
-            if resp.status_code == 200:
-                return True
-            # Root may not respond 200 on non-Ollama APIs — try /v1/models
-            resp = await client.get(f"{base_url}/v1/models")
-            return resp.status_code == 200
+        http = client or _get_client()
+        resp = await http.get(f"{base_url}/", headers=headers, timeout=5.0)
+        if resp.status_code == 200:
+            return True
+        # Root may not respond 200 on non-Ollama APIs — try /v1/models
+        resp = await http.get(f"{base_url}/v1/models", headers=headers, timeout=5.0)
+        return resp.status_code == 200
     except (
         httpx.ConnectError,
         httpx.ConnectTimeout,
@@ -71,35 +168,37 @@ async def ping_server(base_url: str, api_key: str = "") -> bool:
         return False
 
 
-async def list_models(base_url: str) -> list[OllamaModel]:
+async def list_models(
+    base_url: str, client: httpx.AsyncClient | None = None
+) -> list[OllamaModel]:
     """List available models from a remote server.
 
-    Tries Ollama native /api/tags first, then falls back to OpenAI /v1/models.
-    Returns [] on failure.
+    Prefers Ollama native /api/tags, falling back to OpenAI /v1/models.
+    Both are requested concurrently, so an unknown server costs one round
+    trip rather than two.  Returns [] on failure.
     """
     base_url = normalize_base_url(base_url)
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            # Try Ollama native endpoint first
-            try:
-                resp = await client.get(f"{base_url}/api/tags")
-                if resp.status_code == 200:
-                    data = resp.json()
-                    return _parse_ollama_models(data)
-            except (httpx.HTTPError, ValueError, KeyError):
-                pass
-
-            # Fall back to OpenAI-compatible endpoint
-            try:
-                resp = await client.get(f"{base_url}/v1/models")
-                if resp.status_code == 200:
-                    data = resp.json()
-                    return _parse_openai_models(data)
-            except (httpx.HTTPError, ValueError, KeyError):
-                pass
-
-    except (httpx.ConnectError, httpx.ConnectTimeout, OSError):
-        pass
+    http = client or _get_client()
+    tags_resp, openai_resp = await asyncio.gather(
+        http.get(f"{base_url}/api/tags", timeout=10.0),
+        http.get(f"{base_url}/v1/models", timeout=10.0),
+        return_exceptions=True,
+    )
+
+    for resp, parse in (
+        (tags_resp, _parse_ollama_models),
+        (openai_resp, _parse_openai_models),
+    ):
+        if isinstance(resp, BaseException):
+            if not isinstance(resp, (httpx.HTTPError, OSError)):
+                raise resp
+            continue
+        if resp.status_code != 200:
+            continue
+        try:
+            return parse(_json(resp))
+        except (ValueError, KeyError):
+            pass
 
     return []
 
@@ -147,26 +246,27 @@ def _model_matches(query: str, name: str, model: str) -> bool:
     return False
 
 
-async def _get_running_context(base_url: str, model: str) -> int | None:
+async def _get_running_context(
+    base_url: str, model: str, client: httpx.AsyncClient | None = None
+) -> int | None:
     """Query Ollama /api/ps for the actual runtime context of a loaded model.
 
     Returns the context length if the model is currently loaded, or None if
     unavailable (model not loaded, non-Ollama server, connection failure).
     """
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            resp = await client.get(f"{base_url}/api/ps")
-            if resp.status_code != 200:
-                return None
-            data = resp.json()
-            for entry in data.get("models", []):
-                entry_name = entry.get("name", "")
-                entry_model = entry.get("model", "")
-                if _model_matches(model, entry_name, entry_model):
-                    # Ollama returns context_length as a top-level field
-                    ctx = entry.get("context_length")
-                    if isinstance(ctx, int) and ctx > 0:
-                        return ctx
+        resp = await (client or _get_client()).get(f"{base_url}/api/ps", timeout=5.0)
+        if resp.status_code != 200:
+            return None
+        data = _json(resp)
+        for entry in data.get("models", []):
+            entry_name = entry.get("name", "")
+            entry_model = entry.get("model", "")
+            if _model_matches(model, entry_name, entry_model):
+                # Ollama returns context_length as a top-level field
+                ctx = entry.get("context_length")
+                if isinstance(ctx, int) and ctx > 0:
+                    return ctx
     except (
         httpx.HTTPError,
         httpx.ConnectError,
@@ -179,37 +279,73 @@ async def _get_running_context(base_url: str, model: str) -> int | None:
     return None
 
 
-async def get_model_context_length(base_url: str, model: str) -> int:
+def _context_length_from_info(model_info: dict[str, Any]) -> int:
+    """Pick the context length out of /api/show ``model_info`` metadata.
+
+    The key is prefixed with the architecture (``llama.context_length``,
+    ``qwen2.context_length``, ...).  ``general.architecture`` names it, so
+    that key is looked up directly; the scan over every key is only a
+    fallback for servers that omit it.
+    """
+    arch = model_info.get("general.architecture")
+    if arch:
+        value = model_info.get(f"{arch}.context_length")
+        if isinstance(value, int):
+            return value
+    for key, value in model_info.items():
+        if key.endswith(".context_length") and isinstance(value, int):
+            return value
+    return 0
+
+
+async def get_model_context_length(
+    base_url: str, model: str, client: httpx.AsyncClient | None = None
+) -> int:
     """Query the server for the model's context window size.
 
     Precedence:
     1. /api/ps runtime context (actual loaded context)
     2. /api/show metadata (architecture maximum)
     3. 0 (unavailable)
+
+    /api/ps is asked on every call, since the loaded context can change
+    between calls.  Non-zero /api/show results are cached per server and
+    model for the life of the process; see :func:`clear_context_cache`.
     """
     base_url = normalize_base_url(base_url)
+    # Both queries go to the same server, so they share one client.
+    http = client or _get_client()
 
     # Prefer runtime context from /api/ps (reflects actual loaded n_ctx)
-    runtime_ctx = await _get_running_context(base_url, model)
+    runtime_ctx = await _get_running_context(base_url, model, client=http)
     if runtime_ctx is not None:
         logger.debug("Got runtime context from /api/ps: %d", runtime_ctx)
         return runtime_ctx
 
-    # Fall back to metadata from /api/show (architecture maximum)
+    key = (base_url, model)
+    if key in _ctx_cache:
+        return _ctx_cache[key]
+    n_ctx = await _fetch_show_context_length(base_url, model, http)
+    if n_ctx:
+        _ctx_cache[key] = n_ctx
+    return n_ctx
+
+
+def clear_context_cache() -> None:
+    """Forget every cached /api/show context length."""
+    _ctx_cache.clear()
+
+
+async def _fetch_show_context_length(base_url: str, model: str, http: httpx.AsyncClient) -> int:
+    """Read the architecture maximum context length from /api/show, or 0."""
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.post(
-                f"{base_url}/api/show",
-                json={"model": model},
-            )
-            if resp.status_code == 200:
-                data = resp.json()
-                model_info = data.get("model_info", {})
-                # Context length key varies by architecture: llama.context_length,
-                # qwen2.context_length, etc. Search for any key ending in .context_length
-                for key, value in model_info.items():
-                    if key.endswith(".context_length") and isinstance(value, int):
-                        return value
+        resp = await http.post(
+            f"{base_url}/api/show",
+            json={"model": model},
+            timeout=10.0,
+        )
+        if resp.status_code == 200:
+            return _context_length_from_info(_json(resp).get("model_info") or {})
     except (
         httpx.HTTPError,
         httpx.ConnectError,
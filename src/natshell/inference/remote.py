@@ -269,3 +269,9 @@ class RemoteEngine:
 
     async def close(self) -> None:
         await self.client.aclose()
+
+    async def __aenter__(self) -> RemoteEngine:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
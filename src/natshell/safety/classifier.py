@@ -6,6 +6,7 @@ import logging
 import os
 import re
 from enum import Enum
+from functools import lru_cache
 from pathlib import Path
 
 from natshell.config import SafetyConfig
@@ -71,6 +72,12 @@ _WRAPPER_COMMANDS = frozenset(
 # Leading VAR=value assignments, e.g. `LC_ALL=C rm -rf /`
 _ENV_ASSIGN_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*=(?:\"[^\"]*\"|'[^']*'|[^\s]*)\s+")
 
+# Backtick or $(...) command substitution
+_SUBSHELL_RE = re.compile(r"`[^`]+`|\$\([^)]+\)")
+
+# Output redirected into a system directory
+_SYSTEM_REDIRECT_RE = re.compile(r">\s*/(?:etc|boot|usr|var/lib)/")
+
 
 def _normalize_invocation(command: str) -> str:
     """Strip env assignments, wrapper commands and the executable's path.
@@ -146,6 +153,32 @@ def _is_sensitive_path(path: str) -> bool:
     )
 
 
+# Backreferences (\1, (?P=name)) depend on group numbering and names, which
+# change once patterns are joined into one alternation.
+_BACKREF_RE = re.compile(r"\\[1-9]|\(\?P=")
+
+
+@lru_cache(maxsize=16)
+def _compile_patterns(patterns: tuple[str, ...]) -> tuple[re.Pattern[str], ...]:
+    """Compile a config pattern list, once per distinct list.
+
+    The patterns are joined into a single alternation so each check is one
+    regex search instead of one per pattern; callers only ask whether *any*
+    pattern matches, which the alternation answers the same way.  Lists that
+    cannot be joined safely (backreferences, inline global flags, duplicate
+    group names) are compiled one by one.  Classifiers built from the same
+    config share the compiled tuples.
+    """
+    if not patterns:
+        return ()
+    if not any(_BACKREF_RE.search(p) for p in patterns):
+        try:
+            return (re.compile("|".join(f"(?:{p})" for p in patterns)),)
+        except re.error:
+            pass
+    return tuple(re.compile(p) for p in patterns)
+
+
 class SafetyClassifier:
     """Classify tool calls by risk level using regex patterns."""
 
@@ -153,8 +186,8 @@ class SafetyClassifier:
         self, config: SafetyConfig, confirm_required: set[str] | None = None
     ) -> None:
         self.mode = config.mode
-        self._confirm_patterns = [re.compile(p) for p in config.always_confirm]
-        self._blocked_patterns = [re.compile(p) for p in config.blocked]
+        self._confirm_patterns = _compile_patterns(tuple(config.always_confirm))
+        self._blocked_patterns = _compile_patterns(tuple(config.blocked))
         # Tool names declaring requires_confirmation=True in their definition.
         # Used for escalation only — never to downgrade a computed risk.
         self._confirm_required = set(confirm_required or ())
@@ -208,7 +241,7 @@ class SafetyClassifier:
                     return Risk.CONFIRM
 
         # Flag commands using subshells or backtick expansion
-        if re.search(r"`[^`]+`|\$\([^)]+\)", command):
+        if _SUBSHELL_RE.search(command):
             return Risk.CONFIRM
 
         return Risk.SAFE
@@ -241,7 +274,7 @@ class SafetyClassifier:
             return Risk.CONFIRM
 
         # Heuristic: redirecting to system paths
-        if re.search(r">\s*/(?:etc|boot|usr|var/lib)/", command):
+        if _SYSTEM_REDIRECT_RE.search(command):
             return Risk.CONFIRM
 
         return Risk.SAFE
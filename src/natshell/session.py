@@ -4,27 +4,74 @@ from __future__ import annotations
 
 import json
 import logging
+import os
 import re
-import uuid
+import secrets
+import tempfile
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
 from natshell.platform import data_dir as _data_dir
 
+try:
+    import orjson
+except ImportError:  # optional speedup (natshell[fast]); stdlib json otherwise
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
-_SESSION_ID_RE = re.compile(r"^[a-f0-9]{32}$")
+_SESSION_ID_RE = re.compile(r"[a-f0-9]{32}")
 # Short-prefix form accepted by ``load`` — hex only, at least 4 chars so
 # that ``/load a`` doesn't resolve against every session that happens to
 # start with an ``a``. 31 is the upper bound because 32 is the full ID.
-_SESSION_ID_PREFIX_RE = re.compile(r"^[a-f0-9]{4,31}$")
+_SESSION_ID_PREFIX_RE = re.compile(r"[a-f0-9]{4,31}")
 
 # Default max serialized session size: 10 MB
 _DEFAULT_MAX_SIZE = 10 * 1024 * 1024
 
 SESSION_DIR = _data_dir() / "sessions"
 
+# Summaries of the session files, keyed by file name and tagged with each
+# file's (mtime_ns, size), so list_sessions only parses files that changed.
+_INDEX_NAME = ".index.json"
+
+# Keys every summary carries; a cached summary missing any is re-derived.
+_SUMMARY_KEYS = frozenset({"id", "name", "created", "updated", "message_count"})
+
+
+def _dumps(data: Any) -> bytes:
+    """Serialize *data* as indented UTF-8 JSON, using orjson when installed.
+
+    Long conversations make session files large, and orjson encodes them
+    several times faster.  Anything orjson rejects (integers wider than 64
+    bits, say) goes through the stdlib encoder instead.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                data,
+                default=str,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+            )
+        except TypeError:
+            pass
+    return json.dumps(data, indent=2, default=str).encode()
+
+
+def _loads(raw: bytes) -> Any:
+    """Parse JSON bytes.  Raises json.JSONDecodeError on invalid input.
+
+    The stdlib parser is retried on what orjson rejects, so files holding the
+    NaN/Infinity literals the stdlib encoder writes still load.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw)
+
 
 class AmbiguousSessionID(ValueError):
     """Raised when a short session-ID prefix matches more than one session.
@@ -69,7 +116,7 @@ class SessionManager:
     @staticmethod
     def _validate_session_id(session_id: str) -> None:
         """Reject session IDs that aren't 32-char lowercase hex (UUID hex)."""
-        if not _SESSION_ID_RE.match(session_id):
+        if not _SESSION_ID_RE.fullmatch(session_id):
             raise ValueError(f"Invalid session ID: {session_id!r}")
 
     # ── public API ────────────────────────────────────────────────────
@@ -94,20 +141,32 @@ class SessionManager:
             name is derived from the first user message.
         session_id:
             If provided, overwrite an existing session file.  Otherwise
-            a new UUID is generated.
+            a new random 32-char hex ID is generated.
 
         Returns
         -------
         str
-            The session ID (uuid).
+            The session ID.
         """
         self._dir.mkdir(parents=True, exist_ok=True)
         self._dir.chmod(0o700)
 
         now = datetime.now(timezone.utc).isoformat()
-        sid = session_id or uuid.uuid4().hex
+        sid = session_id or secrets.token_hex(16)
         self._validate_session_id(sid)
 
+        # Message text alone is a lower bound on the encoded size (escaping and
+        # UTF-8 only add bytes), so a session that is certainly too large is
+        # rejected without serializing it.
+        text_size = sum(
+            len(m["content"]) for m in messages if isinstance(m.get("content"), str)
+        )
+        if text_size > self._max_size:
+            raise RuntimeError(
+                f"Session too large (at least {text_size} bytes, "
+                f"limit {self._max_size} bytes)"
+            )
+
         # Auto-generate a name from the first user message
         if not name:
             name = self._auto_name(messages)
@@ -118,7 +177,7 @@ class SessionManager:
         created = now
         if path.exists():
             try:
-                existing = json.loads(path.read_text())
+                existing = _loads(path.read_bytes())
                 created = existing.get("created", now)
             except (json.JSONDecodeError, OSError):
                 pass
@@ -132,13 +191,14 @@ class SessionManager:
             "messages": messages,
         }
 
-        serialized = json.dumps(data, indent=2, default=str)
-        if len(serialized.encode()) > self._max_size:
+        serialized = _dumps(data)
+        if len(serialized) > self._max_size:
             raise RuntimeError(
-                f"Session too large ({len(serialized.encode())} bytes, "
+                f"Session too large ({len(serialized)} bytes, "
                 f"limit {self._max_size} bytes)"
             )
-        path.write_text(serialized)
+        path.write_bytes(serialized)
+        self._index_saved(path, data)
         logger.info("Session saved: %s (%s)", sid, name)
         return sid
 
@@ -166,7 +226,7 @@ class SessionManager:
         if not path.exists():
             return None
         try:
-            return json.loads(path.read_text())
+            return _loads(path.read_bytes())
         except (json.JSONDecodeError, OSError) as exc:
             logger.warning("Failed to load session %s: %s", resolved, exc)
             return None
@@ -181,16 +241,16 @@ class SessionManager:
         - Anything else (non-hex, too short, path separators) → raises
           ``ValueError``.
         """
-        if _SESSION_ID_RE.match(session_id):
+        if _SESSION_ID_RE.fullmatch(session_id):
             return session_id
-        if not _SESSION_ID_PREFIX_RE.match(session_id):
+        if not _SESSION_ID_PREFIX_RE.fullmatch(session_id):
             raise ValueError(f"Invalid session ID: {session_id!r}")
         if not self._dir.is_dir():
             return None
         matches = sorted(
             p.stem
             for p in self._dir.glob(f"{session_id}*.json")
-            if _SESSION_ID_RE.match(p.stem)
+            if _SESSION_ID_RE.fullmatch(p.stem)
         )
         if not matches:
             return None
@@ -203,25 +263,44 @@ class SessionManager:
 
         Each entry contains: ``id``, ``name``, ``created``, ``updated``,
         ``message_count``.  Sorted by *updated* descending (newest first).
+
+        Summaries come from a sidecar index; a session file is only parsed
+        when its mtime or size no longer matches the index, so sessions
+        written, replaced or deleted by anything else are still picked up.
         """
         if not self._dir.is_dir():
             return []
 
+        index = self._read_index()
+        fresh: dict[str, Any] = {}
         sessions: list[dict[str, Any]] = []
-        for path in self._dir.glob("*.json"):
-            try:
-                data = json.loads(path.read_text())
-                sessions.append(
-                    {
-                        "id": data["id"],
-                        "name": data.get("name", ""),
-                        "created": data.get("created", ""),
-                        "updated": data.get("updated", ""),
-                        "message_count": len(data.get("messages", [])),
-                    }
-                )
-            except (json.JSONDecodeError, KeyError, OSError) as exc:
-                logger.warning("Skipping corrupt session file %s: %s", path.name, exc)
+        with os.scandir(self._dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if not name.endswith(".json") or name == _INDEX_NAME:
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                    stamp = [st.st_mtime_ns, st.st_size]
+                    cached = index.get(name)
+                    summary = cached.get("summary") if isinstance(cached, dict) else None
+                    if (
+                        not isinstance(summary, dict)
+                        or cached.get("stamp") != stamp
+                        or not _SUMMARY_KEYS <= summary.keys()
+                    ):
+                        with open(entry.path, "rb") as f:
+                            summary = self._summarize(_loads(f.read()))
+                except (json.JSONDecodeError, KeyError, OSError) as exc:
+                    logger.warning("Skipping corrupt session file %s: %s", name, exc)
+                    continue
+                fresh[name] = {"stamp": stamp, "summary": summary}
+                sessions.append(summary)
+
+        if fresh != index:
+            self._write_index(fresh)
         sessions.sort(key=lambda s: s["updated"], reverse=True)
         return sessions
 
@@ -237,6 +316,55 @@ class SessionManager:
 
     # ── helpers ────────────────────────────────────────────────────────
 
+    @staticmethod
+    def _summarize(data: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "id": data["id"],
+            "name": data.get("name", ""),
+            "created": data.get("created", ""),
+            "updated": data.get("updated", ""),
+            "message_count": len(data.get("messages", [])),
+        }
+
+    def _index_saved(self, path: Path, data: dict[str, Any]) -> None:
+        """Record a just-written session in the index.
+
+        The summary is already in hand, so the next list_sessions() finds a
+        matching entry instead of parsing the whole file back.
+        """
+        try:
+            st = path.stat()
+        except OSError:
+            return
+        index = self._read_index()
+        index[path.name] = {
+            "stamp": [st.st_mtime_ns, st.st_size],
+            "summary": self._summarize(data),
+        }
+        self._write_index(index)
+
+    def _read_index(self) -> dict[str, Any]:
+        """Load the sidecar index, or ``{}`` if it is missing or unreadable."""
+        try:
+            index = _loads((self._dir / _INDEX_NAME).read_bytes())
+        except (json.JSONDecodeError, OSError):
+            return {}
+        return index if isinstance(index, dict) else {}
+
+    def _write_index(self, index: dict[str, Any]) -> None:
+        """Replace the sidecar index atomically.  Failures are not fatal."""
+        try:
+            fd, tmp = tempfile.mkstemp(dir=str(self._dir), prefix=".index-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(_dumps(index))
+                os.replace(tmp, self._dir / _INDEX_NAME)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError as exc:
+            logger.debug("Could not update session index: %s", exc)
+
     @staticmethod
     def _auto_name(messages: list[dict[str, Any]]) -> str:
         """Derive a short name from the first user message."""
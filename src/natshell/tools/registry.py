@@ -5,6 +5,7 @@ from __future__ import annotations
 import inspect
 import logging
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any, Awaitable, Callable
 
 from natshell.tools.limits import ToolLimits
@@ -274,8 +275,9 @@ class ToolRegistry:
         return list(self._tools.keys())
 
 
-def create_default_registry() -> ToolRegistry:
-    """Create a registry with all built-in tools registered."""
+@lru_cache(maxsize=1)
+def _builtin_tools() -> tuple[tuple[ToolDefinition, ToolHandler], ...]:
+    """Resolve the built-in tool modules once; the pairs are immutable after import."""
     from natshell.tools.edit_file import DEFINITION as EDIT_DEF
     from natshell.tools.edit_file import edit_file
     from natshell.tools.execute_shell import DEFINITION as EXEC_DEF
@@ -303,18 +305,31 @@ def create_default_registry() -> ToolRegistry:
     from natshell.tools.write_file import DEFINITION as WRITE_DEF
     from natshell.tools.write_file import write_file
 
+    return (
+        (EXEC_DEF, execute_shell),
+        (READ_DEF, read_file),
+        (WRITE_DEF, write_file),
+        (EDIT_DEF, edit_file),
+        (LIST_DEF, list_directory),
+        (SEARCH_DEF, search_files),
+        (RUN_CODE_DEF, run_code),
+        (GIT_DEF, git_tool),
+        (HELP_DEF, natshell_help),
+        (FETCH_URL_DEF, fetch_url),
+        (CONFIG_DEF, update_config),
+        (KIWIX_DEF, kiwix_search),
+        (SKILL_DEF, skill),
+    )
+
+
+def create_default_registry() -> ToolRegistry:
+    """Create a registry with all built-in tools registered.
+
+    Each call returns a fresh registry — callers such as ``load_skills``
+    register extra tools and adjust ``limits`` on it — but the tool modules
+    are only resolved on the first call.
+    """
     registry = ToolRegistry()
-    registry.register(EXEC_DEF, execute_shell)
-    registry.register(READ_DEF, read_file)
-    registry.register(WRITE_DEF, write_file)
-    registry.register(EDIT_DEF, edit_file)
-    registry.register(LIST_DEF, list_directory)
-    registry.register(SEARCH_DEF, search_files)
-    registry.register(RUN_CODE_DEF, run_code)
-    registry.register(GIT_DEF, git_tool)
-    registry.register(HELP_DEF, natshell_help)
-    registry.register(FETCH_URL_DEF, fetch_url)
-    registry.register(CONFIG_DEF, update_config)
-    registry.register(KIWIX_DEF, kiwix_search)
-    registry.register(SKILL_DEF, skill)
+    for definition, handler in _builtin_tools():
+        registry.register(definition, handler)
     return registry
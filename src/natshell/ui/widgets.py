@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import difflib
+from collections import deque
 from pathlib import Path
 from typing import Any
 
@@ -21,6 +22,8 @@ from natshell.ui.code_fence import parse_code_fences
 from natshell.ui.escape import escape_markup as _escape
 from natshell.ui.syntax_render import render_segments
 
+_MAX_HISTORY = 1000  # oldest entries are dropped beyond this
+
 
 class HistoryInput(Input):
     """Input widget with shell-like up/down arrow history navigation."""
@@ -41,7 +44,7 @@ class HistoryInput(Input):
 
     def __init__(self, **kwargs) -> None:
         super().__init__(**kwargs)
-        self._history: list[str] = []
+        self._history: deque[str] = deque(maxlen=_MAX_HISTORY)
         self._history_index: int = -1  # -1 = not navigating
         self._draft: str = ""
         self._pasted_text: str | None = None  # full pasted content
@@ -66,21 +69,23 @@ class HistoryInput(Input):
         if self._history_index == -1:
             # First press — save current input as draft
             self._draft = self.value
-            self._history_index = len(self._history) - 1
-        elif self._history_index > 0:
-            self._history_index -= 1
+            index = len(self._history) - 1
         else:
-            return  # Already at oldest
-        self.value = self._history[self._history_index]
+            index = max(self._history_index - 1, 0)
+            if index == self._history_index:
+                return  # Already at oldest
+        self._history_index = index
+        self.value = self._history[index]
         self.cursor_position = len(self.value)
 
     def action_history_forward(self) -> None:
         """Navigate to the next (newer) history entry."""
         if self._history_index == -1:
             return  # Not navigating
-        if self._history_index < len(self._history) - 1:
-            self._history_index += 1
-            self.value = self._history[self._history_index]
+        index = self._history_index + 1
+        if index < len(self._history):
+            self._history_index = index
+            self.value = self._history[index]
         else:
             # Past newest — restore draft
             self._history_index = -1
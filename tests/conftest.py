@@ -0,0 +1,17 @@
+"""Shared pytest configuration."""
+
+from __future__ import annotations
+
+import pytest
+
+from natshell.tools.registry import create_default_registry
+
+
+@pytest.fixture(scope="module")
+def default_registry():
+    """A registry with the built-in tools, shared read-only within a module.
+
+    Tests that register extra tools or change ``limits`` must build their own
+    with ``create_default_registry()``.
+    """
+    return create_default_registry()
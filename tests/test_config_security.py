@@ -12,6 +12,7 @@ from natshell.config import (
     _toml_escape,
     _write_config_atomically,
     load_config,
+    load_config_from_string,
     save_config_value,
     save_skills_disabled,
 )
@@ -186,3 +187,14 @@ class TestLoadConfigFaultTolerance:
         cfg = load_config(bad_cfg)
         # Gracefully returns defaults instead of crashing
         assert isinstance(cfg, NatShellConfig)
+
+    def test_load_config_from_bad_string_raises(self):
+        # Text handed over directly is not a config file to fall back from
+        with pytest.raises(tomllib.TOMLDecodeError):
+            load_config_from_string("[unterminated\n")
+
+    def test_load_config_from_string_matches_file(self, tmp_path):
+        text = '[agent]\nmax_steps = 42\n\n[profiles.lite]\nn_ctx = 8192\n'
+        cfg_file = tmp_path / "config.toml"
+        cfg_file.write_text(text)
+        assert load_config_from_string(text) == load_config(cfg_file)
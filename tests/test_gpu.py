@@ -2,20 +2,38 @@
 
 from __future__ import annotations
 
-from unittest.mock import patch
+import dataclasses
+import sys
+import types
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
 
 from natshell.gpu import (
+    _GPU_CACHE_TTL,
     GpuInfo,
     _classify_vendor,
+    _detect_via_nvml,
     _parse_lspci,
     _parse_nvidia_smi,
     _parse_vulkaninfo,
     _parse_wmi_gpu,
+    _sysfs_cards,
     best_gpu_index,
+    detect_gpus,
     detect_npu,
     gpu_backend_available,
 )
 
+
+@pytest.fixture(autouse=True)
+def _clear_gpu_cache():
+    detect_gpus.cache_clear()
+    yield
+    detect_gpus.cache_clear()
+
+
 # ─── _classify_vendor ────────────────────────────────────────────────────────
 
 
@@ -48,6 +66,16 @@ class TestClassifyVendor:
         assert _classify_vendor("Adreno 740") == "qualcomm"
 
 
+class TestGpuInfo:
+    def test_immutable(self):
+        gpu = GpuInfo("RTX 4090", "nvidia", 0, 24564, True)
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            gpu.vram_mb = 0
+
+    def test_no_instance_dict(self):
+        assert not hasattr(GpuInfo("RTX 4090", "nvidia", 0, 24564, True), "__dict__")
+
+
 # ─── _parse_vulkaninfo ───────────────────────────────────────────────────────
 
 
@@ -68,21 +96,26 @@ GPU1:
 """
 
 
+@pytest.fixture(scope="class")
+def parsed_vulk() -> list[GpuInfo]:
+    """VULKANINFO_SUMMARY parsed once; GpuInfo is frozen, so sharing is safe."""
+    return _parse_vulkaninfo(VULKANINFO_SUMMARY)
+
+
 class TestParseVulkaninfo:
-    def test_two_gpus(self):
-        gpus = _parse_vulkaninfo(VULKANINFO_SUMMARY)
-        assert len(gpus) == 2
+    def test_two_gpus(self, parsed_vulk):
+        assert len(parsed_vulk) == 2
 
-    def test_discrete_gpu(self):
-        gpus = _parse_vulkaninfo(VULKANINFO_SUMMARY)
+    def test_discrete_gpu(self, parsed_vulk):
+        gpus = parsed_vulk
         assert gpus[0].name == "NVIDIA GeForce RTX 4090"
         assert gpus[0].vendor == "nvidia"
         assert gpus[0].is_discrete is True
         assert gpus[0].device_index == 0
         assert gpus[0].vram_mb == 25769803776 // (1024 * 1024)
 
-    def test_integrated_gpu(self):
-        gpus = _parse_vulkaninfo(VULKANINFO_SUMMARY)
+    def test_integrated_gpu(self, parsed_vulk):
+        gpus = parsed_vulk
         assert gpus[1].name == "Intel UHD Graphics 770"
         assert gpus[1].vendor == "intel"
         assert gpus[1].is_discrete is False
@@ -143,14 +176,10 @@ GPU1:
         assert dgpu.is_discrete is True
         assert dgpu.vram_mb > igpu.vram_mb
 
-        from natshell.gpu import best_gpu_index, detect_gpus
-
-        detect_gpus.cache_clear()
         with __import__("unittest.mock", fromlist=["patch"]).patch(
             "natshell.gpu.detect_gpus", return_value=gpus
         ):
             assert best_gpu_index() == 1
-        detect_gpus.cache_clear()
 
     def test_non_device_local_heap_ignored(self):
         """heapSize lines without DEVICE_LOCAL (on same or next line) are skipped."""
@@ -189,6 +218,16 @@ class TestParseNvidiaSmi:
     def test_empty_output(self):
         assert _parse_nvidia_smi("") == []
 
+    def test_nounits_format(self):
+        """``--format=csv,noheader,nounits`` omits the MiB suffix."""
+        gpus = _parse_nvidia_smi("NVIDIA GeForce RTX 4090, 24564\n")
+        assert gpus[0].name == "NVIDIA GeForce RTX 4090"
+        assert gpus[0].vram_mb == 24564
+
+    def test_mib_without_space(self):
+        gpus = _parse_nvidia_smi("NVIDIA GeForce RTX 4060, 8192MiB\n")
+        assert gpus[0].vram_mb == 8192
+
     def test_bad_vram(self):
         output = "NVIDIA GPU, bad_value MiB\n"
         gpus = _parse_nvidia_smi(output)
@@ -245,54 +284,185 @@ class TestParseLspci:
         output = "00:1f.0 ISA bridge: Intel Corporation Device\n"
         assert _parse_lspci(output) == []
 
+    def test_sysfs_fills_vram_by_slot(self):
+        output = (
+            "03:00.0 VGA compatible controller: AMD Radeon RX 7900 XTX\n"
+            "0c:00.0 VGA compatible controller: AMD Phoenix1\n"
+        )
+        sysfs = {"03:00.0": ("amd", 24560), "0c:00.0": ("amd", 16384)}
+        gpus = _parse_lspci(output, sysfs)
+        assert [g.vram_mb for g in gpus] == [24560, 16384]
+        # A large APU carve-out does not make the iGPU discrete
+        assert [g.is_discrete for g in gpus] == [True, False]
+        assert [g.device_index for g in gpus] == [0, 1]
+
+    def test_sysfs_vendor_used_for_unrecognised_name(self):
+        output = "00:02.0 VGA compatible controller: Device 7d55\n"
+        gpus = _parse_lspci(output, {"00:02.0": ("intel", 0)})
+        assert gpus[0].vendor == "intel"
+
 
 # ─── detect_gpus ──────────────────────────────────────────────────────────────
 
 
-class TestDetectGpus:
-    def test_vulkaninfo_preferred(self):
-        """vulkaninfo is tried first when available."""
-        from natshell.gpu import detect_gpus
+def _which_only(tool):
+    return lambda cmd: f"/usr/bin/{tool}" if cmd == tool else None
 
-        detect_gpus.cache_clear()
-        with (
-            patch("natshell.gpu.shutil.which", return_value="/usr/bin/vulkaninfo"),
-            patch("natshell.gpu._run", return_value=VULKANINFO_SUMMARY),
-        ):
-            gpus = detect_gpus()
-            assert len(gpus) == 2
-            assert gpus[0].vendor == "nvidia"
-        detect_gpus.cache_clear()
 
-    def test_nvidia_smi_fallback(self):
-        """Falls back to nvidia-smi when vulkaninfo not available."""
-        from natshell.gpu import detect_gpus
+@pytest.fixture
+def gpu_env(monkeypatch):
+    """Fake the probes behind ``detect_gpus``.
 
-        detect_gpus.cache_clear()
+    The returned callable installs a ``shutil.which`` replacement and the
+    stdout every ``_run`` call yields, and returns the list of commands run.
+    sysfs and NVML report nothing unless a test overrides them.
+    """
+    monkeypatch.setattr("natshell.gpu._sysfs_cards", lambda: {})
+    monkeypatch.setattr("natshell.gpu._detect_via_nvml", lambda: [])
 
-        def which_side_effect(cmd):
-            return "/usr/bin/nvidia-smi" if cmd == "nvidia-smi" else None
+    def _apply(which, run_out):
+        calls: list[list[str]] = []
 
-        with (
-            patch("natshell.gpu.shutil.which", side_effect=which_side_effect),
-            patch("natshell.gpu._run", return_value="NVIDIA RTX 4090, 24564 MiB\n"),
-        ):
-            gpus = detect_gpus()
-            assert len(gpus) == 1
-            assert gpus[0].vram_mb == 24564
-        detect_gpus.cache_clear()
+        def fake_run(cmd, timeout=5):
+            calls.append(cmd)
+            return run_out
 
-    def test_no_tools_returns_empty(self):
-        from natshell.gpu import detect_gpus
+        monkeypatch.setattr("natshell.gpu.shutil.which", which)
+        monkeypatch.setattr("natshell.gpu._run", fake_run)
+        return calls
 
-        detect_gpus.cache_clear()
-        with (
-            patch("natshell.gpu.shutil.which", return_value=None),
-            patch("natshell.gpu._run", return_value=None),
-        ):
-            gpus = detect_gpus()
-            assert gpus == []
-        detect_gpus.cache_clear()
+    return _apply
+
+
+class TestDetectGpus:
+    def test_vulkaninfo_preferred(self, gpu_env):
+        """vulkaninfo is tried first when available."""
+        gpu_env(lambda cmd: "/usr/bin/vulkaninfo", VULKANINFO_SUMMARY)
+        gpus = detect_gpus()
+        assert len(gpus) == 2
+        assert gpus[0].vendor == "nvidia"
+
+    def test_nvidia_smi_fallback(self, gpu_env):
+        """Falls back to nvidia-smi when vulkaninfo not available."""
+        gpu_env(_which_only("nvidia-smi"), "NVIDIA RTX 4090, 24564 MiB\n")
+        gpus = detect_gpus()
+        assert len(gpus) == 1
+        assert gpus[0].vram_mb == 24564
+
+    def test_no_tools_returns_empty(self, gpu_env):
+        gpu_env(lambda cmd: None, None)
+        assert detect_gpus() == []
+
+    def test_lspci_vram_filled_from_sysfs(self, gpu_env, monkeypatch):
+        gpu_env(_which_only("lspci"), "03:00.0 VGA compatible controller: AMD Radeon RX 7900 XTX\n")
+        monkeypatch.setattr("natshell.platform.current_platform", lambda: "linux")
+        monkeypatch.setattr("natshell.gpu._sysfs_cards", lambda: {"03:00.0": ("amd", 24560)})
+        gpus = detect_gpus()
+        assert gpus == [GpuInfo("AMD Radeon RX 7900 XTX", "amd", 0, 24560, True)]
+
+    def test_nvml_used_before_nvidia_smi(self, gpu_env, monkeypatch):
+        nvml_gpus = [GpuInfo("NVIDIA GeForce RTX 4090", "nvidia", 0, 24564, True)]
+        calls = gpu_env(_which_only("nvidia-smi"), None)
+        monkeypatch.setattr("natshell.gpu._detect_via_nvml", lambda: nvml_gpus)
+        assert detect_gpus() == nvml_gpus
+        assert calls == []
+
+    def test_result_cached_within_ttl(self, gpu_env):
+        calls = gpu_env(lambda cmd: "/usr/bin/vulkaninfo", VULKANINFO_SUMMARY)
+        detect_gpus()
+        detect_gpus()
+        assert len(calls) == 1
+
+    def test_cache_expires_after_ttl(self, gpu_env, monkeypatch):
+        calls = gpu_env(lambda cmd: "/usr/bin/vulkaninfo", VULKANINFO_SUMMARY)
+        now = [1000.0]
+        monkeypatch.setattr("natshell.gpu.time.monotonic", lambda: now[0])
+        detect_gpus()
+        now[0] += _GPU_CACHE_TTL
+        detect_gpus()
+        assert len(calls) == 2
+
+
+# ─── _detect_via_nvml ────────────────────────────────────────────────────────
+
+
+def _fake_pynvml(names, totals, init_error=False):
+    mod = types.ModuleType("pynvml")
+
+    class NVMLError(Exception):
+        pass
+
+    def nvml_init():
+        if init_error:
+            raise NVMLError("Driver Not Loaded")
+
+    mod.NVMLError = NVMLError
+    mod.nvmlInit = nvml_init
+    mod.nvmlShutdown = MagicMock()
+    mod.nvmlDeviceGetCount = lambda: len(names)
+    mod.nvmlDeviceGetHandleByIndex = lambda i: i
+    mod.nvmlDeviceGetName = lambda h: names[h]
+    mod.nvmlDeviceGetMemoryInfo = lambda h: SimpleNamespace(total=totals[h])
+    return mod
+
+
+class TestDetectViaNvml:
+    def test_not_installed(self):
+        with patch.dict(sys.modules, {"pynvml": None}):
+            assert _detect_via_nvml() == []
+
+    def test_enumerates_devices(self):
+        mod = _fake_pynvml(
+            ["NVIDIA GeForce RTX 4090", b"NVIDIA A100"],
+            [24564 * 1024 * 1024, 40960 * 1024 * 1024],
+        )
+        with patch.dict(sys.modules, {"pynvml": mod}):
+            gpus = _detect_via_nvml()
+        assert [g.name for g in gpus] == ["NVIDIA GeForce RTX 4090", "NVIDIA A100"]
+        assert [g.vram_mb for g in gpus] == [24564, 40960]
+        assert all(g.vendor == "nvidia" and g.is_discrete for g in gpus)
+        mod.nvmlShutdown.assert_called_once()
+
+    def test_init_failure(self):
+        mod = _fake_pynvml([], [], init_error=True)
+        with patch.dict(sys.modules, {"pynvml": mod}):
+            assert _detect_via_nvml() == []
+        mod.nvmlShutdown.assert_not_called()
+
+
+# ─── _sysfs_cards ────────────────────────────────────────────────────────────
+
+
+def _make_card(root, n, slot, vendor, device, pci_class="0x030000", vram=None):
+    dev = root / "devices" / f"0000:{slot}"
+    dev.mkdir(parents=True)
+    (dev / "vendor").write_text(vendor + "\n")
+    (dev / "device").write_text(device + "\n")
+    (dev / "class").write_text(pci_class + "\n")
+    if vram is not None:
+        (dev / "mem_info_vram_total").write_text(f"{vram}\n")
+    (root / f"card{n}").mkdir()
+    (root / f"card{n}" / "device").symlink_to(dev)
+
+
+class TestSysfsCards:
+    def test_keyed_by_pci_slot(self, tmp_path):
+        _make_card(tmp_path, 0, "0c:00.0", "0x1002", "0x15bf", vram=512 * 1024 * 1024)
+        _make_card(tmp_path, 1, "03:00.0", "0x1002", "0x744c", vram=24 * 1024**3)
+        (tmp_path / "card1-DP-1").mkdir()
+        with patch("natshell.gpu._SYSFS_DRM", tmp_path):
+            cards = _sysfs_cards()
+        assert cards == {"0c:00.0": ("amd", 512), "03:00.0": ("amd", 24 * 1024)}
+
+    def test_non_display_class_skipped(self, tmp_path):
+        _make_card(tmp_path, 0, "00:02.0", "0x8086", "0xa780")
+        _make_card(tmp_path, 1, "05:00.0", "0x1234", "0x0001", pci_class="0x120000")
+        with patch("natshell.gpu._SYSFS_DRM", tmp_path):
+            assert _sysfs_cards() == {"00:02.0": ("intel", 0)}
+
+    def test_missing_drm_dir(self, tmp_path):
+        with patch("natshell.gpu._SYSFS_DRM", tmp_path / "nope"):
+            assert _sysfs_cards() == {}
 
 
 # ─── best_gpu_index ───────────────────────────────────────────────────────────
@@ -300,36 +470,32 @@ class TestDetectGpus:
 
 class TestBestGpuIndex:
     def test_prefers_discrete(self):
-        from natshell.gpu import detect_gpus
-
-        detect_gpus.cache_clear()
         gpus = [
             GpuInfo("Intel UHD", "intel", 0, 2048, False),
             GpuInfo("RTX 4090", "nvidia", 1, 24564, True),
         ]
         with patch("natshell.gpu.detect_gpus", return_value=gpus):
             assert best_gpu_index() == 1
-        detect_gpus.cache_clear()
 
     def test_prefers_higher_vram(self):
-        from natshell.gpu import detect_gpus
-
-        detect_gpus.cache_clear()
         gpus = [
             GpuInfo("RTX 3060", "nvidia", 0, 12288, True),
             GpuInfo("RTX 4090", "nvidia", 1, 24564, True),
         ]
         with patch("natshell.gpu.detect_gpus", return_value=gpus):
             assert best_gpu_index() == 1
-        detect_gpus.cache_clear()
 
-    def test_no_gpus_returns_zero(self):
-        from natshell.gpu import detect_gpus
+    def test_tie_keeps_first_detected(self):
+        gpus = [
+            GpuInfo("NVIDIA A100", "nvidia", 0, 40960, True),
+            GpuInfo("NVIDIA A100", "nvidia", 1, 40960, True),
+        ]
+        with patch("natshell.gpu.detect_gpus", return_value=gpus):
+            assert best_gpu_index() == 0
 
-        detect_gpus.cache_clear()
+    def test_no_gpus_returns_zero(self):
         with patch("natshell.gpu.detect_gpus", return_value=[]):
             assert best_gpu_index() == 0
-        detect_gpus.cache_clear()
 
 
 # ─── gpu_backend_available ────────────────────────────────────────────────────
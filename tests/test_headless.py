@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from unittest.mock import AsyncMock
+import pytest
 
 from natshell.agent.context import SystemContext
 from natshell.agent.loop import AgentLoop
@@ -10,63 +10,91 @@ from natshell.config import AgentConfig, SafetyConfig
 from natshell.headless import run_headless, run_headless_exeplan, run_headless_plan
 from natshell.inference.engine import CompletionResult, ToolCall
 from natshell.safety.classifier import SafetyClassifier
-from natshell.tools.registry import create_default_registry
-
-
-def _make_agent(
-    responses: list[CompletionResult],
-    max_steps: int = 15,
-    safety_mode: str = "confirm",
-) -> AgentLoop:
-    """Create an agent with mocked inference for headless testing."""
-    engine = AsyncMock()
-    engine.chat_completion = AsyncMock(side_effect=responses)
-    tools = create_default_registry()
-    safety_config = SafetyConfig(
-        mode=safety_mode,
-        always_confirm=[r"^rm\s", r"^sudo\s"],
-        blocked=[r"^rm\s+-[rR]f\s+/\s*$"],
-    )
-    safety = SafetyClassifier(safety_config)
-    agent_config = AgentConfig(max_steps=max_steps, temperature=0.3, max_tokens=2048)
-    agent = AgentLoop(
-        engine=engine, tools=tools, safety=safety, config=agent_config
-    )
-    agent.initialize(
-        SystemContext(
-            hostname="test", distro="Test", kernel="6.0", username="tester"
+from natshell.tools.registry import ToolRegistry, create_default_registry
+
+
+class _ScriptedEngine:
+    """Engine stub that replays canned completions in order.
+
+    Exception instances in *responses* are raised instead of returned,
+    like ``side_effect`` on a mock.
+    """
+
+    def __init__(self, responses: list[CompletionResult | Exception]) -> None:
+        self._responses = iter(responses)
+
+    async def chat_completion(self, **kwargs) -> CompletionResult:
+        result = next(self._responses)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+@pytest.fixture(scope="module")
+def safety() -> SafetyClassifier:
+    """Classifier shared by every test in the module (it holds no per-run state)."""
+    return SafetyClassifier(
+        SafetyConfig(
+            mode="confirm",
+            always_confirm=[r"^rm\s", r"^sudo\s"],
+            blocked=[r"^rm\s+-[rR]f\s+/\s*$"],
         )
     )
-    return agent
+
+
+@pytest.fixture
+def tools() -> ToolRegistry:
+    """Fresh default registry; ``AgentLoop.initialize`` rewrites its limits."""
+    return create_default_registry()
+
+
+@pytest.fixture
+def make_agent(safety, tools):
+    """Return a factory creating an agent with mocked inference for headless testing."""
+
+    def _make(
+        responses: list[CompletionResult | Exception],
+        max_steps: int = 15,
+    ) -> AgentLoop:
+        engine = _ScriptedEngine(responses)
+        agent_config = AgentConfig(max_steps=max_steps, temperature=0.3, max_tokens=2048)
+        agent = AgentLoop(
+            engine=engine, tools=tools, safety=safety, config=agent_config
+        )
+        agent.initialize(
+            SystemContext(
+                hostname="test", distro="Test", kernel="6.0", username="tester"
+            )
+        )
+        return agent
+
+    return _make
 
 
 # ─── Basic operation ─────────────────────────────────────────────────────────
 
 
 class TestHeadlessBasic:
-    async def test_text_response_to_stdout(self, capsys):
-        agent = _make_agent([CompletionResult(content="Hello from headless!")])
+    async def test_text_response_to_stdout(self, make_agent, capsys):
+        agent = make_agent([CompletionResult(content="Hello from headless!")])
         code = await run_headless(agent, "hi")
         assert code == 0
-        captured = capsys.readouterr()
-        assert "Hello from headless!" in captured.out
+        out = capsys.readouterr().out
+        assert "Hello from headless!" in out
 
-    async def test_error_returns_exit_code_1(self):
-        agent = _make_agent([])
-        agent.engine.chat_completion = AsyncMock(
-            side_effect=Exception("boom")
-        )
+    async def test_error_returns_exit_code_1(self, make_agent):
+        agent = make_agent([Exception("boom")])
         code = await run_headless(agent, "fail")
         assert code == 1
 
-    async def test_empty_response_error(self):
-        agent = _make_agent([CompletionResult(content=None)])
+    async def test_empty_response_error(self, make_agent):
+        agent = make_agent([CompletionResult(content=None)])
         code = await run_headless(agent, "hi")
         assert code == 1
 
-    async def test_error_with_response_still_returns_1(self, capsys):
+    async def test_error_with_response_still_returns_1(self, make_agent):
         """Any error should return exit code 1, even if a response was also produced."""
-        agent = _make_agent([])
+        agent = make_agent([])
         # Simulate an agent that yields both ERROR and RESPONSE events
         from natshell.agent.loop import AgentEvent, EventType
 
@@ -83,77 +111,57 @@ class TestHeadlessBasic:
 
 
 class TestHeadlessToolExecution:
-    async def test_safe_tool_executes(self, capsys):
-        agent = _make_agent([
+    async def test_safe_tool_executes(self, make_agent, capsys):
+        """Safe tools run unprompted; tool output goes to stderr, the answer to stdout."""
+        agent = make_agent([
             CompletionResult(tool_calls=[
-                ToolCall(id="1", name="execute_shell", arguments={"command": "echo test"})
+                ToolCall(
+                    id="1", name="execute_shell",
+                    arguments={"command": "echo headless-marker"},
+                )
             ]),
             CompletionResult(content="Command ran successfully."),
         ])
-        code = await run_headless(agent, "run echo test")
+        code = await run_headless(agent, "run echo")
         assert code == 0
-        captured = capsys.readouterr()
-        assert "Command ran successfully." in captured.out
-
-    async def test_tool_output_to_stderr(self, capsys):
-        agent = _make_agent([
-            CompletionResult(tool_calls=[
-                ToolCall(id="1", name="execute_shell", arguments={"command": "echo hi"})
-            ]),
-            CompletionResult(content="Done."),
-        ])
-        code = await run_headless(agent, "run it")
-        assert code == 0
-        captured = capsys.readouterr()
-        assert "hi" in captured.err  # Tool output goes to stderr
+        out, err = capsys.readouterr()
+        assert "Command ran successfully." in out
+        assert "headless-marker" in err
 
 
 # ─── Confirmation handling ───────────────────────────────────────────────────
 
 
 class TestHeadlessConfirmation:
-    async def test_auto_decline_by_default(self, capsys):
-        """Without --danger-fast, confirmations are auto-declined."""
-        agent = _make_agent([
+    @pytest.mark.parametrize(
+        "auto_approve,expected",
+        [
+            (False, "declined"),  # default without --danger-fast
+            (True, "auto-approved"),
+        ],
+    )
+    async def test_confirmation_handling(self, make_agent, capsys, auto_approve, expected):
+        agent = make_agent([
             CompletionResult(tool_calls=[
                 ToolCall(
                     id="1", name="execute_shell",
-                    arguments={"command": "rm important.txt"},
+                    arguments={"command": "rm tempfile.txt"},
                 )
             ]),
-            CompletionResult(content="OK, I won't do that."),
+            CompletionResult(content="Done."),
         ])
-        code = await run_headless(agent, "delete files", auto_approve=False)
-        assert code == 0
-        captured = capsys.readouterr()
-        assert "declined" in captured.err.lower()
-
-    async def test_auto_approve_with_flag(self, capsys):
-        """With auto_approve=True, confirmations are accepted."""
-        agent = _make_agent(
-            [
-                CompletionResult(tool_calls=[
-                    ToolCall(
-                        id="1", name="execute_shell",
-                        arguments={"command": "rm tempfile.txt"},
-                    )
-                ]),
-                CompletionResult(content="File removed."),
-            ],
-            safety_mode="confirm",
-        )
-        code = await run_headless(agent, "delete temp", auto_approve=True)
+        code = await run_headless(agent, "delete temp", auto_approve=auto_approve)
         assert code == 0
-        captured = capsys.readouterr()
-        assert "auto-approved" in captured.err.lower()
+        err = capsys.readouterr().err
+        assert expected in err.lower()
 
 
 # ─── Blocked commands ────────────────────────────────────────────────────────
 
 
 class TestHeadlessBlocked:
-    async def test_blocked_command_reported(self, capsys):
-        agent = _make_agent([
+    async def test_blocked_command_reported(self, make_agent, capsys):
+        agent = make_agent([
             CompletionResult(tool_calls=[
                 ToolCall(
                     id="1", name="execute_shell",
@@ -163,16 +171,16 @@ class TestHeadlessBlocked:
             CompletionResult(content="That was blocked."),
         ])
         await run_headless(agent, "destroy everything")
-        captured = capsys.readouterr()
-        assert "BLOCKED" in captured.err
+        err = capsys.readouterr().err
+        assert "BLOCKED" in err
 
 
 # ─── Multi-step ──────────────────────────────────────────────────────────────
 
 
 class TestHeadlessMultiStep:
-    async def test_multi_step_produces_stats(self, capsys):
-        agent = _make_agent([
+    async def test_multi_step_produces_stats(self, make_agent, capsys):
+        agent = make_agent([
             CompletionResult(tool_calls=[
                 ToolCall(id="1", name="execute_shell", arguments={"command": "echo a"})
             ]),
@@ -183,17 +191,17 @@ class TestHeadlessMultiStep:
         ])
         code = await run_headless(agent, "do two things")
         assert code == 0
-        captured = capsys.readouterr()
-        assert "Both done." in captured.out
-        assert "steps" in captured.err.lower()
+        out, err = capsys.readouterr()
+        assert "Both done." in out
+        assert "steps" in err.lower()
 
 
 # ─── Planning output ─────────────────────────────────────────────────────────
 
 
 class TestHeadlessPlanning:
-    async def test_planning_text_to_stderr(self, capsys):
-        agent = _make_agent([
+    async def test_planning_text_to_stderr(self, make_agent, capsys):
+        agent = make_agent([
             CompletionResult(
                 content="Let me check...",
                 tool_calls=[
@@ -204,16 +212,16 @@ class TestHeadlessPlanning:
         ])
         code = await run_headless(agent, "list files")
         assert code == 0
-        captured = capsys.readouterr()
-        assert "Let me check" in captured.err
-        assert "Here are the files." in captured.out
+        out, err = capsys.readouterr()
+        assert "Let me check" in err
+        assert "Here are the files." in out
 
 
 # ─── Headless plan generation ────────────────────────────────────────────────
 
 
 class TestHeadlessPlan:
-    async def test_plan_generation_creates_plan(self, capsys, tmp_path, monkeypatch):
+    async def test_plan_generation_creates_plan(self, make_agent, capsys, tmp_path, monkeypatch):
         """run_headless_plan should return 0 when PLAN.md is created."""
         monkeypatch.chdir(tmp_path)
 
@@ -230,7 +238,7 @@ class TestHeadlessPlan:
             (tmp_path / "PLAN.md").write_text(plan_content)
             yield AgentEvent(type=EventType.RESPONSE, data="Plan generated.")
 
-        agent = _make_agent([])
+        agent = make_agent([])
         agent.handle_user_message = _fake_handler
 
         # Mock engine_info for n_ctx
@@ -242,11 +250,13 @@ class TestHeadlessPlan:
 
         code = await run_headless_plan(agent, "build something")
         assert code == 0
-        captured = capsys.readouterr()
-        assert "Test Plan" in captured.out
-        assert "1 steps" in captured.out or "Step 1" in captured.out
+        out = capsys.readouterr().out
+        assert "Test Plan" in out
+        assert "1 steps" in out or "Step 1" in out
 
-    async def test_plan_generation_fails_without_file(self, capsys, tmp_path, monkeypatch):
+    async def test_plan_generation_fails_without_file(
+        self, make_agent, capsys, tmp_path, monkeypatch
+    ):
         """run_headless_plan should return 1 when PLAN.md is not created."""
         monkeypatch.chdir(tmp_path)
 
@@ -255,7 +265,7 @@ class TestHeadlessPlan:
 
             yield AgentEvent(type=EventType.RESPONSE, data="I described a plan.")
 
-        agent = _make_agent([])
+        agent = make_agent([])
         agent.handle_user_message = _fake_handler
 
         from unittest.mock import MagicMock
@@ -266,15 +276,15 @@ class TestHeadlessPlan:
 
         code = await run_headless_plan(agent, "build something")
         assert code == 1
-        captured = capsys.readouterr()
-        assert "not created" in captured.err.lower()
+        err = capsys.readouterr().err
+        assert "not created" in err.lower()
 
 
 # ─── Headless plan execution ─────────────────────────────────────────────────
 
 
 class TestHeadlessExeplan:
-    async def test_exeplan_executes_steps(self, capsys, tmp_path, monkeypatch):
+    async def test_exeplan_executes_steps(self, make_agent, capsys, tmp_path, monkeypatch):
         """run_headless_exeplan should execute all steps and report results."""
         monkeypatch.chdir(tmp_path)
 
@@ -297,7 +307,7 @@ class TestHeadlessExeplan:
                 data=f"Completed step work (call {call_count}).",
             )
 
-        agent = _make_agent([])
+        agent = make_agent([])
         agent.handle_user_message = _fake_handler
 
         from unittest.mock import MagicMock
@@ -308,19 +318,19 @@ class TestHeadlessExeplan:
 
         code = await run_headless_exeplan(agent, str(plan_file))
         assert code == 0
-        captured = capsys.readouterr()
-        assert "Passed: 2" in captured.out
-        assert "Failed: 0" in captured.out
+        out = capsys.readouterr().out
+        assert "Passed: 2" in out
+        assert "Failed: 0" in out
 
-    async def test_exeplan_file_not_found(self, capsys):
+    async def test_exeplan_file_not_found(self, make_agent, capsys):
         """run_headless_exeplan should return 1 for missing plan file."""
-        agent = _make_agent([])
+        agent = make_agent([])
         code = await run_headless_exeplan(agent, "/nonexistent/PLAN.md")
         assert code == 1
-        captured = capsys.readouterr()
-        assert "error" in captured.err.lower()
+        err = capsys.readouterr().err
+        assert "error" in err.lower()
 
-    async def test_exeplan_partial_step(self, capsys, tmp_path, monkeypatch):
+    async def test_exeplan_partial_step(self, make_agent, capsys, tmp_path, monkeypatch):
         """A step hitting max steps should count as failed."""
         monkeypatch.chdir(tmp_path)
 
@@ -338,7 +348,7 @@ class TestHeadlessExeplan:
                 data="Reached the maximum number of steps for this run.",
             )
 
-        agent = _make_agent([])
+        agent = make_agent([])
         agent.handle_user_message = _fake_handler
 
         from unittest.mock import MagicMock
@@ -349,15 +359,15 @@ class TestHeadlessExeplan:
 
         code = await run_headless_exeplan(agent, str(plan_file))
         assert code == 1
-        captured = capsys.readouterr()
-        assert "Failed: 1" in captured.out
+        out = capsys.readouterr().out
+        assert "Failed: 1" in out
 
 
 # ─── Resume support ─────────────────────────────────────────────────────────
 
 
 class TestHeadlessResume:
-    async def test_resume_skips_completed_steps(self, capsys, tmp_path, monkeypatch):
+    async def test_resume_skips_completed_steps(self, make_agent, capsys, tmp_path, monkeypatch):
         """Resume should skip passed steps and execute from failure point."""
         monkeypatch.chdir(tmp_path)
 
@@ -397,7 +407,7 @@ class TestHeadlessResume:
             call_count += 1
             yield AgentEvent(type=EventType.RESPONSE, data="Done.")
 
-        agent = _make_agent([])
+        agent = make_agent([])
         agent.handle_user_message = _fake_handler
 
         from unittest.mock import MagicMock
@@ -406,11 +416,13 @@ class TestHeadlessResume:
 
         code = await run_headless_exeplan(agent, str(plan_file), resume=True)
         assert code == 0
-        captured = capsys.readouterr()
-        assert "[skip] Step 1" in captured.err
+        err = capsys.readouterr().err
+        assert "[skip] Step 1" in err
         assert call_count == 1  # Only step 2 was executed
 
-    async def test_resume_without_state_starts_fresh(self, capsys, tmp_path, monkeypatch):
+    async def test_resume_without_state_starts_fresh(
+        self, make_agent, capsys, tmp_path, monkeypatch
+    ):
         """Resume with no state file should execute all steps."""
         monkeypatch.chdir(tmp_path)
 
@@ -425,7 +437,7 @@ class TestHeadlessResume:
 
             yield AgentEvent(type=EventType.RESPONSE, data="Done.")
 
-        agent = _make_agent([])
+        agent = make_agent([])
         agent.handle_user_message = _fake_handler
 
         from unittest.mock import MagicMock
@@ -434,10 +446,10 @@ class TestHeadlessResume:
 
         code = await run_headless_exeplan(agent, str(plan_file), resume=True)
         assert code == 0
-        captured = capsys.readouterr()
-        assert "[skip]" not in captured.err
+        err = capsys.readouterr().err
+        assert "[skip]" not in err
 
-    async def test_state_file_created_after_run(self, capsys, tmp_path, monkeypatch):
+    async def test_state_file_created_after_run(self, make_agent, tmp_path, monkeypatch):
         """A normal run should create a .state.json file."""
         monkeypatch.chdir(tmp_path)
 
@@ -452,7 +464,7 @@ class TestHeadlessResume:
 
             yield AgentEvent(type=EventType.RESPONSE, data="Done.")
 
-        agent = _make_agent([])
+        agent = make_agent([])
         agent.handle_user_message = _fake_handler
 
         from unittest.mock import MagicMock
@@ -472,7 +484,7 @@ class TestHeadlessResume:
 
 class TestHeadlessVerification:
     async def test_verify_skipped_without_auto_approve(
-        self, capsys, tmp_path, monkeypatch
+        self, make_agent, capsys, tmp_path, monkeypatch
     ):
         """Verification should not run without auto_approve."""
         monkeypatch.chdir(tmp_path)
@@ -488,7 +500,7 @@ class TestHeadlessVerification:
 
             yield AgentEvent(type=EventType.RESPONSE, data="Done.")
 
-        agent = _make_agent([])
+        agent = make_agent([])
         agent.handle_user_message = _fake_handler
 
         from unittest.mock import MagicMock
@@ -496,15 +508,15 @@ class TestHeadlessVerification:
         agent.engine.engine_info = MagicMock(return_value=MagicMock(n_ctx=4096))
 
         await run_headless_exeplan(agent, str(plan_file), auto_approve=False)
-        captured = capsys.readouterr()
-        assert "[verify]" not in captured.err
+        err = capsys.readouterr().err
+        assert "[verify]" not in err
 
 
 # ─── Telemetry in state file ──────────────────────────────────────────────
 
 
 class TestHeadlessTelemetry:
-    async def test_state_file_contains_telemetry(self, capsys, tmp_path, monkeypatch):
+    async def test_state_file_contains_telemetry(self, make_agent, tmp_path, monkeypatch):
         """State file should contain per-step telemetry from RUN_STATS."""
         monkeypatch.chdir(tmp_path)
 
@@ -528,7 +540,7 @@ class TestHeadlessTelemetry:
                 },
             )
 
-        agent = _make_agent([])
+        agent = make_agent([])
         agent.handle_user_message = _fake_handler
 
         from unittest.mock import MagicMock
@@ -544,7 +556,7 @@ class TestHeadlessTelemetry:
         assert state.step_results[0].prompt_tokens == 800
         assert state.step_results[0].tool_calls == 3
 
-    async def test_state_file_aggregates(self, capsys, tmp_path, monkeypatch):
+    async def test_state_file_aggregates(self, make_agent, tmp_path, monkeypatch):
         """PlanState aggregates should equal sum of step values."""
         monkeypatch.chdir(tmp_path)
 
@@ -573,7 +585,7 @@ class TestHeadlessTelemetry:
                 },
             )
 
-        agent = _make_agent([])
+        agent = make_agent([])
         agent.handle_user_message = _fake_handler
 
         from unittest.mock import MagicMock
@@ -597,7 +609,7 @@ class TestHeadlessTelemetry:
 
 
 class TestHeadlessProgressIndicator:
-    async def test_progress_format_includes_budget(self, capsys, tmp_path, monkeypatch):
+    async def test_progress_format_includes_budget(self, make_agent, capsys, tmp_path, monkeypatch):
         """Executing lines should show call count and budget."""
         monkeypatch.chdir(tmp_path)
 
@@ -617,7 +629,7 @@ class TestHeadlessProgressIndicator:
             )
             yield AgentEvent(type=EventType.RESPONSE, data="Done.")
 
-        agent = _make_agent([])
+        agent = make_agent([])
         agent.handle_user_message = _fake_handler
 
         from unittest.mock import MagicMock
@@ -625,6 +637,33 @@ class TestHeadlessProgressIndicator:
         agent.engine.engine_info = MagicMock(return_value=MagicMock(n_ctx=4096))
 
         await run_headless_exeplan(agent, str(plan_file))
-        captured = capsys.readouterr()
-        assert "calls," in captured.err
-        assert "1/" in captured.err
+        err = capsys.readouterr().err
+        assert "calls," in err
+        assert "1/" in err
+
+
+# ─── Remote client cleanup ──────────────────────────────────────────────────
+
+
+class TestClosingRemoteClient:
+    @pytest.mark.parametrize("fails", [False, True])
+    async def test_client_closed_after_run(self, monkeypatch, fails):
+        from natshell.__main__ import _closing_remote_client
+
+        closed = []
+
+        async def _close() -> None:
+            closed.append(True)
+
+        async def _run() -> int:
+            if fails:
+                raise RuntimeError("boom")
+            return 3
+
+        monkeypatch.setattr("natshell.inference.ollama.close_client", _close)
+        if fails:
+            with pytest.raises(RuntimeError):
+                await _closing_remote_client(_run())
+        else:
+            assert await _closing_remote_client(_run()) == 3
+        assert closed == [True]
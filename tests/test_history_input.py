@@ -1,6 +1,8 @@
 """Tests for HistoryInput widget history logic."""
 
-from natshell.ui.widgets import HistoryInput
+from collections import deque
+
+from natshell.ui.widgets import _MAX_HISTORY, HistoryInput
 
 
 class _TestInput(HistoryInput):
@@ -8,7 +10,7 @@ class _TestInput(HistoryInput):
 
     def __init__(self):
         # Only init history state, skip Textual Input.__init__
-        self._history: list[str] = []
+        self._history: deque[str] = deque(maxlen=_MAX_HISTORY)
         self._history_index: int = -1
         self._draft: str = ""
         self._pasted_text: str | None = None
@@ -43,31 +45,39 @@ class TestAddToHistory:
     def test_basic_add(self):
         w = _make()
         w.add_to_history("hello")
-        assert w._history == ["hello"]
+        assert list(w._history) == ["hello"]
 
     def test_whitespace_stripping(self):
         w = _make()
         w.add_to_history("  hello  ")
-        assert w._history == ["hello"]
+        assert list(w._history) == ["hello"]
 
     def test_empty_rejected(self):
         w = _make()
         w.add_to_history("")
         w.add_to_history("   ")
-        assert w._history == []
+        assert list(w._history) == []
 
     def test_consecutive_dedup(self):
         w = _make()
         w.add_to_history("hello")
         w.add_to_history("hello")
-        assert w._history == ["hello"]
+        assert list(w._history) == ["hello"]
 
     def test_non_consecutive_duplicates_allowed(self):
         w = _make()
         w.add_to_history("hello")
         w.add_to_history("world")
         w.add_to_history("hello")
-        assert w._history == ["hello", "world", "hello"]
+        assert list(w._history) == ["hello", "world", "hello"]
+
+    def test_oldest_dropped_at_cap(self):
+        w = _make()
+        for i in range(_MAX_HISTORY + 5):
+            w.add_to_history(f"cmd {i}")
+        assert len(w._history) == _MAX_HISTORY
+        assert w._history[0] == "cmd 5"
+        assert w._history[-1] == f"cmd {_MAX_HISTORY + 4}"
 
     def test_resets_nav_state(self):
         w = _make()
@@ -122,6 +132,14 @@ class TestNavigation:
         assert w.value == "only"
         assert w._history_index == 0
 
+    def test_back_at_oldest_keeps_edits(self):
+        w = _make()
+        w.add_to_history("only")
+        w.action_history_back()
+        w.value = "only --edited"
+        w.action_history_back()
+        assert w.value == "only --edited"
+
     def test_forward_without_navigating(self):
         w = _make()
         w.add_to_history("hello")
@@ -170,7 +188,7 @@ class TestClearHistory:
         w._history_index = 1
         w._draft = "draft"
         w.clear_history()
-        assert w._history == []
+        assert list(w._history) == []
         assert w._history_index == -1
         assert w._draft == ""
 
@@ -183,7 +201,7 @@ class TestSlashCommands:
         w.add_to_history("/help")
         w.add_to_history("/clear")
         w.add_to_history("/model list")
-        assert w._history == ["/help", "/clear", "/model list"]
+        assert list(w._history) == ["/help", "/clear", "/model list"]
 
 
 class TestPasteHandling:
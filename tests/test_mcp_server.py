@@ -10,12 +10,20 @@ from __future__ import annotations
 
 import sys
 import types
-from unittest.mock import AsyncMock, MagicMock
+from contextlib import asynccontextmanager
 
 import pytest
 
-from natshell.config import McpConfig, SafetyConfig
+from natshell.config import McpConfig, NatShellConfig, SafetyConfig
+from natshell.mcp_server import (
+    _build_resource_list,
+    _build_tool_list,
+    _execute_tool,
+    _read_resource,
+    create_mcp_server,
+)
 from natshell.safety.classifier import Risk, SafetyClassifier
+from natshell.tools.natshell_help import VALID_TOPICS
 from natshell.tools.registry import ToolDefinition, ToolRegistry, ToolResult
 
 # ── Helpers ────────────────────────────────────────────────────────────────
@@ -88,8 +96,13 @@ def _make_mock_mcp_modules():
         async def run(self, read_stream, write_stream, init_options):
             pass
 
+    # mcp.server.stdio.stdio_server stub: yields (read_stream, write_stream)
+    @asynccontextmanager
+    async def stdio_server():
+        yield None, None
+
     mcp_server.Server = FakeServer
-    mcp_server_stdio.stdio_server = AsyncMock()
+    mcp_server_stdio.stdio_server = stdio_server
 
     mcp.types = mcp_types
     mcp.server = mcp_server
@@ -103,51 +116,64 @@ def _make_mock_mcp_modules():
     }
 
 
-@pytest.fixture(autouse=True)
-def _mock_mcp(monkeypatch):
-    """Inject mock mcp modules into sys.modules for every test, then clean up."""
+@pytest.fixture(scope="module", autouse=True)
+def _mock_mcp():
+    """Inject mock mcp modules into sys.modules for this module's tests.
+
+    Module scope keeps the fakes away from other test modules, including a
+    real ``mcp`` install.  It rules out ``monkeypatch``, so the originals are
+    recorded and put back on teardown; a module that was absent before is
+    removed again.
+    """
     mocks = _make_mock_mcp_modules()
-    original = {}
+    original = {name: sys.modules.get(name) for name in mocks}
     for name, mod in mocks.items():
-        original[name] = sys.modules.get(name)
-        monkeypatch.setitem(sys.modules, name, mod)
-
-    # Force-reload the mcp_server module so it picks up the mocks
-    import importlib
-
-    import natshell.mcp_server
-    importlib.reload(natshell.mcp_server)
+        sys.modules[name] = mod
 
+    # natshell.mcp_server imports mcp inside each function, so the mocks are
+    # picked up at call time; there is no module state to reload.
     yield mocks
 
-    # importlib.reload would restore real state next time if needed
+    for name, mod in original.items():
+        if mod is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = mod
 
 
-def _make_registry_with_tool() -> ToolRegistry:
-    """Create a ToolRegistry with a single test tool."""
-    registry = ToolRegistry()
+async def _echo_handler(message: str = "") -> ToolResult:
+    return ToolResult(output=f"echo: {message}")
+
 
-    async def _echo_handler(message: str = "") -> ToolResult:
-        return ToolResult(output=f"echo: {message}")
-
-    defn = ToolDefinition(
-        name="echo_test",
-        description="Echo a message back",
-        parameters={
-            "type": "object",
-            "properties": {
-                "message": {"type": "string", "description": "The message to echo"},
-            },
-            "required": ["message"],
+_ECHO_DEFN = ToolDefinition(
+    name="echo_test",
+    description="Echo a message back",
+    parameters={
+        "type": "object",
+        "properties": {
+            "message": {"type": "string", "description": "The message to echo"},
         },
-    )
-    registry.register(defn, _echo_handler)
+        "required": ["message"],
+    },
+)
+
+
+@pytest.fixture
+def echo_registry() -> ToolRegistry:
+    """A fresh ToolRegistry holding only the echo_test tool."""
+    registry = ToolRegistry()
+    registry.register(_ECHO_DEFN, _echo_handler)
     return registry
 
 
-def _make_safety(mode: str = "confirm") -> SafetyClassifier:
-    """Create a SafetyClassifier with default patterns."""
-    return SafetyClassifier(SafetyConfig(mode=mode))
+@pytest.fixture(scope="module")
+def safety() -> SafetyClassifier:
+    """A SafetyClassifier with default patterns, compiled once per module.
+
+    Tests that override a method must do so through ``monkeypatch`` so the
+    change is undone before the next test.
+    """
+    return SafetyClassifier(SafetyConfig(mode="confirm"))
 
 
 # ── Tests ──────────────────────────────────────────────────────────────────
@@ -156,27 +182,20 @@ def _make_safety(mode: str = "confirm") -> SafetyClassifier:
 class TestBuildToolList:
     """Test that NatShell tools are correctly mapped to MCP Tool objects."""
 
-    def test_single_tool(self):
-        from natshell.mcp_server import _build_tool_list
-
-        registry = _make_registry_with_tool()
-        tools = _build_tool_list(registry)
+    def test_single_tool(self, echo_registry):
+        tools = _build_tool_list(echo_registry)
 
         assert len(tools) == 1
         assert tools[0].name == "echo_test"
         assert tools[0].description == "Echo a message back"
         assert "properties" in tools[0].inputSchema
 
-    def test_multiple_tools(self):
-        from natshell.mcp_server import _build_tool_list
-
-        registry = _make_registry_with_tool()
-
+    def test_multiple_tools(self, echo_registry):
         # Add a second tool
         async def _noop_handler() -> ToolResult:
             return ToolResult(output="ok")
 
-        registry.register(
+        echo_registry.register(
             ToolDefinition(
                 name="noop",
                 description="Do nothing",
@@ -185,30 +204,23 @@ class TestBuildToolList:
             _noop_handler,
         )
 
-        tools = _build_tool_list(registry)
+        tools = _build_tool_list(echo_registry)
         assert len(tools) == 2
         names = {t.name for t in tools}
         assert names == {"echo_test", "noop"}
 
-    def test_default_registry_tools(self):
+    def test_default_registry_tools(self, default_registry):
         """Ensure all default NatShell tools are exposed."""
-        from natshell.mcp_server import _build_tool_list
-        from natshell.tools.registry import create_default_registry
-
-        registry = create_default_registry()
-        tools = _build_tool_list(registry)
+        tools = _build_tool_list(default_registry)
 
         names = {t.name for t in tools}
-        assert "execute_shell" in names
-        assert "read_file" in names
-        assert "write_file" in names
-        assert "edit_file" in names
+        assert {"execute_shell", "read_file", "write_file", "edit_file"} <= names
 
 
 class TestExecuteTool:
     """Test tool execution with safety classification."""
 
-    async def test_unclassified_tool_is_not_auto_approved(self):
+    async def test_unclassified_tool_is_not_auto_approved(self, safety, echo_registry):
         """A tool with no classification rule must not run unconfirmed.
 
         This test previously asserted the opposite: `echo_test` has no branch
@@ -217,133 +229,86 @@ class TestExecuteTool:
         now fails closed, so an unlisted tool is CONFIRM and strict mode
         refuses it.
         """
-        from natshell.mcp_server import _execute_tool
-
-        registry = _make_registry_with_tool()
-        safety = _make_safety()
         mcp_config = McpConfig()
 
         with pytest.raises(ValueError, match="requires confirmation"):
             await _execute_tool(
-                registry, safety, mcp_config, "echo_test", {"message": "hello"}
+                echo_registry, safety, mcp_config, "echo_test", {"message": "hello"}
             )
 
-    async def test_unclassified_tool_executes_in_permissive_mode(self):
+    async def test_unclassified_tool_executes_in_permissive_mode(self, safety, echo_registry):
         """Permissive MCP mode still auto-approves, and the call succeeds."""
-        from natshell.mcp_server import _execute_tool
-
-        registry = _make_registry_with_tool()
-        safety = _make_safety()
         mcp_config = McpConfig(safety_mode="permissive")
 
         result = await _execute_tool(
-            registry, safety, mcp_config, "echo_test", {"message": "hello"}
+            echo_registry, safety, mcp_config, "echo_test", {"message": "hello"}
         )
         assert len(result) == 1
         assert "echo: hello" in result[0].text
 
-    async def test_read_only_tool_executes(self):
+    async def test_read_only_tool_executes(self, safety, default_registry):
         """Tools on the read-only allowlist stay SAFE and run in strict mode."""
-        from natshell.mcp_server import _execute_tool
-        from natshell.tools.registry import create_default_registry
-
-        registry = create_default_registry()
-        safety = _make_safety()
         mcp_config = McpConfig()
 
         result = await _execute_tool(
-            registry, safety, mcp_config, "list_directory", {"path": "."}
+            default_registry, safety, mcp_config, "list_directory", {"path": "."}
         )
         assert len(result) == 1
 
-    async def test_blocked_tool_raises(self):
-        from natshell.mcp_server import _execute_tool
-
-        registry = _make_registry_with_tool()
-        safety = _make_safety()
-        mcp_config = McpConfig()
-
-        # Patch the classifier to return BLOCKED
-        safety.classify_tool_call = MagicMock(return_value=Risk.BLOCKED)
-
-        with pytest.raises(ValueError, match="blocked by safety policy"):
-            await _execute_tool(
-                registry, safety, mcp_config, "echo_test", {"message": "bad"}
-            )
-
-    async def test_confirm_strict_raises(self):
-        """In strict mode, CONFIRM-level calls should raise."""
-        from natshell.mcp_server import _execute_tool
-
-        registry = _make_registry_with_tool()
-        safety = _make_safety()
-        mcp_config = McpConfig(safety_mode="strict")
-
-        safety.classify_tool_call = MagicMock(return_value=Risk.CONFIRM)
-
-        with pytest.raises(ValueError, match="requires confirmation"):
-            await _execute_tool(
-                registry, safety, mcp_config, "echo_test", {"message": "risky"}
-            )
-
-    async def test_confirm_permissive_executes(self):
-        """In permissive mode, CONFIRM-level calls should auto-approve."""
-        from natshell.mcp_server import _execute_tool
-
-        registry = _make_registry_with_tool()
-        safety = _make_safety()
-        mcp_config = McpConfig(safety_mode="permissive")
-
-        safety.classify_tool_call = MagicMock(return_value=Risk.CONFIRM)
+    @pytest.mark.parametrize(
+        ("mode", "risk", "error"),
+        [
+            ("strict", Risk.SAFE, None),
+            ("strict", Risk.BLOCKED, "blocked by safety policy"),
+            ("strict", Risk.CONFIRM, "requires confirmation"),
+            # Permissive mode auto-approves CONFIRM but never BLOCKED
+            ("permissive", Risk.CONFIRM, None),
+            ("permissive", Risk.BLOCKED, "blocked"),
+        ],
+    )
+    async def test_safety_mode(
+        self, echo_registry, safety, monkeypatch, mode, risk, error
+    ):
+        mcp_config = McpConfig(safety_mode=mode)
+        monkeypatch.setattr(safety, "classify_tool_call", lambda name, arguments: risk)
+
+        if error is not None:
+            with pytest.raises(ValueError, match=error):
+                await _execute_tool(
+                    echo_registry, safety, mcp_config, "echo_test", {"message": "x"}
+                )
+            return
 
         result = await _execute_tool(
-            registry, safety, mcp_config, "echo_test", {"message": "ok"}
+            echo_registry, safety, mcp_config, "echo_test", {"message": "ok"}
         )
         assert len(result) == 1
         assert "echo: ok" in result[0].text
 
-    async def test_blocked_even_in_permissive(self):
-        """BLOCKED is never auto-approved, even in permissive mode."""
-        from natshell.mcp_server import _execute_tool
 
-        registry = _make_registry_with_tool()
-        safety = _make_safety()
-        mcp_config = McpConfig(safety_mode="permissive")
+@pytest.fixture(scope="class")
+def resources() -> list:
+    """The MCP resource list, built once per test class."""
+    return _build_resource_list()
 
-        safety.classify_tool_call = MagicMock(return_value=Risk.BLOCKED)
 
-        with pytest.raises(ValueError, match="blocked"):
-            await _execute_tool(
-                registry, safety, mcp_config, "echo_test", {"message": "bad"}
-            )
+@pytest.fixture(scope="class")
+def uris(resources) -> set[str]:
+    return {str(r.uri) for r in resources}
 
 
 class TestResourceListing:
     """Test MCP resource enumeration."""
 
-    def test_lists_system_context(self):
-        from natshell.mcp_server import _build_resource_list
-
-        resources = _build_resource_list()
-        uris = [str(r.uri) for r in resources]
+    def test_lists_system_context(self, uris):
         assert "natshell://system-context" in uris
 
-    def test_lists_help_topics(self):
-        from natshell.mcp_server import _build_resource_list
-        from natshell.tools.natshell_help import VALID_TOPICS
-
-        resources = _build_resource_list()
-        uris = [str(r.uri) for r in resources]
-
+    def test_lists_help_topics(self, uris):
         for topic in VALID_TOPICS:
             assert f"natshell://help/{topic}" in uris
 
-    def test_resource_count(self):
+    def test_resource_count(self, resources):
         """1 system-context + N help topics."""
-        from natshell.mcp_server import _build_resource_list
-        from natshell.tools.natshell_help import VALID_TOPICS
-
-        resources = _build_resource_list()
         assert len(resources) == 1 + len(VALID_TOPICS)
 
 
@@ -351,15 +316,11 @@ class TestReadResource:
     """Test reading MCP resource content."""
 
     async def test_read_help_topic(self):
-        from natshell.mcp_server import _read_resource
-
         content = await _read_resource("natshell://help/overview")
         assert "NatShell" in content
         assert "natural language" in content
 
     async def test_read_unknown_uri_raises(self):
-        from natshell.mcp_server import _read_resource
-
         with pytest.raises(ValueError, match="Unknown resource URI"):
             await _read_resource("natshell://nonexistent")
 
@@ -367,13 +328,8 @@ class TestReadResource:
 class TestCreateMcpServer:
     """Test that create_mcp_server produces a configured server."""
 
-    def test_creates_server(self):
-        from natshell.mcp_server import create_mcp_server
-
-        registry = _make_registry_with_tool()
-        safety = _make_safety()
-
-        server = create_mcp_server(registry, safety)
+    def test_creates_server(self, safety, echo_registry):
+        server = create_mcp_server(echo_registry, safety)
         assert server.name == "natshell"
         # Should have all four handlers registered
         assert "list_tools" in server._handlers
@@ -381,15 +337,10 @@ class TestCreateMcpServer:
         assert "list_resources" in server._handlers
         assert "read_resource" in server._handlers
 
-    def test_default_mcp_config(self):
+    def test_default_mcp_config(self, safety, echo_registry):
         """When no McpConfig is passed, defaults to strict."""
-        from natshell.mcp_server import create_mcp_server
-
-        registry = _make_registry_with_tool()
-        safety = _make_safety()
-
         # Should not raise
-        server = create_mcp_server(registry, safety)
+        server = create_mcp_server(echo_registry, safety)
         assert server is not None
 
 
@@ -405,7 +356,5 @@ class TestMcpConfig:
         assert config.safety_mode == "permissive"
 
     def test_config_in_natshell_config(self):
-        from natshell.config import NatShellConfig
-
         cfg = NatShellConfig()
         assert cfg.mcp.safety_mode == "strict"
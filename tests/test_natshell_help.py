@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 from pathlib import Path
-from unittest.mock import patch
 
 import pytest
 
@@ -14,43 +13,49 @@ from natshell.tools.natshell_help import (
     natshell_help,
     set_safety_config,
 )
-from natshell.tools.registry import create_default_registry
+from natshell.tools.registry import ToolResult
 
 # ─── static topics ────────────────────────────────────────────────────────
 
 
+_STATIC_TOPICS = [
+    "overview",
+    "commands",
+    "tools",
+    "models",
+    "troubleshooting",
+    "getting_started",
+    "profiles",
+    "sessions",
+    "plans",
+    "plugins",
+    "headless",
+    "mcp",
+    "backup",
+    "prompt_customization",
+    "keyboard_shortcuts",
+]
+
+
+@pytest.fixture(scope="module")
+async def help_outputs() -> dict[str, ToolResult]:
+    """Every static topic rendered once; the content is read-only."""
+    return {topic: await natshell_help(topic) for topic in _STATIC_TOPICS}
+
+
 class TestStaticTopics:
-    @pytest.mark.parametrize(
-        "topic",
-        [
-            "overview",
-            "commands",
-            "tools",
-            "models",
-            "troubleshooting",
-            "getting_started",
-            "profiles",
-            "sessions",
-            "plans",
-            "plugins",
-            "headless",
-            "mcp",
-            "backup",
-            "prompt_customization",
-            "keyboard_shortcuts",
-        ],
-    )
-    async def test_static_topic_returns_content(self, topic: str):
-        result = await natshell_help(topic)
+    @pytest.mark.parametrize("topic", _STATIC_TOPICS)
+    def test_static_topic_returns_content(self, help_outputs, topic: str):
+        result = help_outputs[topic]
         assert result.exit_code == 0
         assert len(result.output) > 0
 
-    async def test_overview_mentions_natshell(self):
-        result = await natshell_help("overview")
+    def test_overview_mentions_natshell(self, help_outputs):
+        result = help_outputs["overview"]
         assert "NatShell" in result.output
 
-    async def test_commands_lists_slash_commands(self):
-        result = await natshell_help("commands")
+    def test_commands_lists_slash_commands(self, help_outputs):
+        result = help_outputs["commands"]
         assert "/help" in result.output
         assert "/clear" in result.output
         assert "/model" in result.output
@@ -65,8 +70,8 @@ class TestStaticTopics:
         assert "/history" in result.output
         assert "/model download" in result.output
 
-    async def test_tools_lists_all_tools(self):
-        result = await natshell_help("tools")
+    def test_tools_lists_all_tools(self, help_outputs):
+        result = help_outputs["tools"]
         assert "execute_shell" in result.output
         assert "read_file" in result.output
         assert "edit_file" in result.output
@@ -74,56 +79,56 @@ class TestStaticTopics:
         assert "git_tool" in result.output
         assert "natshell_help" in result.output
 
-    async def test_models_mentions_qwen(self):
-        result = await natshell_help("models")
+    def test_models_mentions_qwen(self, help_outputs):
+        result = help_outputs["models"]
         assert "Qwen" in result.output
 
-    async def test_troubleshooting_has_gpu_hint(self):
-        result = await natshell_help("troubleshooting")
+    def test_troubleshooting_has_gpu_hint(self, help_outputs):
+        result = help_outputs["troubleshooting"]
         assert "GPU" in result.output or "gpu" in result.output
 
-    async def test_getting_started_has_setup_info(self):
-        result = await natshell_help("getting_started")
+    def test_getting_started_has_setup_info(self, help_outputs):
+        result = help_outputs["getting_started"]
         assert "wizard" in result.output
         assert "/model download" in result.output
 
-    async def test_profiles_has_config_example(self):
-        result = await natshell_help("profiles")
+    def test_profiles_has_config_example(self, help_outputs):
+        result = help_outputs["profiles"]
         assert "/profile" in result.output
         assert "config.toml" in result.output
 
-    async def test_sessions_has_save_load(self):
-        result = await natshell_help("sessions")
+    def test_sessions_has_save_load(self, help_outputs):
+        result = help_outputs["sessions"]
         assert "/save" in result.output
         assert "/load" in result.output
 
-    async def test_plans_has_exeplan(self):
-        result = await natshell_help("plans")
+    def test_plans_has_exeplan(self, help_outputs):
+        result = help_outputs["plans"]
         assert "/plan" in result.output
         assert "/exeplan" in result.output
 
-    async def test_plugins_has_register(self):
-        result = await natshell_help("plugins")
+    def test_plugins_has_register(self, help_outputs):
+        result = help_outputs["plugins"]
         assert "register" in result.output
         assert "plugins/" in result.output
 
-    async def test_headless_has_flags(self):
-        result = await natshell_help("headless")
+    def test_headless_has_flags(self, help_outputs):
+        result = help_outputs["headless"]
         assert "--headless" in result.output
         assert "--danger-fast" in result.output
 
-    async def test_mcp_has_protocol(self):
-        result = await natshell_help("mcp")
+    def test_mcp_has_protocol(self, help_outputs):
+        result = help_outputs["mcp"]
         assert "--mcp" in result.output
         assert "JSON-RPC" in result.output
 
-    async def test_backup_has_undo(self):
-        result = await natshell_help("backup")
+    def test_backup_has_undo(self, help_outputs):
+        result = help_outputs["backup"]
         assert "/undo" in result.output
         assert "backup" in result.output.lower()
 
-    async def test_keyboard_shortcuts_has_keys(self):
-        result = await natshell_help("keyboard_shortcuts")
+    def test_keyboard_shortcuts_has_keys(self, help_outputs):
+        result = help_outputs["keyboard_shortcuts"]
         assert "Ctrl+C" in result.output
         assert "Ctrl+P" in result.output
         assert "Enter" in result.output
@@ -132,21 +137,38 @@ class TestStaticTopics:
 # ─── dynamic: config ──────────────────────────────────────────────────────
 
 
+def _set_home(monkeypatch, path: Path) -> None:
+    """Point Path.home() at ``path`` (HOME on Unix, USERPROFILE on Windows)."""
+    monkeypatch.setenv("HOME", str(path))
+    monkeypatch.setenv("USERPROFILE", str(path))
+
+
+@pytest.fixture
+def home(tmp_path: Path, monkeypatch) -> Path:
+    """Point the user's home directory at an empty tmp_path."""
+    _set_home(monkeypatch, tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(scope="module")
+def prewritten_config(tmp_path_factory) -> Path:
+    """A home directory holding a small user config.toml, written once."""
+    home_dir = tmp_path_factory.mktemp("home")
+    config_dir = home_dir / ".config" / "natshell"
+    config_dir.mkdir(parents=True)
+    (config_dir / "config.toml").write_bytes(b"[agent]\nmax_steps = 10\n")
+    return home_dir
+
+
 class TestConfigTopic:
-    async def test_config_no_file(self, tmp_path: Path):
-        with patch("natshell.tools.natshell_help.Path.home", return_value=tmp_path):
-            result = await natshell_help("config")
+    async def test_config_no_file(self, home: Path):
+        result = await natshell_help("config")
         assert result.exit_code == 0
         assert "No user config" in result.output
 
-    async def test_config_reads_file(self, tmp_path: Path):
-        config_dir = tmp_path / ".config" / "natshell"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.toml"
-        config_file.write_text("[agent]\nmax_steps = 10\n")
-
-        with patch("natshell.tools.natshell_help.Path.home", return_value=tmp_path):
-            result = await natshell_help("config")
+    async def test_config_reads_file(self, prewritten_config: Path, monkeypatch):
+        _set_home(monkeypatch, prewritten_config)
+        result = await natshell_help("config")
         assert result.exit_code == 0
         assert "max_steps" in result.output
 
@@ -165,6 +187,13 @@ class TestConfigReferenceTopic:
 # ─── dynamic: safety ─────────────────────────────────────────────────────
 
 
+_SAFETY_CFG = SafetyConfig(
+    mode="confirm",
+    always_confirm=["^rm\\s", "^sudo\\s"],
+    blocked=[":(){ :|:& };:"],
+)
+
+
 class TestSafetyTopic:
     async def test_safety_without_injection(self):
         # Reset global state
@@ -180,12 +209,7 @@ class TestSafetyTopic:
             mod._safety_config = original
 
     async def test_safety_with_injection(self):
-        config = SafetyConfig(
-            mode="confirm",
-            always_confirm=["^rm\\s", "^sudo\\s"],
-            blocked=[":(){ :|:& };:"],
-        )
-        set_safety_config(config)
+        set_safety_config(_SAFETY_CFG)
         result = await natshell_help("safety")
         assert result.exit_code == 0
         assert "confirm" in result.output
@@ -242,12 +266,10 @@ class TestDefinition:
         }
         assert set(VALID_TOPICS) == expected
 
-    def test_registered_in_default_registry(self):
-        registry = create_default_registry()
-        assert "natshell_help" in registry.tool_names
+    def test_registered_in_default_registry(self, default_registry):
+        assert "natshell_help" in default_registry.tool_names
 
-    def test_schema_in_registry(self):
-        registry = create_default_registry()
-        schemas = registry.get_tool_schemas()
+    def test_schema_in_registry(self, default_registry):
+        schemas = default_registry.get_tool_schemas()
         names = [s["function"]["name"] for s in schemas]
         assert "natshell_help" in names
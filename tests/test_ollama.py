@@ -2,105 +2,205 @@
 
 from __future__ import annotations
 
-from unittest.mock import AsyncMock, patch
+import asyncio
+import json
+from collections.abc import Callable
+from typing import Any
+from urllib.parse import urlsplit
 
 import httpx
+import pytest
 
+import natshell.inference.ollama as ollama_mod
 from natshell.inference.ollama import (
+    _context_length_from_info,
+    _get_client,
     _get_running_context,
     _model_matches,
+    clear_context_cache,
+    close_client,
     get_model_context_length,
     list_models,
     normalize_base_url,
     ping_server,
 )
+from natshell.inference.remote import ContextOverflowError, RemoteEngine
 
-# ─── normalize_base_url ─────────────────────────────────────────────────────
+# The async tests here talk only to in-memory transports, and any pooled
+# client a test leaves open is closed by _fresh_shared_client, so one event
+# loop serves the whole module.
+_module_loop = pytest.mark.asyncio(loop_scope="module")
 
+# A route answers with (status, payload), raises an exception (e.g. a failed
+# connect), or builds the response itself from the request.
+Route = tuple[int, Any] | BaseException | Callable[[httpx.Request], httpx.Response]
 
-class TestNormalizeBaseUrl:
-    def test_strips_v1_suffix(self):
-        assert normalize_base_url("http://localhost:11434/v1") == "http://localhost:11434"
 
-    def test_strips_v1_with_trailing_slash(self):
-        assert normalize_base_url("http://localhost:11434/v1/") == "http://localhost:11434"
+def _raising(exc: BaseException):
+    """A plain coroutine function that raises *exc*."""
+
+    async def _stub(*args: Any, **kwargs: Any) -> Any:
+        raise exc
+
+    return _stub
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches():
+    normalize_base_url.cache_clear()
+    clear_context_cache()
+    yield
+    normalize_base_url.cache_clear()
+    clear_context_cache()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_shared_client(monkeypatch):
+    """Start each test without the module's pooled client, and close any it opened.
+
+    The test's event loop is idle during teardown, so the client is closed on
+    a short-lived loop of its own.
+    """
+    monkeypatch.setattr("natshell.inference.ollama._client", None)
+    monkeypatch.setattr("natshell.inference.ollama._client_loop", None)
+    yield
+    if ollama_mod._client is not None and not ollama_mod._client.is_closed:
+        asyncio.run(ollama_mod._client.aclose())
+
+
+@pytest.fixture
+def sent() -> list[httpx.Request]:
+    """Every request the ``routes`` server received, in order."""
+    return []
+
+
+@pytest.fixture
+def routes(monkeypatch, sent) -> dict[str, Route]:
+    """Serve the ollama module's real AsyncClient from an in-memory transport.
+
+    Tests fill the returned ``{path: route}`` map.  A ``"*"`` entry answers
+    every path without its own route; otherwise unknown paths get 404.
+    A str payload is sent as text, anything else as JSON.  This runs httpx's
+    own request and response handling, so URL building, headers and JSON
+    decoding are all exercised; requests are recorded in ``sent``.
+    """
+    table: dict[str, Route] = {}
 
-    def test_no_v1_unchanged(self):
-        assert normalize_base_url("http://localhost:11434") == "http://localhost:11434"
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request)
+        route = table.get(request.url.path, table.get("*", (404, "Not Found")))
+        if isinstance(route, BaseException):
+            raise route
+        if callable(route):
+            return route(request)
+        status, payload = route
+        if isinstance(payload, str):
+            return httpx.Response(status, text=payload)
+        return httpx.Response(status, json=payload)
 
-    def test_strips_trailing_slash(self):
-        assert normalize_base_url("http://localhost:11434/") == "http://localhost:11434"
+    transport = httpx.MockTransport(handler)
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        "natshell.inference.ollama.httpx.AsyncClient",
+        lambda *args, **kwargs: real_client(*args, transport=transport, **kwargs),
+    )
+    return table
 
-    def test_custom_host_and_port(self):
-        assert normalize_base_url("http://192.168.1.5:8080/v1") == "http://192.168.1.5:8080"
 
-    def test_bare_url(self):
-        assert normalize_base_url("http://myhost") == "http://myhost"
+# ─── normalize_base_url ─────────────────────────────────────────────────────
+
+
+class TestNormalizeBaseUrl:
+    @pytest.mark.parametrize(
+        ("url", "expected"),
+        [
+            ("http://localhost:11434/v1", "http://localhost:11434"),
+            ("http://localhost:11434/v1/", "http://localhost:11434"),
+            ("http://localhost:11434", "http://localhost:11434"),
+            ("http://localhost:11434/", "http://localhost:11434"),
+            ("http://192.168.1.5:8080/v1", "http://192.168.1.5:8080"),
+            ("http://myhost", "http://myhost"),
+        ],
+    )
+    def test_normalize(self, url: str, expected: str):
+        assert normalize_base_url(url) == expected
+
+    @pytest.mark.parametrize(
+        "url",
+        [
+            f"{scheme}{host}{suffix}"
+            for scheme in ("http://", "https://", "")
+            for host in ("localhost:11434", "v1", "api.example.com")
+            for suffix in ("", "/", "/v1", "/v1/", "//v1//", "/v1/v1", "/api/v1")
+        ],
+    )
+    def test_normalized_form_is_stable(self, url: str):
+        """Normalizing twice changes nothing, and no trailing slash or /v1 is left."""
+        normalized = normalize_base_url(url)
+        assert normalize_base_url(normalized) == normalized
+        parts = urlsplit(normalized)
+        assert parts.scheme in ("http", "https")
+        assert not parts.path.endswith(("/", "/v1"))
+
+    def test_normalize_is_cached(self):
+        url = "http://x:11434/v1"
+        assert normalize_base_url(url) is normalize_base_url(url)
+        assert normalize_base_url.cache_info().hits == 1
+
+    def test_host_named_v1_is_kept(self):
+        assert normalize_base_url("http://v1/v1") == "http://v1"
 
 
 # ─── ping_server ────────────────────────────────────────────────────────────
 
 
+@_module_loop
 class TestPingServer:
-    async def test_success_ollama_running(self):
-        mock_response = httpx.Response(200, text="Ollama is running")
-        with patch("natshell.inference.ollama.httpx.AsyncClient") as MockClient:
-            instance = AsyncMock()
-            instance.get = AsyncMock(return_value=mock_response)
-            instance.__aenter__ = AsyncMock(return_value=instance)
-            instance.__aexit__ = AsyncMock(return_value=False)
-            MockClient.return_value = instance
-
-            result = await ping_server("http://localhost:11434")
-            assert result is True
-
-    async def test_success_non_ollama_200(self):
-        mock_response = httpx.Response(200, text="OK")
-        with patch("natshell.inference.ollama.httpx.AsyncClient") as MockClient:
-            instance = AsyncMock()
-            instance.get = AsyncMock(return_value=mock_response)
-            instance.__aenter__ = AsyncMock(return_value=instance)
-            instance.__aexit__ = AsyncMock(return_value=False)
-            MockClient.return_value = instance
-
-            result = await ping_server("http://localhost:8080")
-            assert result is True
-
-    async def test_connection_failure(self):
-        with patch("natshell.inference.ollama.httpx.AsyncClient") as MockClient:
-            instance = AsyncMock()
-            instance.get = AsyncMock(side_effect=httpx.ConnectError("connection refused"))
-            instance.__aenter__ = AsyncMock(return_value=instance)
-            instance.__aexit__ = AsyncMock(return_value=False)
-            MockClient.return_value = instance
-
-            result = await ping_server("http://badhost:11434")
-            assert result is False
-
-    async def test_strips_v1_before_ping(self):
-        mock_response = httpx.Response(200, text="Ollama is running")
-        with patch("natshell.inference.ollama.httpx.AsyncClient") as MockClient:
-            instance = AsyncMock()
-            instance.get = AsyncMock(return_value=mock_response)
-            instance.__aenter__ = AsyncMock(return_value=instance)
-            instance.__aexit__ = AsyncMock(return_value=False)
-            MockClient.return_value = instance
-
-            result = await ping_server("http://localhost:11434/v1")
-            assert result is True
-            # Should have pinged the root, not /v1/
-            instance.get.assert_called_with("http://localhost:11434/")
+    async def test_success_ollama_running(self, routes):
+        routes["/"] = (200, "Ollama is running")
+
+        assert await ping_server("http://localhost:11434") is True
+
+    async def test_success_non_ollama_200(self, routes):
+        routes["/"] = (200, "OK")
+
+        assert await ping_server("http://localhost:8080") is True
+
+    async def test_falls_back_to_v1_models(self, routes, sent):
+        routes["/v1/models"] = (200, {"data": []})
+
+        assert await ping_server("http://localhost:8080") is True
+        assert [r.url.path for r in sent] == ["/", "/v1/models"]
+
+    async def test_connection_failure(self, routes):
+        routes["*"] = httpx.ConnectError("connection refused")
+
+        assert await ping_server("http://badhost:11434") is False
+
+    async def test_strips_v1_before_ping(self, routes, sent):
+        routes["/"] = (200, "Ollama is running")
+
+        assert await ping_server("http://localhost:11434/v1") is True
+        # Should have pinged the root, not /v1/
+        assert str(sent[-1].url) == "http://localhost:11434/"
+
+    async def test_sends_api_key(self, routes, sent):
+        routes["/"] = (200, "OK")
+
+        await ping_server("http://localhost:8080", api_key="secret")
+        assert sent[-1].headers["Authorization"] == "Bearer secret"
 
 
 # ─── list_models ────────────────────────────────────────────────────────────
 
 
+@_module_loop
 class TestListModels:
-    async def test_ollama_api_tags(self):
+    async def test_ollama_api_tags(self, routes):
         """list_models parses Ollama /api/tags response."""
-        ollama_response = httpx.Response(
+        routes["/api/tags"] = (
             200,
-            json={
+            {
                 "models": [
                     {
                         "name": "qwen3:4b",
@@ -116,14 +216,7 @@ class TestListModels:
             },
         )
 
-        with patch("natshell.inference.ollama.httpx.AsyncClient") as MockClient:
-            instance = AsyncMock()
-            instance.get = AsyncMock(return_value=ollama_response)
-            instance.__aenter__ = AsyncMock(return_value=instance)
-            instance.__aexit__ = AsyncMock(return_value=False)
-            MockClient.return_value = instance
-
-            models = await list_models("http://localhost:11434")
+        models = await list_models("http://localhost:11434")
 
         assert len(models) == 2
         assert models[0].name == "qwen3:4b"
@@ -131,438 +224,413 @@ class TestListModels:
         assert models[0].parameter_size == "4B"
         assert models[1].name == "llama3:8b"
 
-    async def test_openai_v1_models_fallback(self):
+    async def test_openai_v1_models_fallback(self, routes):
         """list_models falls back to /v1/models when /api/tags fails."""
-        tags_404 = httpx.Response(404, text="Not Found")
-        openai_response = httpx.Response(
-            200,
-            json={
-                "data": [
-                    {"id": "gpt-4"},
-                    {"id": "gpt-3.5-turbo"},
-                ]
-            },
-        )
-
-        with patch("natshell.inference.ollama.httpx.AsyncClient") as MockClient:
-            instance = AsyncMock()
-            instance.get = AsyncMock(side_effect=[tags_404, openai_response])
-            instance.__aenter__ = AsyncMock(return_value=instance)
-            instance.__aexit__ = AsyncMock(return_value=False)
-            MockClient.return_value = instance
+        routes["/v1/models"] = (200, {"data": [{"id": "gpt-4"}, {"id": "gpt-3.5-turbo"}]})
 
-            models = await list_models("http://localhost:8080")
+        models = await list_models("http://localhost:8080/v1")
 
         assert len(models) == 2
         assert models[0].name == "gpt-4"
         assert models[1].name == "gpt-3.5-turbo"
 
-    async def test_connection_failure_returns_empty(self):
-        with patch("natshell.inference.ollama.httpx.AsyncClient") as MockClient:
-            instance = AsyncMock()
-            instance.__aenter__ = AsyncMock(side_effect=httpx.ConnectError("refused"))
-            instance.__aexit__ = AsyncMock(return_value=False)
-            MockClient.return_value = instance
+    async def test_connection_failure_returns_empty(self, routes):
+        routes["*"] = httpx.ConnectError("refused")
 
-            models = await list_models("http://badhost:11434")
-            assert models == []
+        assert await list_models("http://badhost:11434") == []
 
+    async def test_prefers_api_tags_when_both_answer(self, routes):
+        routes["/api/tags"] = (200, {"models": [{"name": "qwen3:4b"}]})
+        routes["/v1/models"] = (200, {"data": [{"id": "qwen3:4b-openai"}]})
 
-# ─── get_model_context_length ────────────────────────────────────────────────
+        models = await list_models("http://localhost:11434")
 
+        assert [m.name for m in models] == ["qwen3:4b"]
 
-# ─── _model_matches ─────────────────────────────────────────────────────────
+    @pytest.mark.parametrize("use_orjson", [True, False], ids=["orjson", "stdlib-json"])
+    async def test_decoders_agree(self, routes, monkeypatch, use_orjson):
+        """orjson is optional; the stdlib fallback parses, and rejects, the same bodies."""
+        if not use_orjson:
+            monkeypatch.setattr("natshell.inference.ollama.orjson", None)
+        routes["/api/tags"] = lambda request: httpx.Response(200, text="{not json")
+        routes["/v1/models"] = (200, {"data": [{"id": "gpt-4"}]})
 
+        assert [m.name for m in await list_models("http://localhost:8080")] == ["gpt-4"]
 
-class TestModelMatches:
-    def test_exact_match_name(self):
-        assert _model_matches("qwen3:4b", "qwen3:4b", "qwen3:4b") is True
+    async def test_requests_both_endpoints_together(self, routes, sent):
+        """Both endpoints are fetched up front rather than one after the other."""
+        assert await list_models("http://localhost:8080") == []
+
+        assert {str(r.url) for r in sent} == {
+            "http://localhost:8080/api/tags",
+            "http://localhost:8080/v1/models",
+        }
+        assert len(sent) == 2
+
+
+# ─── _model_matches ─────────────────────────────────────────────────────────
 
-    def test_exact_match_model_field(self):
-        assert _model_matches("qwen3:4b", "other", "qwen3:4b") is True
 
-    def test_no_match(self):
-        assert _model_matches("qwen3:4b", "llama3:8b", "llama3:8b") is False
+QWEN_4B = "qwen3:4b"
+QWEN_LATEST = "qwen3:latest"
+LLAMA_8B = "llama3:8b"
 
-    def test_implicit_latest_tag(self):
-        """Query without tag matches entry with :latest."""
-        assert _model_matches("qwen3", "qwen3:latest", "qwen3:latest") is True
 
-    def test_implicit_latest_no_false_positive(self):
-        """Query without tag should not match a different tag."""
-        assert _model_matches("qwen3", "qwen3:4b", "qwen3:4b") is False
+class TestModelMatches:
+    @pytest.mark.parametrize(
+        ("query", "name", "model", "expected"),
+        [
+            (QWEN_4B, QWEN_4B, QWEN_4B, True),
+            # The model field alone is enough
+            (QWEN_4B, "other", QWEN_4B, True),
+            (QWEN_4B, LLAMA_8B, LLAMA_8B, False),
+            # An untagged query matches the implicit :latest tag...
+            ("qwen3", QWEN_LATEST, QWEN_LATEST, True),
+            # ...but not some other tag
+            ("qwen3", QWEN_4B, QWEN_4B, False),
+        ],
+    )
+    def test_model_matches(self, query: str, name: str, model: str, expected: bool):
+        assert _model_matches(query, name, model) is expected
 
 
 # ─── _get_running_context ───────────────────────────────────────────────────
 
 
-class TestGetRunningContext:
-    async def test_model_loaded_returns_context_length(self):
-        """Returns context_length when model is loaded in /api/ps."""
-        ps_response = httpx.Response(
-            200,
-            json={
-                "models": [
-                    {
-                        "name": "qwen3:4b",
-                        "model": "qwen3:4b",
-                        "context_length": 32768,
-                        "size_vram": 2684354560,
-                    }
-                ]
-            },
-        )
-        with patch("natshell.inference.ollama.httpx.AsyncClient") as MockClient:
-            instance = AsyncMock()
-            instance.get = AsyncMock(return_value=ps_response)
-            instance.__aenter__ = AsyncMock(return_value=instance)
-            instance.__aexit__ = AsyncMock(return_value=False)
-            MockClient.return_value = instance
-
-            result = await _get_running_context("http://localhost:11434", "qwen3:4b")
-            assert result == 32768
-
-    async def test_model_not_loaded_returns_none(self):
-        """Returns None when model is not in /api/ps results."""
-        ps_response = httpx.Response(
-            200,
-            json={
-                "models": [
-                    {
-                        "name": "llama3:8b",
-                        "model": "llama3:8b",
-                        "context_length": 8192,
-                    }
-                ]
-            },
-        )
-        with patch("natshell.inference.ollama.httpx.AsyncClient") as MockClient:
-            instance = AsyncMock()
-            instance.get = AsyncMock(return_value=ps_response)
-            instance.__aenter__ = AsyncMock(return_value=instance)
-            instance.__aexit__ = AsyncMock(return_value=False)
-            MockClient.return_value = instance
-
-            result = await _get_running_context("http://localhost:11434", "qwen3:4b")
-            assert result is None
-
-    async def test_non_ollama_server_returns_none(self):
-        """Non-Ollama server (404 on /api/ps) returns None."""
-        ps_response = httpx.Response(404, text="Not Found")
-        with patch("natshell.inference.ollama.httpx.AsyncClient") as MockClient:
-            instance = AsyncMock()
-            instance.get = AsyncMock(return_value=ps_response)
-            instance.__aenter__ = AsyncMock(return_value=instance)
-            instance.__aexit__ = AsyncMock(return_value=False)
-            MockClient.return_value = instance
-
-            result = await _get_running_context("http://localhost:8080", "gpt-4")
-            assert result is None
-
-    async def test_connection_failure_returns_none(self):
-        """Connection failure returns None."""
-        with patch("natshell.inference.ollama.httpx.AsyncClient") as MockClient:
-            instance = AsyncMock()
-            instance.__aenter__ = AsyncMock(side_effect=httpx.ConnectError("refused"))
-            instance.__aexit__ = AsyncMock(return_value=False)
-            MockClient.return_value = instance
-
-            result = await _get_running_context("http://badhost:11434", "qwen3:4b")
-            assert result is None
-
-    async def test_empty_models_returns_none(self):
-        """Empty models list returns None."""
-        ps_response = httpx.Response(200, json={"models": []})
-        with patch("natshell.inference.ollama.httpx.AsyncClient") as MockClient:
-            instance = AsyncMock()
-            instance.get = AsyncMock(return_value=ps_response)
-            instance.__aenter__ = AsyncMock(return_value=instance)
-            instance.__aexit__ = AsyncMock(return_value=False)
-            MockClient.return_value = instance
-
-            result = await _get_running_context("http://localhost:11434", "qwen3:4b")
-            assert result is None
-
-    async def test_implicit_latest_tag_match(self):
-        """Query "qwen3" matches entry with name "qwen3:latest"."""
-        ps_response = httpx.Response(
-            200,
-            json={
-                "models": [
-                    {
-                        "name": "qwen3:latest",
-                        "model": "qwen3:latest",
-                        "context_length": 4096,
-                    }
-                ]
-            },
-        )
-        with patch("natshell.inference.ollama.httpx.AsyncClient") as MockClient:
-            instance = AsyncMock()
-            instance.get = AsyncMock(return_value=ps_response)
-            instance.__aenter__ = AsyncMock(return_value=instance)
-            instance.__aexit__ = AsyncMock(return_value=False)
-            MockClient.return_value = instance
+def _ps(*entries: tuple[str, int]) -> tuple[int, Any]:
+    """An /api/ps route listing loaded models as (name, context_length)."""
+    models = [{"name": name, "model": name, "context_length": ctx} for name, ctx in entries]
+    return 200, {"models": models}
+
 
-            result = await _get_running_context("http://localhost:11434", "qwen3")
-            assert result == 4096
+@_module_loop
+class TestGetRunningContext:
+    @pytest.mark.parametrize(
+        ("route", "model", "expected"),
+        [
+            pytest.param(_ps((QWEN_4B, 32768)), QWEN_4B, 32768, id="loaded"),
+            pytest.param(_ps((LLAMA_8B, 8192)), QWEN_4B, None, id="not-loaded"),
+            pytest.param((404, "Not Found"), "gpt-4", None, id="non-ollama-server"),
+            pytest.param(_ps(), QWEN_4B, None, id="no-models"),
+            pytest.param(_ps((QWEN_LATEST, 4096)), "qwen3", 4096, id="implicit-latest-tag"),
+            pytest.param(httpx.ConnectError("refused"), QWEN_4B, None, id="connect-failure"),
+        ],
+    )
+    async def test_running_context(self, routes, route, model, expected):
+        routes["/api/ps"] = route
+
+        assert await _get_running_context("http://localhost:11434", model) == expected
 
 
 # ─── get_model_context_length ────────────────────────────────────────────────
 
 
+@_module_loop
 class TestGetModelContextLength:
-    async def test_prefers_api_ps_over_api_show(self):
+    async def test_prefers_api_ps_over_api_show(self, routes, sent):
         """When model is running, uses /api/ps context instead of /api/show metadata."""
-        with patch(
-            "natshell.inference.ollama._get_running_context",
-            new_callable=AsyncMock,
-            return_value=32768,
-        ):
-            result = await get_model_context_length("http://localhost:11434", "qwen3:4b")
-            assert result == 32768
-
-    async def test_falls_back_to_api_show_when_not_running(self):
-        """When model is not in /api/ps, falls back to /api/show metadata."""
-        show_response = httpx.Response(
-            200,
-            json={"model_info": {"qwen2.context_length": 262144}},
-        )
-        with (
-            patch(
-                "natshell.inference.ollama._get_running_context",
-                new_callable=AsyncMock,
-                return_value=None,
+        routes["/api/ps"] = _ps((QWEN_4B, 32768))
+        routes["/api/show"] = (200, {"model_info": {"qwen2.context_length": 262144}})
+
+        assert await get_model_context_length("http://localhost:11434", QWEN_4B) == 32768
+        assert [r.url.path for r in sent] == ["/api/ps"]
+
+    @pytest.mark.parametrize(
+        ("url", "model", "show_route", "expected"),
+        [
+            pytest.param(
+                "http://localhost:11434",
+                QWEN_4B,
+                (200, {"model_info": {"qwen2.context_length": 262144}}),
+                262144,
+                id="falls-back-when-not-running",
             ),
-            patch("natshell.inference.ollama.httpx.AsyncClient") as MockClient,
-        ):
-            instance = AsyncMock()
-            instance.post = AsyncMock(return_value=show_response)
-            instance.__aenter__ = AsyncMock(return_value=instance)
-            instance.__aexit__ = AsyncMock(return_value=False)
-            MockClient.return_value = instance
-
-            result = await get_model_context_length("http://localhost:11434", "qwen3:4b")
-            assert result == 262144
-
-    async def test_returns_context_length_from_model_info(self):
-        """Successful /api/show query returns context length from architecture-prefixed key."""
-        show_response = httpx.Response(
-            200,
-            json={
-                "model_info": {
-                    "general.architecture": "qwen2",
-                    "qwen2.context_length": 32768,
-                    "qwen2.embedding_length": 3584,
-                }
-            },
-        )
-        with (
-            patch(
-                "natshell.inference.ollama._get_running_context",
-                new_callable=AsyncMock,
-                return_value=None,
+            pytest.param(
+                "http://localhost:11434",
+                "qwen3:32b",
+                (
+                    200,
+                    {
+                        "model_info": {
+                            "general.architecture": "qwen2",
+                            "qwen2.context_length": 32768,
+                            "qwen2.embedding_length": 3584,
+                        }
+                    },
+                ),
+                32768,
+                id="architecture-prefixed-key",
             ),
-            patch("natshell.inference.ollama.httpx.AsyncClient") as MockClient,
-        ):
-            instance = AsyncMock()
-            instance.post = AsyncMock(return_value=show_response)
-            instance.__aenter__ = AsyncMock(return_value=instance)
-            instance.__aexit__ = AsyncMock(return_value=False)
-            MockClient.return_value = instance
-
-            result = await get_model_context_length("http://localhost:11434", "qwen3:32b")
-            assert result == 32768
-
-    async def test_returns_llama_context_length(self):
-        """Works with llama architecture prefix."""
-        show_response = httpx.Response(
-            200,
-            json={
-                "model_info": {
-                    "general.architecture": "llama",
-                    "llama.context_length": 8192,
-                }
-            },
-        )
-        with (
-            patch(
-                "natshell.inference.ollama._get_running_context",
-                new_callable=AsyncMock,
-                return_value=None,
+            pytest.param(
+                "http://localhost:11434",
+                LLAMA_8B,
+                (
+                    200,
+                    {
+                        "model_info": {
+                            "general.architecture": "llama",
+                            "llama.context_length": 8192,
+                        }
+                    },
+                ),
+                8192,
+                id="llama-prefix",
             ),
-            patch("natshell.inference.ollama.httpx.AsyncClient") as MockClient,
-        ):
-            instance = AsyncMock()
-            instance.post = AsyncMock(return_value=show_response)
-            instance.__aenter__ = AsyncMock(return_value=instance)
-            instance.__aexit__ = AsyncMock(return_value=False)
-            MockClient.return_value = instance
-
-            result = await get_model_context_length("http://localhost:11434", "llama3:8b")
-            assert result == 8192
-
-    async def test_non_ollama_server_returns_zero(self):
-        """Non-Ollama server (404 on both endpoints) returns 0."""
-        show_response = httpx.Response(404, text="Not Found")
-        with (
-            patch(
-                "natshell.inference.ollama._get_running_context",
-                new_callable=AsyncMock,
-                return_value=None,
+            pytest.param(
+                "http://localhost:8080",
+                "gpt-4",
+                (404, "Not Found"),
+                0,
+                id="non-ollama-server",
             ),
-            patch("natshell.inference.ollama.httpx.AsyncClient") as MockClient,
-        ):
-            instance = AsyncMock()
-            instance.post = AsyncMock(return_value=show_response)
-            instance.__aenter__ = AsyncMock(return_value=instance)
-            instance.__aexit__ = AsyncMock(return_value=False)
-            MockClient.return_value = instance
-
-            result = await get_model_context_length("http://localhost:8080", "gpt-4")
-            assert result == 0
-
-    async def test_connection_failure_returns_zero(self):
-        """Connection failure returns 0."""
-        with (
-            patch(
-                "natshell.inference.ollama._get_running_context",
-                new_callable=AsyncMock,
-                return_value=None,
+            pytest.param(
+                "http://localhost:11434",
+                QWEN_4B,
+                (200, {"license": "apache-2.0", "modelfile": "FROM qwen3:4b"}),
+                0,
+                id="missing-model-info",
             ),
-            patch("natshell.inference.ollama.httpx.AsyncClient") as MockClient,
-        ):
-            instance = AsyncMock()
-            instance.__aenter__ = AsyncMock(side_effect=httpx.ConnectError("refused"))
-            instance.__aexit__ = AsyncMock(return_value=False)
-            MockClient.return_value = instance
-
-            result = await get_model_context_length("http://badhost:11434", "qwen3:4b")
-            assert result == 0
-
-    async def test_missing_model_info_returns_zero(self):
-        """Response without model_info key returns 0."""
-        show_response = httpx.Response(
-            200,
-            json={
-                "license": "apache-2.0",
-                "modelfile": "FROM qwen3:4b",
-            },
-        )
-        with (
-            patch(
-                "natshell.inference.ollama._get_running_context",
-                new_callable=AsyncMock,
-                return_value=None,
+            pytest.param(
+                "http://localhost:11434/v1",
+                QWEN_4B,
+                (200, {"model_info": {"qwen2.context_length": 4096}}),
+                4096,
+                id="strips-v1",
             ),
-            patch("natshell.inference.ollama.httpx.AsyncClient") as MockClient,
-        ):
-            instance = AsyncMock()
-            instance.post = AsyncMock(return_value=show_response)
-            instance.__aenter__ = AsyncMock(return_value=instance)
-            instance.__aexit__ = AsyncMock(return_value=False)
-            MockClient.return_value = instance
-
-            result = await get_model_context_length("http://localhost:11434", "qwen3:4b")
-            assert result == 0
-
-    async def test_strips_v1_from_url(self):
-        """URL with /v1 suffix is normalized before querying."""
-        show_response = httpx.Response(200, json={"model_info": {"qwen2.context_length": 4096}})
-        with (
-            patch(
-                "natshell.inference.ollama._get_running_context",
-                new_callable=AsyncMock,
-                return_value=None,
+        ],
+    )
+    async def test_api_show(self, routes, sent, url, model, show_route, expected):
+        """Without a loaded model, the context length comes from /api/show."""
+        routes["/api/show"] = show_route
+
+        assert await get_model_context_length(url, model) == expected
+        show = sent[-1]
+        assert show.method == "POST"
+        assert str(show.url) == f"{url.removesuffix('/v1')}/api/show"
+        assert json.loads(show.content) == {"model": model}
+
+    async def test_connection_failure_returns_zero(self, routes):
+        """Connection failure returns 0."""
+        routes["*"] = httpx.ConnectError("refused")
+
+        assert await get_model_context_length("http://badhost:11434", QWEN_4B) == 0
+
+
+class TestContextLengthFromInfo:
+    @pytest.mark.parametrize(
+        ("model_info", "expected"),
+        [
+            ({"general.architecture": "llama", "llama.context_length": 8192}, 8192),
+            # The named architecture wins over another *.context_length key
+            (
+                {
+                    "clip.context_length": 77,
+                    "general.architecture": "qwen2",
+                    "qwen2.context_length": 32768,
+                },
+                32768,
             ),
-            patch("natshell.inference.ollama.httpx.AsyncClient") as MockClient,
-        ):
-            instance = AsyncMock()
-            instance.post = AsyncMock(return_value=show_response)
-            instance.__aenter__ = AsyncMock(return_value=instance)
-            instance.__aexit__ = AsyncMock(return_value=False)
-            MockClient.return_value = instance
-
-            result = await get_model_context_length("http://localhost:11434/v1", "qwen3:4b")
-            assert result == 4096
-            # Should have posted to the normalized URL
-            instance.post.assert_called_with(
-                "http://localhost:11434/api/show",
-                json={"model": "qwen3:4b"},
-            )
+            # No architecture field: fall back to scanning the keys
+            ({"mistral.context_length": 4096}, 4096),
+            # Architecture named but its key missing: scan as well
+            ({"general.architecture": "gemma", "gemma2.context_length": 2048}, 2048),
+            ({"general.architecture": "llama", "llama.context_length": "8192"}, 0),
+            ({}, 0),
+        ],
+    )
+    def test_context_length_from_info(self, model_info: dict, expected: int):
+        assert _context_length_from_info(model_info) == expected
+
+
+def _show_requests(sent: list[httpx.Request]) -> int:
+    return sum(r.url.path == "/api/show" for r in sent)
+
+
+@_module_loop
+class TestGetModelContextLengthCache:
+    async def test_second_lookup_is_cached(self, routes, sent):
+        routes["/api/show"] = (200, {"model_info": {"llama.context_length": 8192}})
+
+        assert await get_model_context_length("http://localhost:11434", LLAMA_8B) == 8192
+        # Same server spelled differently still hits the cache
+        assert await get_model_context_length("http://localhost:11434/v1/", LLAMA_8B) == 8192
+        assert _show_requests(sent) == 1
+
+        clear_context_cache()
+        assert await get_model_context_length("http://localhost:11434", LLAMA_8B) == 8192
+        assert _show_requests(sent) == 2
+
+    async def test_runtime_context_not_masked_by_cache(self, routes, sent):
+        """A model loaded after the first lookup reports its real n_ctx."""
+        routes["/api/show"] = (200, {"model_info": {"llama.context_length": 131072}})
+        assert await get_model_context_length("http://localhost:11434", LLAMA_8B) == 131072
+
+        routes["/api/ps"] = _ps((LLAMA_8B, 8192))
+        assert await get_model_context_length("http://localhost:11434", LLAMA_8B) == 8192
+        assert _show_requests(sent) == 1
+
+    async def test_failed_lookup_is_not_cached(self, routes, sent):
+        assert await get_model_context_length("http://localhost:11434", LLAMA_8B) == 0
+        assert await get_model_context_length("http://localhost:11434", LLAMA_8B) == 0
+        assert _show_requests(sent) == 2
 
 
 # ─── ContextOverflowError detection in RemoteEngine ──────────────────────────
 
+# httpx Request/Response objects are never mutated by the engine's error
+# handling, so one of each is shared across the tests below.
+_REQ = httpx.Request("POST", "http://localhost:11434/chat/completions")
+_RESP_400_CONTEXT = httpx.Response(400, text="model requires more context length", request=_REQ)
+_RESP_413_TOO_LARGE = httpx.Response(
+    413, text="request too large: prompt exceeds token limit", request=_REQ
+)
+_RESP_400_OTHER = httpx.Response(400, text="invalid model format", request=_REQ)
+
+
+@pytest.fixture
+async def engine():
+    """A RemoteEngine pointed at a dummy server, closed after the test."""
+    async with RemoteEngine(base_url="http://localhost:11434", model="test") as engine:
+        yield engine
 
+
+@_module_loop
 class TestContextOverflowDetection:
-    async def test_400_context_length_raises_overflow(self):
+    async def test_400_context_length_raises_overflow(self, engine):
         """HTTP 400 with context-length body raises ContextOverflowError."""
-        from natshell.inference.remote import ContextOverflowError, RemoteEngine
-
-        engine = RemoteEngine(base_url="http://localhost:11434", model="test")
-        mock_response = httpx.Response(
-            status_code=400,
-            text="model requires more context length",
-            request=httpx.Request("POST", "http://localhost:11434/chat/completions"),
-        )
-        engine.client.post = AsyncMock(
-            side_effect=httpx.HTTPStatusError(
-                "bad request", request=mock_response.request, response=mock_response
-            )
+        engine.client.post = _raising(
+            httpx.HTTPStatusError("bad request", request=_REQ, response=_RESP_400_CONTEXT)
         )
-        try:
+        with pytest.raises(ContextOverflowError, match="(?i)context"):
             await engine.chat_completion(messages=[{"role": "user", "content": "hi"}])
-            assert False, "Should have raised"
-        except ContextOverflowError as e:
-            assert "context" in str(e).lower()
-        finally:
-            await engine.close()
 
-    async def test_413_raises_overflow(self):
+    async def test_413_raises_overflow(self, engine):
         """HTTP 413 with known pattern raises ContextOverflowError."""
-        from natshell.inference.remote import ContextOverflowError, RemoteEngine
-
-        engine = RemoteEngine(base_url="http://localhost:11434", model="test")
-        mock_response = httpx.Response(
-            status_code=413,
-            text="request too large: prompt exceeds token limit",
-            request=httpx.Request("POST", "http://localhost:11434/chat/completions"),
-        )
-        engine.client.post = AsyncMock(
-            side_effect=httpx.HTTPStatusError(
-                "too large", request=mock_response.request, response=mock_response
-            )
+        engine.client.post = _raising(
+            httpx.HTTPStatusError("too large", request=_REQ, response=_RESP_413_TOO_LARGE)
         )
-        try:
+        with pytest.raises(ContextOverflowError, match="(?i)token limit|request too large"):
             await engine.chat_completion(messages=[{"role": "user", "content": "hi"}])
-            assert False, "Should have raised"
-        except ContextOverflowError as e:
-            assert "token limit" in str(e).lower() or "request too large" in str(e).lower()
-        finally:
-            await engine.close()
 
-    async def test_400_non_context_raises_connection_error(self):
+    async def test_400_non_context_raises_connection_error(self, engine):
         """HTTP 400 with unrelated body raises regular ConnectionError."""
-        from natshell.inference.remote import ContextOverflowError, RemoteEngine
-
-        engine = RemoteEngine(base_url="http://localhost:11434", model="test")
-        mock_response = httpx.Response(
-            status_code=400,
-            text="invalid model format",
-            request=httpx.Request("POST", "http://localhost:11434/chat/completions"),
+        engine.client.post = _raising(
+            httpx.HTTPStatusError("bad request", request=_REQ, response=_RESP_400_OTHER)
         )
-        engine.client.post = AsyncMock(
-            side_effect=httpx.HTTPStatusError(
-                "bad request", request=mock_response.request, response=mock_response
-            )
-        )
-        try:
+        with pytest.raises(ConnectionError, match="400") as exc_info:
             await engine.chat_completion(messages=[{"role": "user", "content": "hi"}])
-            assert False, "Should have raised"
-        except ContextOverflowError:
-            assert False, "Should not be ContextOverflowError"
-        except ConnectionError as e:
-            assert "400" in str(e)
-        finally:
-            await engine.close()
+        assert not isinstance(exc_info.value, ContextOverflowError)
+
+
+@_module_loop
+class TestRemoteEngineLifecycle:
+    async def test_async_with_closes_client(self):
+        async with RemoteEngine(base_url="http://localhost:11434", model="test") as engine:
+            assert not engine.client.is_closed
+        assert engine.client.is_closed
+
+
+# ─── Client pooling ──────────────────────────────────────────────────────────
+
+
+@pytest.fixture
+def pooled_client(monkeypatch):
+    """A caller-owned client on a fake server; the module may not open its own."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/show":
+            return httpx.Response(200, json={"model_info": {"qwen2.context_length": 8192}})
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": [{"name": QWEN_4B}]})
+        if request.url.path == "/api/ps":
+            return httpx.Response(200, json={"models": []})
+        return httpx.Response(200, text="Ollama is running")
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    def _no_new_clients(*args, **kwargs):
+        raise AssertionError("opened a new AsyncClient instead of the pooled one")
+
+    monkeypatch.setattr("natshell.inference.ollama.httpx.AsyncClient", _no_new_clients)
+    return client
+
+
+@_module_loop
+class TestClientPooling:
+    async def test_helpers_reuse_the_given_client(self, pooled_client):
+        async with pooled_client:
+            url = "http://localhost:11434"
+            assert await ping_server(url, client=pooled_client) is True
+            models = await list_models(url, client=pooled_client)
+            assert [m.name for m in models] == [QWEN_4B]
+            assert await get_model_context_length(url, QWEN_4B, client=pooled_client) == 8192
+            # A borrowed client is left open for the caller to reuse.
+            assert not pooled_client.is_closed
+
+    async def test_helpers_share_one_module_client(self, routes, monkeypatch):
+        """Without a client argument, every helper reuses one pooled client."""
+        routes["/"] = (200, "Ollama is running")
+        routes["/api/tags"] = (200, {"models": [{"name": LLAMA_8B}]})
+        routes["/api/show"] = (200, {"model_info": {"llama.context_length": 4096}})
+        opened = []
+        factory = httpx.AsyncClient  # already routed to the in-memory transport
+
+        def _counting(*args, **kwargs):
+            opened.append(factory(*args, **kwargs))
+            return opened[-1]
+
+        monkeypatch.setattr("natshell.inference.ollama.httpx.AsyncClient", _counting)
+
+        url = "http://localhost:11434"
+        assert await ping_server(url) is True
+        assert [m.name for m in await list_models(url)] == [LLAMA_8B]
+        assert await get_model_context_length(url, LLAMA_8B) == 4096
+        assert len(opened) == 1
+        assert not opened[0].is_closed
+
+        await close_client()
+        assert opened[0].is_closed
+        # A closed pool is replaced on next use rather than reused.
+        assert await ping_server(url) is True
+        assert len(opened) == 2
+        await close_client()
+
+    @pytest.mark.parametrize("h2_installed", [True, False])
+    async def test_http2_only_with_h2_installed(self, monkeypatch, h2_installed):
+        seen: dict[str, Any] = {}
+        real_client = httpx.AsyncClient
+
+        def _recording(**kwargs):
+            seen.update(kwargs)
+            return real_client()
+
+        monkeypatch.setattr("natshell.inference.ollama._HTTP2", h2_installed)
+        monkeypatch.setattr("natshell.inference.ollama.httpx.AsyncClient", _recording)
+
+        _get_client()
+        await close_client()
+        assert seen["http2"] is h2_installed
+
+
+class TestClientAcrossLoops:
+    def test_client_from_earlier_loop_is_closed(self, routes):
+        """A new event loop replaces the pooled client and closes the old one."""
+        routes["/"] = (200, "Ollama is running")
+        url = "http://localhost:11434"
+
+        async def _ping() -> httpx.AsyncClient:
+            assert await ping_server(url) is True
+            return _get_client()
+
+        first = asyncio.run(_ping())
+        assert not first.is_closed  # left open, as a caller without close_client()
+
+        async def _ping_and_close() -> httpx.AsyncClient:
+            client = await _ping()
+            await close_client()
+            return client
+
+        second = asyncio.run(_ping_and_close())
+        assert second is not first
+        assert first.is_closed
+        assert second.is_closed
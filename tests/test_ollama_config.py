@@ -5,6 +5,7 @@ from __future__ import annotations
 import textwrap
 from pathlib import Path
 
+import natshell.config as config_mod
 from natshell.config import (
     NatShellConfig,
     OllamaConfig,
@@ -12,6 +13,45 @@ from natshell.config import (
     save_ollama_default,
 )
 
+# Config file fixtures, dedented once at import.
+_OLLAMA_FULL = textwrap.dedent("""\
+    [ollama]
+    url = "http://myhost:11434"
+    default_model = "llama3:8b"
+""")
+
+_OLLAMA_URL_ONLY = textwrap.dedent("""\
+    [ollama]
+    url = "http://gpu-box:11434"
+""")
+
+_OLLAMA_AND_UI = textwrap.dedent("""\
+    [ollama]
+    url = "http://localhost:11434"
+    default_model = "old-model"
+
+    [ui]
+    theme = "dark"
+""")
+
+_OLLAMA_COMMENTED_MODEL = textwrap.dedent("""\
+    [ollama]
+    url = "http://localhost:11434"
+    # default_model = "qwen3:4b"
+""")
+
+_OLLAMA_OLD_HOST = textwrap.dedent("""\
+    [ollama]
+    url = "http://old-host:11434"
+    default_model = "old-model"
+""")
+
+_OLLAMA_KEEP_URL = textwrap.dedent("""\
+    [ollama]
+    url = "http://keep-this:11434"
+    default_model = "old-model"
+""")
+
 # ─── OllamaConfig defaults ─────────────────────────────────────────────────
 
 
@@ -32,13 +72,7 @@ class TestOllamaConfigDefaults:
 class TestOllamaConfigLoading:
     def test_loads_ollama_section(self, tmp_path: Path):
         config_file = tmp_path / "config.toml"
-        config_file.write_text(
-            textwrap.dedent("""\
-            [ollama]
-            url = "http://myhost:11434"
-            default_model = "llama3:8b"
-        """)
-        )
+        config_file.write_text(_OLLAMA_FULL)
 
         cfg = load_config(str(config_file))
         assert cfg.ollama.url == "http://myhost:11434"
@@ -54,12 +88,7 @@ class TestOllamaConfigLoading:
 
     def test_partial_ollama_section(self, tmp_path: Path):
         config_file = tmp_path / "config.toml"
-        config_file.write_text(
-            textwrap.dedent("""\
-            [ollama]
-            url = "http://gpu-box:11434"
-        """)
-        )
+        config_file.write_text(_OLLAMA_URL_ONLY)
 
         cfg = load_config(str(config_file))
         assert cfg.ollama.url == "http://gpu-box:11434"
@@ -84,16 +113,7 @@ class TestSaveOllamaDefault:
         config_dir = tmp_path / ".config" / "natshell"
         config_dir.mkdir(parents=True)
         config_file = config_dir / "config.toml"
-        config_file.write_text(
-            textwrap.dedent("""\
-            [ollama]
-            url = "http://localhost:11434"
-            default_model = "old-model"
-
-            [ui]
-            theme = "dark"
-        """)
-        )
+        config_file.write_text(_OLLAMA_AND_UI)
 
         save_ollama_default("new-model")
         content = config_file.read_text()
@@ -122,13 +142,7 @@ class TestSaveOllamaDefault:
         config_dir = tmp_path / ".config" / "natshell"
         config_dir.mkdir(parents=True)
         config_file = config_dir / "config.toml"
-        config_file.write_text(
-            textwrap.dedent("""\
-            [ollama]
-            url = "http://localhost:11434"
-            # default_model = "qwen3:4b"
-        """)
-        )
+        config_file.write_text(_OLLAMA_COMMENTED_MODEL)
 
         save_ollama_default("mistral:7b")
         content = config_file.read_text()
@@ -149,13 +163,7 @@ class TestSaveOllamaDefault:
         config_dir = tmp_path / ".config" / "natshell"
         config_dir.mkdir(parents=True)
         config_file = config_dir / "config.toml"
-        config_file.write_text(
-            textwrap.dedent("""\
-            [ollama]
-            url = "http://old-host:11434"
-            default_model = "old-model"
-        """)
-        )
+        config_file.write_text(_OLLAMA_OLD_HOST)
 
         save_ollama_default("new-model", url="http://new-host:11434")
         content = config_file.read_text()
@@ -169,15 +177,28 @@ class TestSaveOllamaDefault:
         config_dir = tmp_path / ".config" / "natshell"
         config_dir.mkdir(parents=True)
         config_file = config_dir / "config.toml"
-        config_file.write_text(
-            textwrap.dedent("""\
-            [ollama]
-            url = "http://keep-this:11434"
-            default_model = "old-model"
-        """)
-        )
+        config_file.write_text(_OLLAMA_KEEP_URL)
 
         save_ollama_default("new-model")
         content = config_file.read_text()
         assert 'url = "http://keep-this:11434"' in content
         assert 'default_model = "new-model"' in content
+
+    def test_writes_file_once(self, tmp_path: Path, monkeypatch):
+        """Model and URL are saved with a single read-modify-write pass."""
+        monkeypatch.setattr(Path, "home", lambda: tmp_path)
+        writes = []
+        real_write = config_mod._write_config_atomically
+
+        def _counting_write(path, text):
+            writes.append(text)
+            real_write(path, text)
+
+        monkeypatch.setattr(config_mod, "_write_config_atomically", _counting_write)
+
+        path = save_ollama_default("qwen3:8b", url="http://gpu-box:11434")
+
+        assert len(writes) == 1
+        assert path.read_text() == writes[0]
+        assert 'url = "http://gpu-box:11434"' in writes[0]
+        assert 'default_model = "qwen3:8b"' in writes[0]
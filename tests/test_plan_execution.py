@@ -2,48 +2,100 @@
 
 from __future__ import annotations
 
+import dataclasses
 import textwrap
 from pathlib import Path
 
+import pytest
+
 from natshell.agent.plan import Plan, parse_plan_file, parse_plan_text
 from natshell.agent.plan_executor import _build_plan_prompt, _build_step_prompt, _shallow_tree
 
-# ─── _build_step_prompt ──────────────────────────────────────────────────────
+# Each plan is parsed once at import.  Plans are frozen, so tests share these
+# by reference and derive variants with dataclasses.replace().
+_TETRIS_PLAN = textwrap.dedent("""\
+    # Fix Tetris
 
+    ## Fix piece shapes in theme.cpp
 
-class TestBuildStepPrompt:
-    """Test the per-step prompt builder."""
+    Edit theme.cpp and fix the I-piece shape array.
 
-    def _make_plan(self, source_dir: Path | None = None) -> Plan:
-        plan = parse_plan_text(
-            textwrap.dedent("""\
-            # Fix Tetris
+    ```cpp
+    int shapes[4] = {1, 2, 3, 4};
+    ```
 
-            ## Fix piece shapes in theme.cpp
+    ## Initialize timing
 
-            Edit theme.cpp and fix the I-piece shape array.
+    Add `lastDropTime = 0;` after `updateDropInterval();`
 
-            ```cpp
-            int shapes[4] = {1, 2, 3, 4};
-            ```
+    ## Add scoring
 
-            ## Initialize timing
+    Implement the score counter.
+""")
 
-            Add `lastDropTime = 0;` after `updateDropInterval();`
+_AUTH_PLAN = textwrap.dedent("""\
+    # Test Plan
 
-            ## Add scoring
+    ## Create auth module
 
-            Implement the score counter.
-        """)
-        )
-        plan.source_dir = source_dir
-        return plan
+    CREATE `src/auth.py`
 
-    def test_first_step_no_previously_completed(self):
-        plan = self._make_plan()
-        prompt = _build_step_prompt(plan.steps[0], plan, [])
-        assert "Previously completed" not in prompt
-        assert "step 1 of 3" in prompt
+    ## Wire up routes
+
+    MODIFY `src/app.py`
+""")
+
+_TETRIS = parse_plan_text(_TETRIS_PLAN)
+_AUTH = parse_plan_text(_AUTH_PLAN)
+
+# ─── _build_step_prompt ──────────────────────────────────────────────────────
+
+
+@pytest.fixture(scope="class")
+def first_step_prompt() -> str:
+    """The default prompt for step 1 of the Tetris plan, built once per class."""
+    return _build_step_prompt(_TETRIS.steps[0], _TETRIS, [])
+
+
+class TestBuildStepPrompt:
+    """Test the per-step prompt builder."""
+
+    def _make_plan(self, source_dir: Path | None = None) -> Plan:
+        if source_dir is None:
+            return _TETRIS
+        return dataclasses.replace(_TETRIS, source_dir=source_dir)
+
+    @pytest.mark.parametrize(
+        "needle",
+        [
+            "step 1 of 3",
+            # Full step body, code block included
+            "```cpp",
+            "int shapes[4]",
+            # Scope and termination directives
+            "Do NOT read the plan file",
+            "IMMEDIATELY provide a short text summary",
+            "STOP",
+            "Do not modify files not mentioned in this step",
+            # Default budget guidance
+            "25 tool calls",
+            "kill it before finishing",
+        ],
+    )
+    def test_first_step_includes(self, first_step_prompt: str, needle: str):
+        assert needle in first_step_prompt
+
+    @pytest.mark.parametrize(
+        "needle",
+        [
+            "Previously completed",
+            # No source_dir and no preamble in the fixture plan
+            "Project layout:",
+            "Project context:",
+        ],
+    )
+    def test_first_step_omits(self, first_step_prompt: str, needle: str):
+        assert needle not in first_step_prompt
 
     def test_later_step_includes_summaries(self):
         plan = self._make_plan()
@@ -54,24 +106,6 @@ class TestBuildStepPrompt:
         assert "\u2713" in prompt
         assert "step 2 of 3" in prompt
 
-    def test_prompt_includes_full_body(self):
-        plan = self._make_plan()
-        prompt = _build_step_prompt(plan.steps[0], plan, [])
-        assert "```cpp" in prompt
-        assert "int shapes[4]" in prompt
-
-    def test_do_not_read_plan_files_directive(self):
-        plan = self._make_plan()
-        prompt = _build_step_prompt(plan.steps[0], plan, [])
-        assert "Do NOT read the plan file" in prompt
-
-    def test_termination_directive(self):
-        plan = self._make_plan()
-        prompt = _build_step_prompt(plan.steps[0], plan, [])
-        assert "IMMEDIATELY provide a short text summary" in prompt
-        assert "STOP" in prompt
-        assert "Do not modify files not mentioned in this step" in prompt
-
     def test_step_title_in_prompt(self):
         plan = self._make_plan()
         prompt = _build_step_prompt(plan.steps[2], plan, [])
@@ -103,36 +137,17 @@ class TestBuildStepPrompt:
         assert "game.cpp" in prompt
         assert "Makefile" in prompt
 
-    def test_no_layout_without_source_dir(self):
-        """When source_dir is None, no project layout is included."""
-        plan = self._make_plan(source_dir=None)
-        prompt = _build_step_prompt(plan.steps[0], plan, [])
-        assert "Project layout:" not in prompt
-
     def test_includes_preamble_when_present(self):
         """When plan has a preamble, it is injected into the step prompt."""
-        plan = self._make_plan()
         # The fixture plan has title "Fix Tetris" but no preamble text
-        plan.preamble = "Tech stack: C++17 with SDL2. Use snake_case naming."
+        plan = dataclasses.replace(
+            _TETRIS, preamble="Tech stack: C++17 with SDL2. Use snake_case naming."
+        )
         prompt = _build_step_prompt(plan.steps[0], plan, [])
         assert "Project context:" in prompt
         assert "C++17 with SDL2" in prompt
         assert "snake_case" in prompt
 
-    def test_no_preamble_when_empty(self):
-        """When plan preamble is empty, no project context section appears."""
-        plan = self._make_plan()
-        plan.preamble = ""
-        prompt = _build_step_prompt(plan.steps[0], plan, [])
-        assert "Project context:" not in prompt
-
-    def test_budget_guidance_in_prompt(self):
-        """Step prompt includes budget guidance with the step limit."""
-        plan = self._make_plan()
-        prompt = _build_step_prompt(plan.steps[0], plan, [], max_steps=25)
-        assert "25 tool calls" in prompt
-        assert "kill it before finishing" in prompt
-
     def test_budget_uses_custom_max_steps(self):
         """Budget guidance reflects the max_steps parameter."""
         plan = self._make_plan()
@@ -150,31 +165,62 @@ class TestBuildStepPrompt:
 # ─── _shallow_tree ───────────────────────────────────────────────────────────
 
 
+@pytest.fixture(scope="class")
+def sample_tree(tmp_path_factory) -> Path:
+    """A small project tree shared by the read-only _shallow_tree tests."""
+    root = tmp_path_factory.mktemp("tree")
+    (root / "src").mkdir()
+    (root / "src" / "main.cpp").write_text("")
+    (root / "Makefile").write_text("")
+    (root / ".git").mkdir()
+    (root / "README.md").write_text("")
+    (root / "a" / "b" / "c").mkdir(parents=True)
+    (root / "a" / "b" / "c" / "deep.txt").write_text("")
+    return root
+
+
+@pytest.fixture(scope="class")
+def tree_output(sample_tree: Path) -> str:
+    """``_shallow_tree(sample_tree)``, walked once for the whole class.
+
+    max_depth=2 is the default, so the depth-limit test shares this output.
+    """
+    return _shallow_tree(sample_tree, max_depth=2)
+
+
 class TestShallowTree:
-    def test_basic_tree(self, tmp_path: Path):
-        (tmp_path / "src").mkdir()
-        (tmp_path / "src" / "main.cpp").write_text("")
-        (tmp_path / "Makefile").write_text("")
-        tree = _shallow_tree(tmp_path)
-        assert "src/" in tree
-        assert "main.cpp" in tree
-        assert "Makefile" in tree
-
-    def test_hidden_files_excluded(self, tmp_path: Path):
-        (tmp_path / ".git").mkdir()
-        (tmp_path / "README.md").write_text("")
-        tree = _shallow_tree(tmp_path)
-        assert ".git" not in tree
-        assert "README.md" in tree
-
-    def test_depth_limit(self, tmp_path: Path):
-        (tmp_path / "a" / "b" / "c").mkdir(parents=True)
-        (tmp_path / "a" / "b" / "c" / "deep.txt").write_text("")
-        tree = _shallow_tree(tmp_path, max_depth=2)
-        assert "a/" in tree
-        assert "b/" in tree
+    def test_basic_tree(self, tree_output: str):
+        assert "src/" in tree_output
+        assert "main.cpp" in tree_output
+        assert "Makefile" in tree_output
+
+    def test_hidden_files_excluded(self, tree_output: str):
+        assert ".git" not in tree_output
+        assert "README.md" in tree_output
+
+    def test_depth_limit(self, tree_output: str):
+        assert "a/" in tree_output
+        assert "b/" in tree_output
         # c/ is at depth 3, should not appear
-        assert "deep.txt" not in tree
+        assert "c/" not in tree_output.split()
+        assert "deep.txt" not in tree_output
+
+    def test_respects_max_entries(self, tmp_path: Path):
+        for i in range(10):
+            (tmp_path / f"file{i}.txt").write_text("")
+        tree = _shallow_tree(tmp_path, max_entries=3)
+        # Which three files survive depends on the filesystem's order
+        listed = tree.splitlines()[1:]
+        assert len(listed) == 4
+        assert all(line.startswith("  ├─ file") for line in listed[:3])
+        assert listed[3] == "  ... (truncated)"
+
+    def test_max_entries_stops_nested_walk(self, sample_tree: Path):
+        tree = _shallow_tree(sample_tree, max_entries=2)
+        # Two entries use the budget, then the walk stops at every level
+        lines = tree.splitlines()[1:]
+        assert len(lines) == 3
+        assert lines[-1].endswith("... (truncated)")
 
 
 # ─── /exeplan in SLASH_COMMANDS ──────────────────────────────────────────────
@@ -324,19 +370,7 @@ class TestBuildStepPromptEnhanced:
     """Test the enhanced step execution prompt with file tracking."""
 
     def _make_plan(self) -> Plan:
-        return parse_plan_text(
-            textwrap.dedent("""\
-            # Test Plan
-
-            ## Create auth module
-
-            CREATE `src/auth.py`
-
-            ## Wire up routes
-
-            MODIFY `src/app.py`
-        """)
-        )
+        return _AUTH
 
     def test_completed_files_appear_when_nonempty(self):
         plan = self._make_plan()
@@ -380,8 +414,7 @@ class TestExeplanInSlashCommands:
     def test_exeplan_listed(self):
         from natshell.app import SLASH_COMMANDS
 
-        commands = [cmd for cmd, _ in SLASH_COMMANDS]
-        assert "/exeplan" in commands
+        assert any(cmd == "/exeplan" for cmd, _ in SLASH_COMMANDS)
 
 
 # ─── _build_verify_fix_prompt ────────────────────────────────────────────────
@@ -440,7 +473,7 @@ class TestValidatePlan:
         )
         # Parser assigns sequential numbers, so duplicates won't happen
         # via parse_plan_text. But we test the function directly.
-        plan.steps[1].number = 1
+        plan.steps[1] = dataclasses.replace(plan.steps[1], number=1)
         warnings = validate_plan(plan)
         assert any("Duplicate" in w for w in warnings)
 
@@ -470,7 +503,7 @@ class TestValidatePlan:
         plan = parse_plan_text(
             "# Plan\n\n## Step 1: A\n\nBody.\n\n## Step 3: B\n\nBody.\n"
         )
-        plan.steps[1].number = 3
+        plan.steps[1] = dataclasses.replace(plan.steps[1], number=3)
         warnings = validate_plan(plan)
         assert any("Non-sequential" in w for w in warnings)
 
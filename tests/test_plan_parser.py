@@ -12,24 +12,129 @@ from natshell.agent.plan import parse_plan_file, parse_plan_text
 # ─── parse_plan_text ─────────────────────────────────────────────────────────
 
 
-class TestParsePlanText:
-    """Test plan parsing from raw text."""
+_BASIC_PLAN_TEXT = textwrap.dedent("""\
+    # My Plan
 
-    def test_basic_plan(self):
-        text = textwrap.dedent("""\
-            # My Plan
+    Some preamble text.
+
+    ## Fix the bug
+
+    Edit file.py and change X to Y.
+
+    ## Add tests
+
+    Write tests for the fix.
+""")
+
+_STEP_NUMBERING_IS_1_BASED_TEXT = textwrap.dedent("""\
+    ## First step
+    body1
+    ## Second step
+    body2
+    ## Third step
+    body3
+""")
+
+_STEP_N_COLON_FORMAT_TEXT = textwrap.dedent("""\
+    # Plan
+
+    ## Step 1: Fix shapes
+
+    Fix the shapes.
+
+    ## Step 2: Add timing
+
+    Add timing code.
+""")
+
+_PLAIN_HEADING_FORMAT_TEXT = textwrap.dedent("""\
+    ## Initialize project
+
+    Run npm init.
+
+    ## Configure linting
+
+    Add eslint config.
+""")
+
+_NUMBERED_DOT_FORMAT_TEXT = textwrap.dedent("""\
+    # Plan
+
+    ## 1. Fix shapes
+
+    Fix them.
+
+    ## 2. Add timing
+
+    Add it.
+""")
+
+_PREAMBLE_EXTRACTION_TEXT = textwrap.dedent("""\
+    # Plan Title
+
+    This is the preamble with context.
+    It has multiple lines.
+
+    ## First step
+
+    Do something.
+""")
+
+_CODE_BLOCKS_PRESERVED_TEXT = textwrap.dedent("""\
+    ## Add function
+
+    Add this code:
 
-            Some preamble text.
+    ```cpp
+    void init() {
+        timer = 0;
+    }
+    ```
 
-            ## Fix the bug
+    After the existing code.
+""")
 
-            Edit file.py and change X to Y.
+_MISSING_H1_USES_DEFAULT_TITLE_TEXT = textwrap.dedent("""\
+    ## First step
 
-            ## Add tests
+    Do something.
+""")
 
-            Write tests for the fix.
-        """)
-        plan = parse_plan_text(text)
+_EMPTY_PREAMBLE_TEXT = textwrap.dedent("""\
+    # Title
+
+    ## Step one
+
+    Body here.
+""")
+
+_STEP_BODY_STRIPPED_TEXT = textwrap.dedent("""\
+    ## Step one
+
+
+    Body with extra whitespace.
+
+
+""")
+
+_SINGLE_STEP_TEXT = textwrap.dedent("""\
+    # Single Step Plan
+
+    ## Do the thing
+
+    Just one step.
+""")
+
+_TEN_STEP_PLAN = "# Big Plan\n" + "\n".join(
+    f"\n## Step {i}: Task {i}\n\nBody for step {i}." for i in range(1, 11)
+)
+
+
+class TestParsePlanText:
+    """Test plan parsing from raw text."""
+
+    def test_basic_plan(self):
+        plan = parse_plan_text(_BASIC_PLAN_TEXT)
         assert plan.title == "My Plan"
         assert "preamble" in plan.preamble.lower()
         assert len(plan.steps) == 2
@@ -37,101 +142,39 @@ class TestParsePlanText:
         assert plan.steps[1].title == "Add tests"
 
     def test_step_numbering_is_1_based(self):
-        text = textwrap.dedent("""\
-            ## First step
-            body1
-            ## Second step
-            body2
-            ## Third step
-            body3
-        """)
-        plan = parse_plan_text(text)
+        plan = parse_plan_text(_STEP_NUMBERING_IS_1_BASED_TEXT)
         assert plan.steps[0].number == 1
         assert plan.steps[1].number == 2
         assert plan.steps[2].number == 3
 
     def test_step_n_colon_format(self):
         """Parse ## Step 1: Title format."""
-        text = textwrap.dedent("""\
-            # Plan
-
-            ## Step 1: Fix shapes
-
-            Fix the shapes.
-
-            ## Step 2: Add timing
-
-            Add timing code.
-        """)
-        plan = parse_plan_text(text)
+        plan = parse_plan_text(_STEP_N_COLON_FORMAT_TEXT)
         assert len(plan.steps) == 2
         assert plan.steps[0].title == "Fix shapes"
         assert plan.steps[1].title == "Add timing"
 
     def test_plain_heading_format(self):
         """Parse plain ## Title format without step numbers."""
-        text = textwrap.dedent("""\
-            ## Initialize project
-
-            Run npm init.
-
-            ## Configure linting
-
-            Add eslint config.
-        """)
-        plan = parse_plan_text(text)
+        plan = parse_plan_text(_PLAIN_HEADING_FORMAT_TEXT)
         assert len(plan.steps) == 2
         assert plan.steps[0].title == "Initialize project"
         assert plan.steps[1].title == "Configure linting"
 
     def test_numbered_dot_format(self):
         """Parse ## 1. Title format."""
-        text = textwrap.dedent("""\
-            # Plan
-
-            ## 1. Fix shapes
-
-            Fix them.
-
-            ## 2. Add timing
-
-            Add it.
-        """)
-        plan = parse_plan_text(text)
+        plan = parse_plan_text(_NUMBERED_DOT_FORMAT_TEXT)
         assert len(plan.steps) == 2
         assert plan.steps[0].title == "Fix shapes"
         assert plan.steps[1].title == "Add timing"
 
     def test_preamble_extraction(self):
-        text = textwrap.dedent("""\
-            # Plan Title
-
-            This is the preamble with context.
-            It has multiple lines.
-
-            ## First step
-
-            Do something.
-        """)
-        plan = parse_plan_text(text)
+        plan = parse_plan_text(_PREAMBLE_EXTRACTION_TEXT)
         assert "preamble with context" in plan.preamble
         assert "multiple lines" in plan.preamble
 
     def test_code_blocks_preserved(self):
-        text = textwrap.dedent("""\
-            ## Add function
-
-            Add this code:
-
-            ```cpp
-            void init() {
-                timer = 0;
-            }
-            ```
-
-            After the existing code.
-        """)
-        plan = parse_plan_text(text)
+        plan = parse_plan_text(_CODE_BLOCKS_PRESERVED_TEXT)
         assert len(plan.steps) == 1
         assert "```cpp" in plan.steps[0].body
         assert "void init()" in plan.steps[0].body
@@ -143,55 +186,24 @@ class TestParsePlanText:
             parse_plan_text(text)
 
     def test_missing_h1_uses_default_title(self):
-        text = textwrap.dedent("""\
-            ## First step
-
-            Do something.
-        """)
-        plan = parse_plan_text(text)
+        plan = parse_plan_text(_MISSING_H1_USES_DEFAULT_TITLE_TEXT)
         assert plan.title == "Untitled Plan"
 
     def test_empty_preamble(self):
-        text = textwrap.dedent("""\
-            # Title
-
-            ## Step one
-
-            Body here.
-        """)
-        plan = parse_plan_text(text)
+        plan = parse_plan_text(_EMPTY_PREAMBLE_TEXT)
         assert plan.preamble == ""
 
     def test_step_body_stripped(self):
-        text = textwrap.dedent("""\
-            ## Step one
-
-
-            Body with extra whitespace.
-
-
-        """)
-        plan = parse_plan_text(text)
+        plan = parse_plan_text(_STEP_BODY_STRIPPED_TEXT)
         assert plan.steps[0].body == "Body with extra whitespace."
 
     def test_single_step(self):
-        text = textwrap.dedent("""\
-            # Single Step Plan
-
-            ## Do the thing
-
-            Just one step.
-        """)
-        plan = parse_plan_text(text)
+        plan = parse_plan_text(_SINGLE_STEP_TEXT)
         assert len(plan.steps) == 1
         assert plan.steps[0].number == 1
 
     def test_many_steps(self):
-        lines = ["# Big Plan"]
-        for i in range(10):
-            lines.append(f"\n## Step {i + 1}: Task {i + 1}\n\nBody for step {i + 1}.")
-        text = "\n".join(lines)
-        plan = parse_plan_text(text)
+        plan = parse_plan_text(_TEN_STEP_PLAN)
         assert len(plan.steps) == 10
         assert plan.steps[9].number == 10
         assert plan.steps[9].title == "Task 10"
@@ -200,6 +212,27 @@ class TestParsePlanText:
 # ─── parse_plan_file ─────────────────────────────────────────────────────────
 
 
+_READS_FILE_TEXT = textwrap.dedent("""\
+    # Test Plan
+
+    ## Step 1: Do something
+
+    Do it.
+
+    ## Step 2: Verify
+
+    Check it.
+""")
+
+
+@pytest.fixture(scope="class")
+def plan_on_disk(tmp_path_factory) -> Path:
+    """One plan file written once and shared by the read-only file tests."""
+    plan_file = tmp_path_factory.mktemp("plans") / "plan.md"
+    plan_file.write_text(_READS_FILE_TEXT)
+    return plan_file
+
+
 class TestParsePlanFile:
     """Test file-based plan parsing."""
 
@@ -207,71 +240,59 @@ class TestParsePlanFile:
         with pytest.raises(FileNotFoundError):
             parse_plan_file("/nonexistent/path/plan.md")
 
-    def test_reads_file(self, tmp_path: Path):
-        plan_file = tmp_path / "plan.md"
-        plan_file.write_text(
-            textwrap.dedent("""\
-            # Test Plan
-
-            ## Step 1: Do something
-
-            Do it.
-
-            ## Step 2: Verify
-
-            Check it.
-        """)
-        )
-        plan = parse_plan_file(str(plan_file))
+    def test_reads_file(self, plan_on_disk: Path):
+        plan = parse_plan_file(str(plan_on_disk))
         assert plan.title == "Test Plan"
         assert len(plan.steps) == 2
 
-    def test_tilde_expansion(self, tmp_path: Path, monkeypatch):
-        plan_file = tmp_path / "plan.md"
-        plan_file.write_text("## Step one\n\nBody.\n")
-        monkeypatch.setenv("HOME", str(tmp_path))
+    def test_tilde_expansion(self, plan_on_disk: Path, monkeypatch):
+        monkeypatch.setenv("HOME", str(plan_on_disk.parent))
         plan = parse_plan_file("~/plan.md")
-        assert len(plan.steps) == 1
+        assert len(plan.steps) == 2
 
 
 # ─── PlanStep.mentioned_files ────────────────────────────────────────────────
 
 
+_EXTRACTS_CREATE_MODIFY_READ_TEXT = textwrap.dedent("""\
+    ## Set up auth
+
+    **Files**:
+    CREATE `src/auth.py`
+    MODIFY `src/app.py`
+    READ `src/config.py`
+""")
+
+_RETURNS_EMPTY_WHEN_NO_PATTERNS_TEXT = textwrap.dedent("""\
+    ## Simple step
+
+    Just do something with no file markers.
+""")
+
+_MULTIPLE_FILES_SAME_ACTION_TEXT = textwrap.dedent("""\
+    ## Create files
+
+    CREATE `src/a.py`
+    CREATE `src/b.py`
+""")
+
+
 class TestMentionedFiles:
     """Test PlanStep.mentioned_files property."""
 
     def test_extracts_create_modify_read(self):
-        text = textwrap.dedent("""\
-            ## Set up auth
-
-            **Files**:
-            CREATE `src/auth.py`
-            MODIFY `src/app.py`
-            READ `src/config.py`
-        """)
-        plan = parse_plan_text(text)
+        plan = parse_plan_text(_EXTRACTS_CREATE_MODIFY_READ_TEXT)
         files = plan.steps[0].mentioned_files
         assert ("CREATE", "src/auth.py") in files
         assert ("MODIFY", "src/app.py") in files
         assert ("READ", "src/config.py") in files
 
     def test_returns_empty_when_no_patterns(self):
-        text = textwrap.dedent("""\
-            ## Simple step
-
-            Just do something with no file markers.
-        """)
-        plan = parse_plan_text(text)
+        plan = parse_plan_text(_RETURNS_EMPTY_WHEN_NO_PATTERNS_TEXT)
         assert plan.steps[0].mentioned_files == []
 
     def test_multiple_files_same_action(self):
-        text = textwrap.dedent("""\
-            ## Create files
-
-            CREATE `src/a.py`
-            CREATE `src/b.py`
-        """)
-        plan = parse_plan_text(text)
+        plan = parse_plan_text(_MULTIPLE_FILES_SAME_ACTION_TEXT)
         files = plan.steps[0].mentioned_files
         assert len(files) == 2
         assert files[0] == ("CREATE", "src/a.py")
@@ -281,45 +302,50 @@ class TestMentionedFiles:
 # ─── PlanStep.verification ───────────────────────────────────────────────────
 
 
+_EXTRACTS_VERIFY_LINE_TEXT = textwrap.dedent("""\
+    ## Build module
+
+    Write the code.
+
+    Verify: python -c "import mymodule"
+""")
+
+_EXTRACTS_TEST_LINE_TEXT = textwrap.dedent("""\
+    ## Add tests
+
+    Write unit tests.
+
+    Test: pytest tests/test_auth.py -v
+""")
+
+_RETURNS_NONE_WHEN_ABSENT_TEXT = textwrap.dedent("""\
+    ## Simple step
+
+    Just do something, no verification line.
+""")
+
+_STRIPS_WHITESPACE_TEXT = textwrap.dedent("""\
+    ## Build
+
+    Verify:   npm test
+""")
+
+
 class TestVerification:
     """Test PlanStep.verification property."""
 
     def test_extracts_verify_line(self):
-        text = textwrap.dedent("""\
-            ## Build module
-
-            Write the code.
-
-            Verify: python -c "import mymodule"
-        """)
-        plan = parse_plan_text(text)
+        plan = parse_plan_text(_EXTRACTS_VERIFY_LINE_TEXT)
         assert plan.steps[0].verification == 'python -c "import mymodule"'
 
     def test_extracts_test_line(self):
-        text = textwrap.dedent("""\
-            ## Add tests
-
-            Write unit tests.
-
-            Test: pytest tests/test_auth.py -v
-        """)
-        plan = parse_plan_text(text)
+        plan = parse_plan_text(_EXTRACTS_TEST_LINE_TEXT)
         assert plan.steps[0].verification == "pytest tests/test_auth.py -v"
 
     def test_returns_none_when_absent(self):
-        text = textwrap.dedent("""\
-            ## Simple step
-
-            Just do something, no verification line.
-        """)
-        plan = parse_plan_text(text)
+        plan = parse_plan_text(_RETURNS_NONE_WHEN_ABSENT_TEXT)
         assert plan.steps[0].verification is None
 
     def test_strips_whitespace(self):
-        text = textwrap.dedent("""\
-            ## Build
-
-            Verify:   npm test
-        """)
-        plan = parse_plan_text(text)
+        plan = parse_plan_text(_STRIPS_WHITESPACE_TEXT)
         assert plan.steps[0].verification == "npm test"
@@ -2,7 +2,12 @@
 
 from __future__ import annotations
 
-from unittest.mock import mock_open, patch
+import io
+import types
+from contextlib import contextmanager
+from unittest.mock import patch
+
+import pytest
 
 from natshell.platform import (
     config_dir,
@@ -15,178 +20,154 @@ from natshell.platform import (
     is_wsl,
 )
 
+# The undecorated detector.  Calling it directly skips the lru_cache, so the
+# detection tests need no cache_clear() before and after each one.
+_detect_platform = current_platform.__wrapped__
 
-class TestCurrentPlatform:
-    """Test current_platform() with mocked sys.platform and /proc/version."""
 
-    def setup_method(self):
-        # Clear the lru_cache before each test
-        current_platform.cache_clear()
+@contextmanager
+def _fake_proc_version(content: str):
+    """Make ``open()`` return *content*, as if read from /proc/version.
 
-    def teardown_method(self):
-        current_platform.cache_clear()
+    A StringIO is enough for ``with open(...) as f: f.read()`` and avoids
+    building the MagicMock tree ``mock_open`` creates on every use.
+    """
+    with patch("builtins.open", lambda *args, **kwargs: io.StringIO(content)):
+        yield
 
-    def test_darwin_returns_macos(self):
-        with patch("natshell.platform.sys") as mock_sys:
-            mock_sys.platform = "darwin"
-            assert current_platform() == "macos"
-
-    def test_linux_with_microsoft_proc_version_returns_wsl(self):
-        with patch("natshell.platform.sys") as mock_sys:
-            mock_sys.platform = "linux"
-            proc_content = "Linux version 5.15.0 (Microsoft WSL2)"
-            with patch("builtins.open", mock_open(read_data=proc_content)):
-                assert current_platform() == "wsl"
-
-    def test_linux_without_microsoft_returns_linux(self):
-        with patch("natshell.platform.sys") as mock_sys:
-            mock_sys.platform = "linux"
-            proc_content = "Linux version 6.12.69+deb13-amd64"
-            with patch("builtins.open", mock_open(read_data=proc_content)):
-                assert current_platform() == "linux"
-
-    def test_linux_no_proc_version_returns_linux(self):
-        with patch("natshell.platform.sys") as mock_sys:
-            mock_sys.platform = "linux"
-            with patch("builtins.open", side_effect=OSError("No such file")):
-                assert current_platform() == "linux"
-
-    def test_result_is_cached(self):
-        with patch("natshell.platform.sys") as mock_sys:
-            mock_sys.platform = "darwin"
-            first = current_platform()
 
-        # Second call should use cache, not re-check sys.platform
-        with patch("natshell.platform.sys") as mock_sys:
-            mock_sys.platform = "linux"
-            second = current_platform()
+@pytest.fixture
+def sys_platform(monkeypatch):
+    """Set the ``sys.platform`` natshell.platform sees, leaving the real one alone."""
 
-        assert first == second == "macos"
+    def _set(value: str) -> None:
+        monkeypatch.setattr("natshell.platform.sys", types.SimpleNamespace(platform=value))
 
+    return _set
 
-class TestHelpers:
-    def setup_method(self):
-        current_platform.cache_clear()
 
-    def teardown_method(self):
-        current_platform.cache_clear()
+@pytest.fixture
+def platform_is(monkeypatch):
+    """Pin ``current_platform()`` for the helpers built on top of it."""
 
-    def test_is_macos_true_on_darwin(self):
-        with patch("natshell.platform.sys") as mock_sys:
-            mock_sys.platform = "darwin"
-            assert is_macos() is True
-            assert is_wsl() is False
-            assert is_linux() is False
+    def _set(value: str) -> None:
+        monkeypatch.setattr("natshell.platform.current_platform", lambda: value)
 
-    def test_is_wsl_true_on_wsl(self):
-        current_platform.cache_clear()
-        with patch("natshell.platform.sys") as mock_sys:
-            mock_sys.platform = "linux"
-            with patch("builtins.open", mock_open(read_data="Linux Microsoft WSL2")):
-                assert is_wsl() is True
-                assert is_macos() is False
-                assert is_linux() is True  # WSL counts as Linux
-
-    def test_is_linux_true_on_native_linux(self):
-        current_platform.cache_clear()
-        with patch("natshell.platform.sys") as mock_sys:
-            mock_sys.platform = "linux"
-            with patch("builtins.open", mock_open(read_data="Linux version 6.12")):
-                assert is_linux() is True
-                assert is_macos() is False
-                assert is_wsl() is False
-
-    def test_is_windows_true_on_win32(self):
-        current_platform.cache_clear()
-        with patch("natshell.platform.sys") as mock_sys:
-            mock_sys.platform = "win32"
-            assert is_windows() is True
-            assert is_macos() is False
-            assert is_linux() is False
-            assert is_wsl() is False
+    return _set
 
 
-class TestWin32Platform:
-    """Test Windows-specific detection."""
+class TestCurrentPlatform:
+    """Test platform detection with a faked sys.platform and /proc/version."""
 
-    def setup_method(self):
-        current_platform.cache_clear()
+    def test_darwin_returns_macos(self, sys_platform):
+        sys_platform("darwin")
+        assert _detect_platform() == "macos"
 
-    def teardown_method(self):
-        current_platform.cache_clear()
+    def test_linux_with_microsoft_proc_version_returns_wsl(self, sys_platform):
+        sys_platform("linux")
+        with _fake_proc_version("Linux version 5.15.0 (Microsoft WSL2)"):
+            assert _detect_platform() == "wsl"
 
-    def test_win32_returns_windows(self):
-        with patch("natshell.platform.sys") as mock_sys:
-            mock_sys.platform = "win32"
-            assert current_platform() == "windows"
+    def test_linux_without_microsoft_returns_linux(self, sys_platform):
+        sys_platform("linux")
+        with _fake_proc_version("Linux version 6.12.69+deb13-amd64"):
+            assert _detect_platform() == "linux"
 
-    def test_win32_checked_before_linux(self):
-        """win32 check occurs before Linux/WSL branch."""
-        with patch("natshell.platform.sys") as mock_sys:
-            mock_sys.platform = "win32"
-            # Even if /proc/version existed, win32 takes precedence
-            assert current_platform() == "windows"
+    def test_linux_no_proc_version_returns_linux(self, sys_platform):
+        sys_platform("linux")
+        with patch("builtins.open", side_effect=OSError("No such file")):
+            assert _detect_platform() == "linux"
 
+    def test_result_is_cached(self, sys_platform):
+        current_platform.cache_clear()
+        try:
+            sys_platform("darwin")
+            first = current_platform()
 
-class TestIsArm64:
-    def setup_method(self):
-        is_arm64.cache_clear()
+            # Second call should use cache, not re-check sys.platform
+            sys_platform("linux")
+            second = current_platform()
+        finally:
+            current_platform.cache_clear()
 
-    def teardown_method(self):
-        is_arm64.cache_clear()
+        assert first == second == "macos"
 
-    def test_arm64_windows(self):
-        with patch("natshell.platform._platform.machine", return_value="ARM64"):
-            assert is_arm64() is True
 
-    def test_aarch64_linux(self):
-        is_arm64.cache_clear()
-        with patch("natshell.platform._platform.machine", return_value="aarch64"):
-            assert is_arm64() is True
+class TestHelpers:
+    def test_is_macos_true_on_darwin(self, platform_is):
+        platform_is("macos")
+        assert is_macos() is True
+        assert is_wsl() is False
+        assert is_linux() is False
+
+    def test_is_wsl_true_on_wsl(self, platform_is):
+        platform_is("wsl")
+        assert is_wsl() is True
+        assert is_macos() is False
+        assert is_linux() is True  # WSL counts as Linux
+
+    def test_is_linux_true_on_native_linux(self, platform_is):
+        platform_is("linux")
+        assert is_linux() is True
+        assert is_macos() is False
+        assert is_wsl() is False
+
+    def test_is_windows_true_on_win32(self, platform_is):
+        platform_is("windows")
+        assert is_windows() is True
+        assert is_macos() is False
+        assert is_linux() is False
+        assert is_wsl() is False
 
-    def test_x86_64(self):
-        is_arm64.cache_clear()
-        with patch("natshell.platform._platform.machine", return_value="x86_64"):
-            assert is_arm64() is False
 
+class TestWin32Platform:
+    """Test Windows-specific detection."""
 
-class TestDirectoryHelpers:
-    def setup_method(self):
-        current_platform.cache_clear()
+    def test_win32_returns_windows(self, sys_platform):
+        sys_platform("win32")
+        assert _detect_platform() == "windows"
 
-    def teardown_method(self):
-        current_platform.cache_clear()
+    def test_win32_checked_before_linux(self, sys_platform):
+        """win32 check occurs before Linux/WSL branch."""
+        sys_platform("win32")
+        # Even if /proc/version existed, win32 takes precedence
+        with _fake_proc_version("Linux version 5.15.0 (Microsoft WSL2)"):
+            assert _detect_platform() == "windows"
 
-    def test_data_dir_unix(self):
-        with patch("natshell.platform.sys") as mock_sys:
-            mock_sys.platform = "linux"
-            with patch("builtins.open", mock_open(read_data="Linux version 6.12")):
-                d = data_dir()
-                # Use Path parts to avoid separator issues on Windows
-                assert d.parts[-3:] == (".local", "share", "natshell")
 
-    def test_data_dir_windows(self):
-        current_platform.cache_clear()
-        with patch("natshell.platform.sys") as mock_sys:
-            mock_sys.platform = "win32"
-            with patch.dict("os.environ", {"LOCALAPPDATA": "C:\\Users\\test\\AppData\\Local"}):
-                d = data_dir()
-                assert "AppData" in str(d)
-                assert d.name == "natshell"
-
-    def test_config_dir_unix(self):
-        current_platform.cache_clear()
-        with patch("natshell.platform.sys") as mock_sys:
-            mock_sys.platform = "linux"
-            with patch("builtins.open", mock_open(read_data="Linux version 6.12")):
-                d = config_dir()
-                assert d.parts[-2:] == (".config", "natshell")
+class TestIsArm64:
+    @pytest.mark.parametrize(
+        ("machine", "expected"),
+        [("ARM64", True), ("aarch64", True), ("x86_64", False)],
+        ids=["arm64-windows", "aarch64-linux", "x86_64"],
+    )
+    def test_is_arm64(self, monkeypatch, machine: str, expected: bool):
+        monkeypatch.setattr("natshell.platform._platform.machine", lambda: machine)
+        assert is_arm64.__wrapped__() is expected
 
-    def test_config_dir_windows(self):
-        current_platform.cache_clear()
-        with patch("natshell.platform.sys") as mock_sys:
-            mock_sys.platform = "win32"
-            with patch.dict("os.environ", {"APPDATA": "C:\\Users\\test\\AppData\\Roaming"}):
-                d = config_dir()
-                assert "AppData" in str(d)
-                assert d.name == "natshell"
+
+class TestDirectoryHelpers:
+    def test_data_dir_unix(self, platform_is):
+        platform_is("linux")
+        d = data_dir()
+        # Use Path parts to avoid separator issues on Windows
+        assert d.parts[-3:] == (".local", "share", "natshell")
+
+    def test_data_dir_windows(self, platform_is, monkeypatch):
+        platform_is("windows")
+        monkeypatch.setenv("LOCALAPPDATA", "C:\\Users\\test\\AppData\\Local")
+        d = data_dir()
+        assert "AppData" in str(d)
+        assert d.name == "natshell"
+
+    def test_config_dir_unix(self, platform_is):
+        platform_is("linux")
+        d = config_dir()
+        assert d.parts[-2:] == (".config", "natshell")
+
+    def test_config_dir_windows(self, platform_is, monkeypatch):
+        platform_is("windows")
+        monkeypatch.setenv("APPDATA", "C:\\Users\\test\\AppData\\Roaming")
+        d = config_dir()
+        assert "AppData" in str(d)
+        assert d.name == "natshell"
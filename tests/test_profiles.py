@@ -2,8 +2,7 @@
 
 from __future__ import annotations
 
-import textwrap
-from pathlib import Path
+from operator import attrgetter
 
 import pytest
 
@@ -12,7 +11,7 @@ from natshell.config import (
     ProfileConfig,
     apply_profile,
     list_profiles,
-    load_config,
+    load_config_from_string,
 )
 
 # ─── ProfileConfig defaults ─────────────────────────────────────────────
@@ -40,121 +39,101 @@ class TestProfileConfigDefaults:
 # ─── Parsing [profiles.*] from TOML ─────────────────────────────────────
 
 
-class TestProfileParsing:
-    def test_loads_single_profile(self, tmp_path: Path):
-        config_file = tmp_path / "config.toml"
-        config_file.write_text(
-            textwrap.dedent("""\
-            [profiles.coder]
-            ollama_model = "qwen3-coder:30b"
-            n_ctx = 131072
-            temperature = 0.3
-        """)
-        )
+_SINGLE_PROFILE_TOML = """\
+[profiles.coder]
+ollama_model = "qwen3-coder:30b"
+n_ctx = 131072
+temperature = 0.3
+"""
+
+_MULTIPLE_PROFILES_TOML = """\
+[profiles.lite]
+ollama_model = "qwen3:4b"
+n_ctx = 8192
+
+[profiles.coder]
+ollama_model = "qwen3-coder:30b"
+n_ctx = 131072
+"""
+
+_REMOTE_API_PROFILE_TOML = """\
+[profiles.remote-api]
+remote_url = "https://api.example.com/v1"
+remote_model = "gpt-4o"
+api_key = "sk-test"
+n_ctx = 128000
+"""
+
+_LOCAL_CPU_PROFILE_TOML = """\
+[profiles.local-cpu]
+engine = "local"
+n_gpu_layers = 0
+n_ctx = 4096
+"""
+
+_UNKNOWN_KEYS_TOML = """\
+[profiles.test]
+ollama_model = "qwen3:4b"
+unknown_key = "should be ignored"
+"""
+
+_MIXED_SECTIONS_TOML = """\
+[agent]
+temperature = 0.5
+
+[profiles.test]
+ollama_model = "qwen3:4b"
+n_ctx = 8192
+
+[ui]
+theme = "light"
+"""
+
 
-        cfg = load_config(str(config_file))
+class TestProfileParsing:
+    def test_loads_single_profile(self):
+        cfg = load_config_from_string(_SINGLE_PROFILE_TOML)
         assert "coder" in cfg.profiles
         p = cfg.profiles["coder"]
         assert p.ollama_model == "qwen3-coder:30b"
         assert p.n_ctx == 131072
         assert p.temperature == 0.3
 
-    def test_loads_multiple_profiles(self, tmp_path: Path):
-        config_file = tmp_path / "config.toml"
-        config_file.write_text(
-            textwrap.dedent("""\
-            [profiles.lite]
-            ollama_model = "qwen3:4b"
-            n_ctx = 8192
-
-            [profiles.coder]
-            ollama_model = "qwen3-coder:30b"
-            n_ctx = 131072
-        """)
-        )
-
-        cfg = load_config(str(config_file))
+    def test_loads_multiple_profiles(self):
+        cfg = load_config_from_string(_MULTIPLE_PROFILES_TOML)
         assert len(cfg.profiles) == 2
         assert "lite" in cfg.profiles
         assert "coder" in cfg.profiles
         assert cfg.profiles["lite"].ollama_model == "qwen3:4b"
         assert cfg.profiles["coder"].n_ctx == 131072
 
-    def test_loads_remote_api_profile(self, tmp_path: Path):
-        config_file = tmp_path / "config.toml"
-        config_file.write_text(
-            textwrap.dedent("""\
-            [profiles.remote-api]
-            remote_url = "https://api.example.com/v1"
-            remote_model = "gpt-4o"
-            api_key = "sk-test"
-            n_ctx = 128000
-        """)
-        )
-
-        cfg = load_config(str(config_file))
+    def test_loads_remote_api_profile(self):
+        cfg = load_config_from_string(_REMOTE_API_PROFILE_TOML)
         p = cfg.profiles["remote-api"]
         assert p.remote_url == "https://api.example.com/v1"
         assert p.remote_model == "gpt-4o"
         assert p.api_key == "sk-test"
         assert p.n_ctx == 128000
 
-    def test_loads_local_cpu_profile(self, tmp_path: Path):
-        config_file = tmp_path / "config.toml"
-        config_file.write_text(
-            textwrap.dedent("""\
-            [profiles.local-cpu]
-            engine = "local"
-            n_gpu_layers = 0
-            n_ctx = 4096
-        """)
-        )
-
-        cfg = load_config(str(config_file))
+    def test_loads_local_cpu_profile(self):
+        cfg = load_config_from_string(_LOCAL_CPU_PROFILE_TOML)
         p = cfg.profiles["local-cpu"]
         assert p.engine == "local"
         assert p.n_gpu_layers == 0
         assert p.n_ctx == 4096
 
-    def test_ignores_unknown_keys(self, tmp_path: Path):
-        config_file = tmp_path / "config.toml"
-        config_file.write_text(
-            textwrap.dedent("""\
-            [profiles.test]
-            ollama_model = "qwen3:4b"
-            unknown_key = "should be ignored"
-        """)
-        )
-
-        cfg = load_config(str(config_file))
+    def test_ignores_unknown_keys(self):
+        cfg = load_config_from_string(_UNKNOWN_KEYS_TOML)
         assert "test" in cfg.profiles
         assert cfg.profiles["test"].ollama_model == "qwen3:4b"
         assert not hasattr(cfg.profiles["test"], "unknown_key")
 
-    def test_no_profiles_section(self, tmp_path: Path):
-        config_file = tmp_path / "config.toml"
-        config_file.write_text('[ui]\ntheme = "dark"\n')
-
-        cfg = load_config(str(config_file))
+    def test_no_profiles_section(self):
+        cfg = load_config_from_string('[ui]\ntheme = "dark"\n')
         assert len(cfg.profiles) == 0
 
-    def test_profiles_alongside_other_sections(self, tmp_path: Path):
-        config_file = tmp_path / "config.toml"
-        config_file.write_text(
-            textwrap.dedent("""\
-            [agent]
-            temperature = 0.5
-
-            [profiles.test]
-            ollama_model = "qwen3:4b"
-            n_ctx = 8192
-
-            [ui]
-            theme = "light"
-        """)
-        )
-
-        cfg = load_config(str(config_file))
+    def test_profiles_alongside_other_sections(self):
+        cfg = load_config_from_string(_MIXED_SECTIONS_TOML)
         assert cfg.agent.temperature == 0.5
         assert cfg.ui.theme == "light"
         assert "test" in cfg.profiles
@@ -186,54 +165,26 @@ class TestApplyProfile:
         with pytest.raises(KeyError, match="Unknown profile: nonexistent"):
             apply_profile(cfg, "nonexistent")
 
-    def test_applies_ollama_model(self):
-        cfg = NatShellConfig()
-        cfg.profiles["test"] = ProfileConfig(ollama_model="qwen3:14b")
-        apply_profile(cfg, "test")
-        assert cfg.ollama.default_model == "qwen3:14b"
-
-    def test_applies_ollama_url(self):
-        cfg = NatShellConfig()
-        cfg.profiles["test"] = ProfileConfig(ollama_url="http://myserver:11434")
-        apply_profile(cfg, "test")
-        assert cfg.ollama.url == "http://myserver:11434"
-
-    def test_applies_remote_settings(self):
-        cfg = NatShellConfig()
-        cfg.profiles["test"] = ProfileConfig(
-            remote_url="https://api.example.com/v1",
-            remote_model="gpt-4o",
-            api_key="sk-test",
-        )
-        apply_profile(cfg, "test")
-        assert cfg.remote.url == "https://api.example.com/v1"
-        assert cfg.remote.model == "gpt-4o"
-        assert cfg.remote.api_key == "sk-test"
-
-    def test_applies_n_ctx_to_both(self):
-        cfg = NatShellConfig()
-        cfg.profiles["test"] = ProfileConfig(n_ctx=65536)
-        apply_profile(cfg, "test")
-        assert cfg.ollama.n_ctx == 65536
-        assert cfg.remote.n_ctx == 65536
-
-    def test_applies_temperature(self):
-        cfg = NatShellConfig()
-        cfg.profiles["test"] = ProfileConfig(temperature=0.7)
-        apply_profile(cfg, "test")
-        assert cfg.agent.temperature == 0.7
-
-    def test_applies_engine(self):
-        cfg = NatShellConfig()
-        cfg.profiles["test"] = ProfileConfig(engine="local")
-        apply_profile(cfg, "test")
-        assert cfg.engine.preferred == "local"
-
-    def test_applies_n_gpu_layers(self):
+    @pytest.mark.parametrize(
+        ("field", "value", "targets"),
+        [
+            ("ollama_model", "qwen3:14b", ["ollama.default_model"]),
+            ("ollama_url", "http://myserver:11434", ["ollama.url"]),
+            ("remote_url", "https://api.example.com/v1", ["remote.url"]),
+            ("remote_model", "gpt-4o", ["remote.model"]),
+            ("api_key", "sk-test", ["remote.api_key"]),
+            ("n_ctx", 65536, ["ollama.n_ctx", "remote.n_ctx"]),
+            ("temperature", 0.7, ["agent.temperature"]),
+            ("engine", "local", ["engine.preferred"]),
+            ("n_gpu_layers", 0, ["model.n_gpu_layers"]),
+        ],
+    )
+    def test_applies_field(self, field, value, targets):
         cfg = NatShellConfig()
-        cfg.profiles["test"] = ProfileConfig(n_gpu_layers=0)
+        cfg.profiles["test"] = ProfileConfig(**{field: value})
         apply_profile(cfg, "test")
-        assert cfg.model.n_gpu_layers == 0
+        for target in targets:
+            assert attrgetter(target)(cfg) == value
 
     def test_n_gpu_layers_negative_two_is_not_applied(self):
         """n_gpu_layers=-2 is the sentinel 'don't override' value."""
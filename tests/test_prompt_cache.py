@@ -3,7 +3,9 @@
 from __future__ import annotations
 
 import sys
-from unittest.mock import MagicMock, patch
+from types import ModuleType, SimpleNamespace
+
+import pytest
 
 from natshell.config import ModelConfig
 
@@ -16,54 +18,81 @@ class TestPromptCacheConfig:
         assert mc.prompt_cache_mb == 256
 
 
+class _Recorder:
+    """A callable that records its calls and returns *retval*.
+
+    Stands in for the few llama_cpp callables LocalEngine touches, without
+    the child-mock bookkeeping of MagicMock.
+    """
+
+    def __init__(self, retval=None):
+        self.retval = retval
+        self.calls: list[tuple[tuple, dict]] = []
+
+    def __call__(self, *args, **kwargs):
+        self.calls.append((args, kwargs))
+        return self.retval
+
+
+@pytest.fixture(scope="module")
+def llama_cpp_stub():
+    """A stand-in llama_cpp module, installed once for this module's tests.
+
+    Module scope rather than session scope: test_gpu checks behaviour with
+    llama_cpp absent, so the stub must be gone once these tests finish.
+    Each test sets the stub's ``Llama``/``LlamaRAMCache`` to fresh recorders.
+    """
+    stub = ModuleType("llama_cpp")
+    original = sys.modules.get("llama_cpp")
+    sys.modules["llama_cpp"] = stub
+    yield stub
+    if original is None:
+        sys.modules.pop("llama_cpp", None)
+    else:
+        sys.modules["llama_cpp"] = original
+
+
 class TestLocalEnginePromptCache:
-    def _build_engine(self, prompt_cache: bool = True, prompt_cache_mb: int = 128):
-        """Build a LocalEngine with a fully mocked llama_cpp module."""
-        mock_llm = MagicMock()
-        mock_llama_cls = MagicMock(return_value=mock_llm)
-        mock_cache = MagicMock()
-        mock_cache_cls = MagicMock(return_value=mock_cache)
-
-        fake_llama_cpp = MagicMock(
-            Llama=mock_llama_cls,
-            LlamaRAMCache=mock_cache_cls,
-        )
+    def _build_engine(
+        self, stub, monkeypatch, prompt_cache: bool = True, prompt_cache_mb: int = 128
+    ):
+        """Build a LocalEngine against the stub llama_cpp module."""
+        set_cache = _Recorder()
+        stub.Llama = _Recorder(retval=SimpleNamespace(set_cache=set_cache))
+        stub.LlamaRAMCache = cache_cls = _Recorder(retval=SimpleNamespace())
 
-        with (
-            patch.dict(sys.modules, {"llama_cpp": fake_llama_cpp}),
-            patch("natshell.gpu.gpu_backend_available", return_value=False),
-            patch("natshell.gpu.best_gpu_index", return_value=0),
-        ):
-            from natshell.inference.local import LocalEngine
+        monkeypatch.setattr("natshell.gpu.gpu_backend_available", lambda: False)
+        monkeypatch.setattr("natshell.gpu.best_gpu_index", lambda: 0)
 
-            engine = LocalEngine(
-                model_path="/tmp/fake-model-4B.gguf",
-                n_ctx=4096,
-                n_gpu_layers=0,
-                prompt_cache=prompt_cache,
-                prompt_cache_mb=prompt_cache_mb,
-            )
+        from natshell.inference.local import LocalEngine
 
-        return engine, mock_llm, mock_cache_cls
+        engine = LocalEngine(
+            model_path="/tmp/fake-model-4B.gguf",
+            n_ctx=4096,
+            n_gpu_layers=0,
+            prompt_cache=prompt_cache,
+            prompt_cache_mb=prompt_cache_mb,
+        )
+        return engine, set_cache, cache_cls
 
-    def test_accepts_prompt_cache_param(self):
+    def test_accepts_prompt_cache_param(self, llama_cpp_stub, monkeypatch):
         """LocalEngine should accept prompt_cache parameter without error."""
-        engine, mock_llm, mock_cache_cls = self._build_engine(
-            prompt_cache=True, prompt_cache_mb=128,
+        engine, set_cache, cache_cls = self._build_engine(
+            llama_cpp_stub, monkeypatch, prompt_cache=True, prompt_cache_mb=128,
         )
 
         assert engine.n_ctx == 4096
         # set_cache should have been called on the llm instance
-        mock_llm.set_cache.assert_called_once()
+        assert len(set_cache.calls) == 1
         # LlamaRAMCache should have been constructed with correct capacity
-        mock_cache_cls.assert_called_once_with(capacity_bytes=128 * 1024 * 1024)
+        assert cache_cls.calls == [((), {"capacity_bytes": 128 * 1024 * 1024})]
 
-    def test_cache_not_set_when_disabled(self):
+    def test_cache_not_set_when_disabled(self, llama_cpp_stub, monkeypatch):
         """When prompt_cache=False, set_cache should not be called."""
-        engine, mock_llm, mock_cache_cls = self._build_engine(
-            prompt_cache=False,
+        engine, set_cache, cache_cls = self._build_engine(
+            llama_cpp_stub, monkeypatch, prompt_cache=False,
         )
 
         assert engine.n_ctx == 4096
-        mock_llm.set_cache.assert_not_called()
-        mock_cache_cls.assert_not_called()
+        assert set_cache.calls == []
+        assert cache_cls.calls == []
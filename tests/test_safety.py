@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+import pytest
+
 from natshell.config import SafetyConfig
-from natshell.safety.classifier import Risk, SafetyClassifier
+from natshell.safety.classifier import Risk, SafetyClassifier, _compile_patterns
 
 
 def _make_classifier(
@@ -54,242 +56,223 @@ def _make_classifier(
     return SafetyClassifier(config)
 
 
+# Classifiers hold no per-call state, so one instance per configuration
+# serves the whole module.
+@pytest.fixture(scope="module")
+def classifier() -> SafetyClassifier:
+    return _make_classifier()
+
+
+@pytest.fixture(scope="module")
+def danger_classifier() -> SafetyClassifier:
+    return _make_classifier(mode="danger")
+
+
 # ─── Blocked commands ────────────────────────────────────────────────────────
 
 
 class TestBlockedCommands:
-    def test_fork_bomb(self):
-        c = _make_classifier()
-        assert c.classify_command(":(){ :|:& };:") == Risk.BLOCKED
+    def test_fork_bomb(self, classifier):
+        assert classifier.classify_command(":(){ :|:& };:") == Risk.BLOCKED
 
-    def test_rm_rf_root(self):
-        c = _make_classifier()
-        assert c.classify_command("rm -rf /") == Risk.BLOCKED
-        assert c.classify_command("rm -Rf /") == Risk.BLOCKED
+    def test_rm_rf_root(self, classifier):
+        assert classifier.classify_command("rm -rf /") == Risk.BLOCKED
+        assert classifier.classify_command("rm -Rf /") == Risk.BLOCKED
 
-    def test_rm_rf_root_star(self):
-        c = _make_classifier()
-        assert c.classify_command("rm -rf /*") == Risk.BLOCKED
+    def test_rm_rf_root_star(self, classifier):
+        assert classifier.classify_command("rm -rf /*") == Risk.BLOCKED
 
-    def test_mv_root(self):
-        c = _make_classifier()
-        assert c.classify_command("mv / /tmp") == Risk.BLOCKED
+    def test_mv_root(self, classifier):
+        assert classifier.classify_command("mv / /tmp") == Risk.BLOCKED
 
-    def test_dd_to_disk(self):
-        c = _make_classifier()
-        assert c.classify_command("dd if=/dev/zero of=/dev/sda") == Risk.BLOCKED
+    def test_dd_to_disk(self, classifier):
+        assert classifier.classify_command("dd if=/dev/zero of=/dev/sda") == Risk.BLOCKED
 
-    def test_mkfs_disk(self):
-        c = _make_classifier()
-        assert c.classify_command("mkfs.ext4 /dev/sda1") == Risk.BLOCKED
+    def test_mkfs_disk(self, classifier):
+        assert classifier.classify_command("mkfs.ext4 /dev/sda1") == Risk.BLOCKED
 
-    def test_redirect_to_disk(self):
-        c = _make_classifier()
-        assert c.classify_command("> /dev/sda") == Risk.BLOCKED
+    def test_redirect_to_disk(self, classifier):
+        assert classifier.classify_command("> /dev/sda") == Risk.BLOCKED
 
 
 # ─── Confirm commands ────────────────────────────────────────────────────────
 
 
 class TestConfirmCommands:
-    def test_rm(self):
-        c = _make_classifier()
-        assert c.classify_command("rm file.txt") == Risk.CONFIRM
+    def test_rm(self, classifier):
+        assert classifier.classify_command("rm file.txt") == Risk.CONFIRM
 
-    def test_sudo(self):
-        c = _make_classifier()
-        assert c.classify_command("sudo apt update") == Risk.CONFIRM
+    def test_sudo(self, classifier):
+        assert classifier.classify_command("sudo apt update") == Risk.CONFIRM
 
-    def test_dd(self):
-        c = _make_classifier()
-        assert c.classify_command("dd if=a of=b") == Risk.CONFIRM
+    def test_dd(self, classifier):
+        assert classifier.classify_command("dd if=a of=b") == Risk.CONFIRM
 
-    def test_mkfs(self):
-        c = _make_classifier()
+    def test_mkfs(self, classifier):
         # mkfs without /dev/sd* is confirm, not blocked
-        assert c.classify_command("mkfs.ext4 /dev/loop0") == Risk.CONFIRM
+        assert classifier.classify_command("mkfs.ext4 /dev/loop0") == Risk.CONFIRM
 
-    def test_systemctl_stop(self):
-        c = _make_classifier()
-        assert c.classify_command("systemctl stop nginx") == Risk.CONFIRM
+    def test_systemctl_stop(self, classifier):
+        assert classifier.classify_command("systemctl stop nginx") == Risk.CONFIRM
 
-    def test_systemctl_restart(self):
-        c = _make_classifier()
-        assert c.classify_command("systemctl restart sshd") == Risk.CONFIRM
+    def test_systemctl_restart(self, classifier):
+        assert classifier.classify_command("systemctl restart sshd") == Risk.CONFIRM
 
-    def test_kill(self):
-        c = _make_classifier()
-        assert c.classify_command("kill -9 1234") == Risk.CONFIRM
+    def test_kill(self, classifier):
+        assert classifier.classify_command("kill -9 1234") == Risk.CONFIRM
 
-    def test_apt_install(self):
-        c = _make_classifier()
-        assert c.classify_command("apt install nginx") == Risk.CONFIRM
+    def test_apt_install(self, classifier):
+        assert classifier.classify_command("apt install nginx") == Risk.CONFIRM
 
-    def test_pip_install(self):
-        c = _make_classifier()
-        assert c.classify_command("pip install requests") == Risk.CONFIRM
+    def test_pip_install(self, classifier):
+        assert classifier.classify_command("pip install requests") == Risk.CONFIRM
 
-    def test_docker_rm(self):
-        c = _make_classifier()
-        assert c.classify_command("docker rm mycontainer") == Risk.CONFIRM
+    def test_docker_rm(self, classifier):
+        assert classifier.classify_command("docker rm mycontainer") == Risk.CONFIRM
 
-    def test_iptables(self):
-        c = _make_classifier()
-        assert c.classify_command("iptables -A INPUT -j DROP") == Risk.CONFIRM
+    def test_iptables(self, classifier):
+        assert classifier.classify_command("iptables -A INPUT -j DROP") == Risk.CONFIRM
 
-    def test_redirect_to_etc(self):
-        c = _make_classifier()
-        assert c.classify_command("echo x > /etc/hostname") == Risk.CONFIRM
+    def test_redirect_to_etc(self, classifier):
+        assert classifier.classify_command("echo x > /etc/hostname") == Risk.CONFIRM
 
-    def test_tee_pipe(self):
-        c = _make_classifier()
-        assert c.classify_command("echo x | tee /tmp/out") == Risk.CONFIRM
+    def test_tee_pipe(self, classifier):
+        assert classifier.classify_command("echo x | tee /tmp/out") == Risk.CONFIRM
 
-    def test_crontab(self):
-        c = _make_classifier()
-        assert c.classify_command("crontab -e") == Risk.CONFIRM
+    def test_crontab(self, classifier):
+        assert classifier.classify_command("crontab -e") == Risk.CONFIRM
 
-    def test_sudo_heuristic(self):
-        c = _make_classifier()
-        assert c.classify_command("sudo ls") == Risk.CONFIRM
+    def test_sudo_heuristic(self, classifier):
+        assert classifier.classify_command("sudo ls") == Risk.CONFIRM
 
-    def test_redirect_to_system_path_heuristic(self):
-        c = _make_classifier()
-        assert c.classify_command("echo x > /boot/grub/grub.cfg") == Risk.CONFIRM
+    def test_redirect_to_system_path_heuristic(self, classifier):
+        assert classifier.classify_command("echo x > /boot/grub/grub.cfg") == Risk.CONFIRM
 
 
 # ─── Safe commands ───────────────────────────────────────────────────────────
 
 
 class TestSafeCommands:
-    def test_ls(self):
-        c = _make_classifier()
-        assert c.classify_command("ls -la") == Risk.SAFE
+    def test_ls(self, classifier):
+        assert classifier.classify_command("ls -la") == Risk.SAFE
 
-    def test_cat(self):
-        c = _make_classifier()
-        assert c.classify_command("cat /etc/hostname") == Risk.SAFE
+    def test_cat(self, classifier):
+        assert classifier.classify_command("cat /etc/hostname") == Risk.SAFE
 
-    def test_df(self):
-        c = _make_classifier()
-        assert c.classify_command("df -h") == Risk.SAFE
+    def test_df(self, classifier):
+        assert classifier.classify_command("df -h") == Risk.SAFE
 
-    def test_grep(self):
-        c = _make_classifier()
-        assert c.classify_command("grep -r TODO .") == Risk.SAFE
+    def test_grep(self, classifier):
+        assert classifier.classify_command("grep -r TODO .") == Risk.SAFE
 
-    def test_echo(self):
-        c = _make_classifier()
-        assert c.classify_command("echo hello") == Risk.SAFE
+    def test_echo(self, classifier):
+        assert classifier.classify_command("echo hello") == Risk.SAFE
 
-    def test_uname(self):
-        c = _make_classifier()
-        assert c.classify_command("uname -a") == Risk.SAFE
+    def test_uname(self, classifier):
+        assert classifier.classify_command("uname -a") == Risk.SAFE
 
-    def test_ps(self):
-        c = _make_classifier()
-        assert c.classify_command("ps aux") == Risk.SAFE
+    def test_ps(self, classifier):
+        assert classifier.classify_command("ps aux") == Risk.SAFE
 
-    def test_systemctl_status(self):
-        c = _make_classifier()
-        assert c.classify_command("systemctl status nginx") == Risk.SAFE
+    def test_systemctl_status(self, classifier):
+        assert classifier.classify_command("systemctl status nginx") == Risk.SAFE
 
-    def test_ip_addr(self):
-        c = _make_classifier()
-        assert c.classify_command("ip addr show") == Risk.SAFE
+    def test_ip_addr(self, classifier):
+        assert classifier.classify_command("ip addr show") == Risk.SAFE
 
-    def test_apt_list(self):
-        c = _make_classifier()
-        assert c.classify_command("apt list --installed") == Risk.SAFE
+    def test_apt_list(self, classifier):
+        assert classifier.classify_command("apt list --installed") == Risk.SAFE
 
-    def test_docker_ps(self):
-        c = _make_classifier()
-        assert c.classify_command("docker ps") == Risk.SAFE
+    def test_docker_ps(self, classifier):
+        assert classifier.classify_command("docker ps") == Risk.SAFE
 
 
 # ─── Tool call classification ────────────────────────────────────────────────
 
 
 class TestToolCallClassification:
-    def test_write_file_always_confirm(self):
-        c = _make_classifier()
+    def test_write_file_always_confirm(self, classifier):
         assert (
-            c.classify_tool_call("write_file", {"path": "/tmp/x", "content": "hi"}) == Risk.CONFIRM
+            classifier.classify_tool_call("write_file", {"path": "/tmp/x", "content": "hi"})
+            == Risk.CONFIRM
         )
 
-    def test_edit_file_always_confirm(self):
-        c = _make_classifier()
+    def test_edit_file_always_confirm(self, classifier):
         assert (
-            c.classify_tool_call("edit_file", {"path": "/tmp/x", "old_text": "a", "new_text": "b"})
+            classifier.classify_tool_call(
+                "edit_file", {"path": "/tmp/x", "old_text": "a", "new_text": "b"}
+            )
             == Risk.CONFIRM
         )
 
-    def test_edit_file_sensitive_path(self):
-        c = _make_classifier()
+    def test_edit_file_sensitive_path(self, classifier):
         assert (
-            c.classify_tool_call(
+            classifier.classify_tool_call(
                 "edit_file", {"path": "/home/user/.ssh/config", "old_text": "a", "new_text": "b"}
             )
             == Risk.CONFIRM
         )
 
-    def test_run_code_always_confirm(self):
-        c = _make_classifier()
+    def test_run_code_always_confirm(self, classifier):
         assert (
-            c.classify_tool_call("run_code", {"language": "python", "code": "print(1)"})
+            classifier.classify_tool_call("run_code", {"language": "python", "code": "print(1)"})
             == Risk.CONFIRM
         )
 
-    def test_read_file_always_safe(self):
-        c = _make_classifier()
-        assert c.classify_tool_call("read_file", {"path": "/etc/passwd"}) == Risk.SAFE
+    def test_read_file_always_safe(self, classifier):
+        assert classifier.classify_tool_call("read_file", {"path": "/etc/passwd"}) == Risk.SAFE
 
-    def test_list_directory_always_safe(self):
-        c = _make_classifier()
-        assert c.classify_tool_call("list_directory", {"path": "/"}) == Risk.SAFE
+    def test_list_directory_always_safe(self, classifier):
+        assert classifier.classify_tool_call("list_directory", {"path": "/"}) == Risk.SAFE
 
-    def test_search_files_always_safe(self):
-        c = _make_classifier()
-        assert c.classify_tool_call("search_files", {"pattern": "TODO"}) == Risk.SAFE
+    def test_search_files_always_safe(self, classifier):
+        assert classifier.classify_tool_call("search_files", {"pattern": "TODO"}) == Risk.SAFE
 
-    def test_execute_shell_delegates(self):
-        c = _make_classifier()
-        assert c.classify_tool_call("execute_shell", {"command": "rm foo"}) == Risk.CONFIRM
-        assert c.classify_tool_call("execute_shell", {"command": "ls"}) == Risk.SAFE
+    def test_execute_shell_delegates(self, classifier):
+        assert classifier.classify_tool_call("execute_shell", {"command": "rm foo"}) == Risk.CONFIRM
+        assert classifier.classify_tool_call("execute_shell", {"command": "ls"}) == Risk.SAFE
 
 
 # ─── Danger mode ─────────────────────────────────────────────────────────────
 
 
 class TestDangerMode:
-    def test_danger_downgrades_confirm_to_safe(self):
-        c = _make_classifier(mode="danger")
-        assert c.classify_tool_call("execute_shell", {"command": "rm foo"}) == Risk.SAFE
-        assert c.classify_tool_call("execute_shell", {"command": "sudo apt install x"}) == Risk.SAFE
+    def test_danger_downgrades_confirm_to_safe(self, danger_classifier):
+        assert (
+            danger_classifier.classify_tool_call("execute_shell", {"command": "rm foo"})
+            == Risk.SAFE
+        )
+        assert (
+            danger_classifier.classify_tool_call("execute_shell", {"command": "sudo apt install x"})
+            == Risk.SAFE
+        )
 
-    def test_danger_does_not_downgrade_blocked(self):
-        c = _make_classifier(mode="danger")
-        assert c.classify_tool_call("execute_shell", {"command": "rm -rf /"}) == Risk.BLOCKED
+    def test_danger_does_not_downgrade_blocked(self, danger_classifier):
+        assert (
+            danger_classifier.classify_tool_call("execute_shell", {"command": "rm -rf /"})
+            == Risk.BLOCKED
+        )
 
-    def test_danger_downgrades_edit_file(self):
-        c = _make_classifier(mode="danger")
+    def test_danger_downgrades_edit_file(self, danger_classifier):
         assert (
-            c.classify_tool_call("edit_file", {"path": "/tmp/x", "old_text": "a", "new_text": "b"})
+            danger_classifier.classify_tool_call(
+                "edit_file", {"path": "/tmp/x", "old_text": "a", "new_text": "b"}
+            )
             == Risk.SAFE
         )
 
-    def test_danger_downgrades_run_code(self):
-        c = _make_classifier(mode="danger")
+    def test_danger_downgrades_run_code(self, danger_classifier):
         assert (
-            c.classify_tool_call("run_code", {"language": "python", "code": "print(1)"})
+            danger_classifier.classify_tool_call(
+                "run_code", {"language": "python", "code": "print(1)"}
+            )
             == Risk.SAFE
         )
 
-    def test_danger_edit_file_sensitive_path_still_confirm(self):
+    def test_danger_edit_file_sensitive_path_still_confirm(self, danger_classifier):
         """Even in danger mode, sensitive paths on edit_file stay CONFIRM."""
-        c = _make_classifier(mode="danger")
         assert (
-            c.classify_tool_call(
+            danger_classifier.classify_tool_call(
                 "edit_file", {"path": "/home/user/.env", "old_text": "a", "new_text": "b"}
             )
             == Risk.CONFIRM
@@ -300,29 +283,71 @@ class TestDangerMode:
 
 
 class TestSensitivePathPatterns:
-    def test_aws_credentials(self):
-        c = _make_classifier()
+    def test_aws_credentials(self, classifier):
         path = "/home/user/.aws/credentials"
-        assert c.classify_tool_call("read_file", {"path": path}) == Risk.CONFIRM
+        assert classifier.classify_tool_call("read_file", {"path": path}) == Risk.CONFIRM
 
-    def test_kube_config(self):
-        c = _make_classifier()
+    def test_kube_config(self, classifier):
         path = "/home/user/.kube/config"
-        assert c.classify_tool_call("read_file", {"path": path}) == Risk.CONFIRM
+        assert classifier.classify_tool_call("read_file", {"path": path}) == Risk.CONFIRM
 
-    def test_docker_config(self):
-        c = _make_classifier()
+    def test_docker_config(self, classifier):
         path = "/home/user/.docker/config.json"
-        assert c.classify_tool_call("read_file", {"path": path}) == Risk.CONFIRM
+        assert classifier.classify_tool_call("read_file", {"path": path}) == Risk.CONFIRM
 
-    def test_ssh_key(self):
-        c = _make_classifier()
+    def test_ssh_key(self, classifier):
         path = "/home/user/.ssh/id_rsa"
-        assert c.classify_tool_call("read_file", {"path": path}) == Risk.CONFIRM
+        assert classifier.classify_tool_call("read_file", {"path": path}) == Risk.CONFIRM
+
+    def test_non_sensitive_path_safe(self, classifier):
+        assert (
+            classifier.classify_tool_call("read_file", {"path": "/home/user/readme.txt"})
+            == Risk.SAFE
+        )
+
+
+# ─── Pattern compilation ────────────────────────────────────────────────────
 
-    def test_non_sensitive_path_safe(self):
+
+class TestPatternCompilation:
+    def test_classifiers_share_compiled_patterns(self):
+        a = _make_classifier()
+        b = _make_classifier(mode="danger")
+        assert a._confirm_patterns is b._confirm_patterns
+        assert a._blocked_patterns is b._blocked_patterns
+
+    def test_different_patterns_compiled_separately(self):
+        a = _make_classifier()
+        b = _make_classifier(blocked=[r"^halt"])
+        assert a._blocked_patterns is not b._blocked_patterns
+        assert b.classify_command("halt") == Risk.BLOCKED
+
+    def test_patterns_joined_into_one_regex(self):
         c = _make_classifier()
-        assert c.classify_tool_call("read_file", {"path": "/home/user/readme.txt"}) == Risk.SAFE
+        assert len(c._confirm_patterns) == 1
+        assert len(c._blocked_patterns) == 1
+
+    @pytest.mark.parametrize(
+        "blocked",
+        [
+            [r"^(\w+) \1$", r"^halt"],
+            [r"^halt", r"(?i)^reboot"],
+        ],
+        ids=["backreference", "inline-flag"],
+    )
+    def test_unjoinable_patterns_compiled_one_by_one(self, blocked):
+        c = _make_classifier(blocked=blocked)
+        assert len(c._blocked_patterns) == 2
+        assert c.classify_command("halt") == Risk.BLOCKED
+
+    def test_backreference_keeps_its_meaning(self):
+        c = _make_classifier(blocked=[r"^halt", r"^(\w+) \1$"])
+        assert c.classify_command("echo echo") == Risk.BLOCKED
+        assert c.classify_command("echo hi") == Risk.SAFE
+
+    def test_empty_list_compiles_to_nothing(self):
+        # Joining zero patterns would give "", which matches everything.
+        assert _compile_patterns(()) == ()
 
 
 # ─── Windows safety patterns ────────────────────────────────────────────────
@@ -356,87 +381,84 @@ def _make_windows_classifier() -> SafetyClassifier:
     return SafetyClassifier(config)
 
 
+@pytest.fixture(scope="module")
+def windows_classifier() -> SafetyClassifier:
+    return _make_windows_classifier()
+
+
 class TestWindowsBlockedCommands:
-    def test_format_c_drive(self):
-        c = _make_windows_classifier()
-        assert c.classify_command("format C:") == Risk.BLOCKED
+    def test_format_c_drive(self, windows_classifier):
+        assert windows_classifier.classify_command("format C:") == Risk.BLOCKED
 
-    def test_rd_c_drive(self):
-        c = _make_windows_classifier()
-        assert c.classify_command("rd /s /q C:\\") == Risk.BLOCKED
+    def test_rd_c_drive(self, windows_classifier):
+        assert windows_classifier.classify_command("rd /s /q C:\\") == Risk.BLOCKED
 
-    def test_remove_item_c_drive(self):
-        c = _make_windows_classifier()
-        assert c.classify_command("Remove-Item -Recurse -Force C:\\") == Risk.BLOCKED
+    def test_remove_item_c_drive(self, windows_classifier):
+        assert (
+            windows_classifier.classify_command("Remove-Item -Recurse -Force C:\\") == Risk.BLOCKED
+        )
 
 
 class TestWindowsConfirmCommands:
-    def test_del_recursive(self):
-        c = _make_windows_classifier()
-        assert c.classify_command("del /s temp_folder") == Risk.CONFIRM
+    def test_del_recursive(self, windows_classifier):
+        assert windows_classifier.classify_command("del /s temp_folder") == Risk.CONFIRM
 
-    def test_rd_recursive(self):
-        c = _make_windows_classifier()
-        assert c.classify_command("rd /s old_dir") == Risk.CONFIRM
+    def test_rd_recursive(self, windows_classifier):
+        assert windows_classifier.classify_command("rd /s old_dir") == Risk.CONFIRM
 
-    def test_format_other_drive(self):
-        c = _make_windows_classifier()
-        assert c.classify_command("format D:") == Risk.CONFIRM
+    def test_format_other_drive(self, windows_classifier):
+        assert windows_classifier.classify_command("format D:") == Risk.CONFIRM
 
-    def test_diskpart(self):
-        c = _make_windows_classifier()
-        assert c.classify_command("diskpart") == Risk.CONFIRM
+    def test_diskpart(self, windows_classifier):
+        assert windows_classifier.classify_command("diskpart") == Risk.CONFIRM
 
-    def test_net_user(self):
-        c = _make_windows_classifier()
-        assert c.classify_command("net user admin password /add") == Risk.CONFIRM
+    def test_net_user(self, windows_classifier):
+        assert windows_classifier.classify_command("net user admin password /add") == Risk.CONFIRM
 
-    def test_reg_delete(self):
-        c = _make_windows_classifier()
-        assert c.classify_command("reg delete HKLM\\Software\\Test") == Risk.CONFIRM
+    def test_reg_delete(self, windows_classifier):
+        assert (
+            windows_classifier.classify_command("reg delete HKLM\\Software\\Test") == Risk.CONFIRM
+        )
 
-    def test_remove_item_recurse(self):
-        c = _make_windows_classifier()
-        assert c.classify_command("Remove-Item ./temp -Recurse") == Risk.CONFIRM
+    def test_remove_item_recurse(self, windows_classifier):
+        assert windows_classifier.classify_command("Remove-Item ./temp -Recurse") == Risk.CONFIRM
 
-    def test_stop_service(self):
-        c = _make_windows_classifier()
-        assert c.classify_command("Stop-Service wuauserv") == Risk.CONFIRM
+    def test_stop_service(self, windows_classifier):
+        assert windows_classifier.classify_command("Stop-Service wuauserv") == Risk.CONFIRM
 
-    def test_set_execution_policy(self):
-        c = _make_windows_classifier()
-        assert c.classify_command("Set-ExecutionPolicy Unrestricted") == Risk.CONFIRM
+    def test_set_execution_policy(self, windows_classifier):
+        assert (
+            windows_classifier.classify_command("Set-ExecutionPolicy Unrestricted") == Risk.CONFIRM
+        )
 
-    def test_shutdown_windows(self):
-        c = _make_windows_classifier()
-        assert c.classify_command("shutdown /s /t 0") == Risk.CONFIRM
+    def test_shutdown_windows(self, windows_classifier):
+        assert windows_classifier.classify_command("shutdown /s /t 0") == Risk.CONFIRM
 
-    def test_schtasks_create(self):
-        c = _make_windows_classifier()
-        assert c.classify_command("schtasks /create /tn test") == Risk.CONFIRM
+    def test_schtasks_create(self, windows_classifier):
+        assert windows_classifier.classify_command("schtasks /create /tn test") == Risk.CONFIRM
 
-    def test_netsh_firewall(self):
-        c = _make_windows_classifier()
-        assert c.classify_command("netsh advfirewall set allprofiles state off") == Risk.CONFIRM
+    def test_netsh_firewall(self, windows_classifier):
+        assert (
+            windows_classifier.classify_command("netsh advfirewall set allprofiles state off")
+            == Risk.CONFIRM
+        )
 
-    def test_wmic_delete(self):
-        c = _make_windows_classifier()
-        assert c.classify_command("wmic process where name='test' delete") == Risk.CONFIRM
+    def test_wmic_delete(self, windows_classifier):
+        assert (
+            windows_classifier.classify_command("wmic process where name='test' delete")
+            == Risk.CONFIRM
+        )
 
 
 class TestWindowsSafeCommands:
-    def test_dir(self):
-        c = _make_windows_classifier()
-        assert c.classify_command("dir C:\\Users") == Risk.SAFE
+    def test_dir(self, windows_classifier):
+        assert windows_classifier.classify_command("dir C:\\Users") == Risk.SAFE
 
-    def test_get_process(self):
-        c = _make_windows_classifier()
-        assert c.classify_command("Get-Process") == Risk.SAFE
+    def test_get_process(self, windows_classifier):
+        assert windows_classifier.classify_command("Get-Process") == Risk.SAFE
 
-    def test_ipconfig(self):
-        c = _make_windows_classifier()
-        assert c.classify_command("ipconfig /all") == Risk.SAFE
+    def test_ipconfig(self, windows_classifier):
+        assert windows_classifier.classify_command("ipconfig /all") == Risk.SAFE
 
-    def test_systeminfo(self):
-        c = _make_windows_classifier()
-        assert c.classify_command("systeminfo") == Risk.SAFE
+    def test_systeminfo(self, windows_classifier):
+        assert windows_classifier.classify_command("systeminfo") == Risk.SAFE
@@ -3,19 +3,32 @@
 from __future__ import annotations
 
 import json
+import os
+import uuid
 from pathlib import Path
 
 import pytest
 
+import natshell.session as session_mod
 from natshell.session import AmbiguousSessionID, SessionManager
 
 # ── Fixtures ──────────────────────────────────────────────────────────
 
 
+@pytest.fixture(scope="module")
+def session_root(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """One temporary directory holding every test's session dir."""
+    return tmp_path_factory.mktemp("sess")
+
+
 @pytest.fixture()
-def session_dir(tmp_path: Path) -> Path:
-    """Return a temporary directory for session storage."""
-    return tmp_path / "sessions"
+def session_dir(session_root: Path) -> Path:
+    """Return a session directory unique to the test and not yet created.
+
+    A uuid-named child of the shared root costs no mkdir or teardown of its
+    own, unlike a per-test ``tmp_path``, and still starts out empty.
+    """
+    return session_root / uuid.uuid4().hex
 
 
 @pytest.fixture()
@@ -37,6 +50,30 @@ SAMPLE_ENGINE_INFO: dict = {
     "n_ctx": 32768,
 }
 
+# The sample session encoded once, with %-placeholders for the per-test ID
+# and name.  Tests that need a session on disk but are not testing save()
+# write it with _write_sample() instead of serializing it again each time.
+_SAMPLE_TEMPLATE: str = json.dumps(
+    {
+        "id": "%(sid)s",
+        "name": "%(name)s",
+        "created": "2025-01-01T00:00:00+00:00",
+        "updated": "2025-01-01T00:00:00+00:00",
+        "engine_info": SAMPLE_ENGINE_INFO,
+        "messages": SAMPLE_MESSAGES,
+    }
+)
+
+
+def _write_sample(session_dir: Path, sid: str | None = None, name: str = "sample") -> str:
+    """Write the pre-encoded sample session as *sid* and return the ID."""
+    sid = sid or uuid.uuid4().hex
+    session_dir.mkdir(parents=True, exist_ok=True)
+    (session_dir / f"{sid}.json").write_bytes(
+        (_SAMPLE_TEMPLATE % {"sid": sid, "name": name}).encode()
+    )
+    return sid
+
 
 # ── Save / Load roundtrip ────────────────────────────────────────────
 
@@ -80,7 +117,41 @@ class TestSaveLoad:
     def test_save_writes_valid_json(self, mgr: SessionManager, session_dir: Path) -> None:
         sid = mgr.save(SAMPLE_MESSAGES)
         path = session_dir / f"{sid}.json"
-        data = json.loads(path.read_text())
+        data = json.loads(path.read_bytes())
+        assert data["id"] == sid
+
+
+# ── Serialization ─────────────────────────────────────────────────────
+
+
+class TestSerialization:
+    @pytest.mark.parametrize("use_orjson", [True, False], ids=["orjson", "stdlib"])
+    def test_encoders_roundtrip(self, mgr: SessionManager, monkeypatch, use_orjson: bool) -> None:
+        """Both encoders write the same data; either decoder reads it back."""
+        if not use_orjson:
+            monkeypatch.setattr("natshell.session.orjson", None)
+        elif session_mod.orjson is None:
+            pytest.skip("orjson not installed")
+        messages = [
+            {"role": "user", "content": "héllo ✓"},
+            {"role": "tool", "content": "ok", "args": {1: "int key"}},
+        ]
+        sid = mgr.save(messages, engine_info={"big": 2**70})
+        data = mgr.load(sid)
+        assert data is not None
+        assert data["messages"][0]["content"] == "héllo ✓"
+        assert data["messages"][1]["args"] == {"1": "int key"}
+        assert data["engine_info"] == {"big": 2**70}
+
+    def test_loads_stdlib_nan(self, mgr: SessionManager, session_dir: Path) -> None:
+        """Files with the stdlib's NaN literal still load."""
+        sid = "ab" * 16
+        session_dir.mkdir(parents=True)
+        (session_dir / f"{sid}.json").write_bytes(
+            json.dumps({"id": sid, "messages": [], "engine_info": {"t": float("nan")}}).encode()
+        )
+        data = mgr.load(sid)
+        assert data is not None
         assert data["id"] == sid
 
 
@@ -98,46 +169,111 @@ class TestLoadEdgeCases:
         session_dir.mkdir(parents=True, exist_ok=True)
         sid = "00000000000000000000000000000bad"
         bad = session_dir / f"{sid}.json"
-        bad.write_text("not valid json {{{")
+        bad.write_bytes(b"not valid json {{{")
         assert mgr.load(sid) is None
 
 
 # ── list_sessions ─────────────────────────────────────────────────────
 
 
+@pytest.fixture(scope="class")
+def populated(tmp_path_factory) -> tuple[SessionManager, str, str]:
+    """Two saved sessions and one corrupt file, written once per class.
+
+    Returns the manager and the ids of the sessions saved first and second.
+    The tests only call ``list_sessions()``, which never writes.
+    """
+    session_dir = tmp_path_factory.mktemp("sessions")
+    mgr = SessionManager(session_dir=session_dir)
+    sid1 = mgr.save([{"role": "user", "content": "first"}], name="first")
+    sid2 = mgr.save(SAMPLE_MESSAGES, name="second")
+    (session_dir / "bad.json").write_bytes(b"corrupted")
+    return mgr, sid1, sid2
+
+
 class TestListSessions:
     def test_list_empty(self, mgr: SessionManager) -> None:
         assert mgr.list_sessions() == []
 
-    def test_list_returns_correct_info(self, mgr: SessionManager) -> None:
-        sid = mgr.save(SAMPLE_MESSAGES, name="my session")
-        sessions = mgr.list_sessions()
-        assert len(sessions) == 1
-        s = sessions[0]
-        assert s["id"] == sid
-        assert s["name"] == "my session"
+    def test_list_returns_correct_info(self, populated) -> None:
+        mgr, _, sid2 = populated
+        s = mgr.list_sessions()[0]
+        assert s["id"] == sid2
+        assert s["name"] == "second"
         assert s["message_count"] == len(SAMPLE_MESSAGES)
         assert "created" in s
         assert "updated" in s
 
-    def test_list_sorted_by_updated(self, mgr: SessionManager) -> None:
-        sid1 = mgr.save([{"role": "user", "content": "first"}], name="first")
-        sid2 = mgr.save([{"role": "user", "content": "second"}], name="second")
-        sessions = mgr.list_sessions()
+    def test_list_sorted_by_updated(self, populated) -> None:
+        mgr, sid1, sid2 = populated
         # Most recently updated first
-        assert sessions[0]["id"] == sid2
-        assert sessions[1]["id"] == sid1
+        assert [s["id"] for s in mgr.list_sessions()] == [sid2, sid1]
+
+    def test_list_skips_corrupt_files(self, populated) -> None:
+        mgr, _, _ = populated
+        assert [s["name"] for s in mgr.list_sessions()] == ["second", "first"]
 
-    def test_list_skips_corrupt_files(
+
+class TestSessionIndex:
+    """list_sessions reuses summaries from .index.json for unchanged files."""
+
+    def test_unchanged_file_not_reparsed(
+        self, mgr: SessionManager, session_dir: Path
+    ) -> None:
+        sid = mgr.save(SAMPLE_MESSAGES, name="indexed")
+        mgr.list_sessions()
+        # Same size and mtime: the index entry still matches, so the
+        # unparseable content is never read.
+        path = session_dir / f"{sid}.json"
+        st = path.stat()
+        path.write_bytes(b"x" * st.st_size)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        assert [s["name"] for s in mgr.list_sessions()] == ["indexed"]
+
+    def test_save_updates_index(self, mgr: SessionManager, session_dir: Path) -> None:
+        sid = mgr.save(SAMPLE_MESSAGES, name="fresh")
+        # No list_sessions() yet: save() itself left a matching index entry
+        path = session_dir / f"{sid}.json"
+        st = path.stat()
+        path.write_bytes(b"x" * st.st_size)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        [summary] = mgr.list_sessions()
+        assert summary["name"] == "fresh"
+        assert summary["message_count"] == len(SAMPLE_MESSAGES)
+
+    def test_rewritten_session_reparsed(self, mgr: SessionManager) -> None:
+        sid = mgr.save(SAMPLE_MESSAGES, name="before")
+        mgr.list_sessions()
+        mgr.save(SAMPLE_MESSAGES, name="after, with a longer name", session_id=sid)
+        assert [s["name"] for s in mgr.list_sessions()] == ["after, with a longer name"]
+
+    def test_deleted_session_dropped(self, mgr: SessionManager) -> None:
+        sid = mgr.save(SAMPLE_MESSAGES)
+        mgr.list_sessions()
+        mgr.delete(sid)
+        assert mgr.list_sessions() == []
+
+    def test_corrupt_index_ignored(
         self, mgr: SessionManager, session_dir: Path
     ) -> None:
         mgr.save(SAMPLE_MESSAGES, name="good")
-        session_dir.mkdir(parents=True, exist_ok=True)
-        bad = session_dir / "bad.json"
-        bad.write_text("corrupted")
-        sessions = mgr.list_sessions()
-        assert len(sessions) == 1
-        assert sessions[0]["name"] == "good"
+        (session_dir / ".index.json").write_bytes(b"not json")
+        assert [s["name"] for s in mgr.list_sessions()] == ["good"]
+        # ...and rebuilt on that listing
+        index = json.loads((session_dir / ".index.json").read_bytes())
+        assert len(index) == 1
+
+    def test_incomplete_index_summary_reparsed(
+        self, mgr: SessionManager, session_dir: Path
+    ) -> None:
+        sid = mgr.save(SAMPLE_MESSAGES, name="good")
+        index_path = session_dir / ".index.json"
+        index = json.loads(index_path.read_bytes())
+        index[f"{sid}.json"]["summary"] = {"id": "x"}
+        index_path.write_text(json.dumps(index))
+        [summary] = mgr.list_sessions()
+        assert summary["id"] == sid
+        assert summary["name"] == "good"
 
 
 # ── delete ────────────────────────────────────────────────────────────
@@ -145,7 +281,7 @@ class TestListSessions:
 
 class TestDelete:
     def test_delete_removes_file(self, mgr: SessionManager, session_dir: Path) -> None:
-        sid = mgr.save(SAMPLE_MESSAGES)
+        sid = _write_sample(session_dir)
         assert (session_dir / f"{sid}.json").exists()
         result = mgr.delete(sid)
         assert result is True
@@ -154,8 +290,8 @@ class TestDelete:
     def test_delete_nonexistent_returns_false(self, mgr: SessionManager) -> None:
         assert mgr.delete("00000000000000000000000000000000") is False
 
-    def test_delete_then_load_returns_none(self, mgr: SessionManager) -> None:
-        sid = mgr.save(SAMPLE_MESSAGES)
+    def test_delete_then_load_returns_none(self, mgr: SessionManager, session_dir: Path) -> None:
+        sid = _write_sample(session_dir)
         mgr.delete(sid)
         assert mgr.load(sid) is None
 
@@ -213,6 +349,13 @@ class TestSessionSecurity:
         with pytest.raises(ValueError, match="Invalid session ID"):
             mgr.save(SAMPLE_MESSAGES, session_id="not-a-valid-session-id!!")
 
+    def test_trailing_newline_rejected(self, mgr: SessionManager) -> None:
+        # "$" would also match before a final "\n"; the whole ID must be hex
+        with pytest.raises(ValueError, match="Invalid session ID"):
+            mgr.delete("abcdef0123456789abcdef0123456789\n")
+        with pytest.raises(ValueError, match="Invalid session ID"):
+            mgr.load("abcd\n")
+
     def test_valid_uuid_hex_accepted(self, mgr: SessionManager) -> None:
         sid = mgr.save(SAMPLE_MESSAGES, session_id="abcdef0123456789abcdef0123456789")
         assert sid == "abcdef0123456789abcdef0123456789"
@@ -224,6 +367,23 @@ class TestSessionSecurity:
         with pytest.raises(RuntimeError, match="Session too large"):
             small_mgr.save(big_messages)
 
+    def test_oversized_session_rejected_before_serializing(
+        self, session_dir: Path, monkeypatch
+    ) -> None:
+        def _fail(data):
+            raise AssertionError("serialized an oversized session")
+
+        monkeypatch.setattr("natshell.session._dumps", _fail)
+        small_mgr = SessionManager(session_dir=session_dir, max_size=100)
+        with pytest.raises(RuntimeError, match="Session too large"):
+            small_mgr.save([{"role": "user", "content": "x" * 200}])
+
+    def test_encoded_size_still_checked(self, session_dir: Path) -> None:
+        # The text fits; the JSON around it does not
+        small_mgr = SessionManager(session_dir=session_dir, max_size=100)
+        with pytest.raises(RuntimeError, match="Session too large"):
+            small_mgr.save([{"role": "user", "content": "x" * 90}])
+
     def test_directory_permissions_are_0o700(
         self, mgr: SessionManager, session_dir: Path
     ) -> None:
@@ -236,73 +396,75 @@ class TestSessionSecurity:
 
 
 class TestShortPrefixLoad:
-    def test_load_by_12_char_prefix(self, mgr: SessionManager) -> None:
+    def test_load_by_12_char_prefix(self, mgr: SessionManager, session_dir: Path) -> None:
         """The 12-char prefix displayed by /sessions should resolve to the full ID."""
-        sid = mgr.save(SAMPLE_MESSAGES, name="prefix test")
+        sid = _write_sample(session_dir, name="prefix test")
         data = mgr.load(sid[:12])
         assert data is not None
         assert data["id"] == sid
         assert data["name"] == "prefix test"
 
-    def test_load_by_minimum_prefix(self, mgr: SessionManager) -> None:
+    def test_load_by_minimum_prefix(self, mgr: SessionManager, session_dir: Path) -> None:
         """A 4-char prefix is the minimum accepted length."""
-        sid = mgr.save(SAMPLE_MESSAGES, session_id="abcd" + "0" * 28)
+        sid = _write_sample(session_dir, "abcd" + "0" * 28)
         data = mgr.load("abcd")
         assert data is not None
         assert data["id"] == sid
 
-    def test_load_too_short_prefix_raises(self, mgr: SessionManager) -> None:
+    def test_load_too_short_prefix_raises(self, mgr: SessionManager, session_dir: Path) -> None:
         """Prefixes shorter than 4 chars are rejected as invalid."""
-        mgr.save(SAMPLE_MESSAGES)
+        _write_sample(session_dir)
         with pytest.raises(ValueError, match="Invalid session ID"):
             mgr.load("abc")
 
-    def test_load_nonhex_prefix_raises(self, mgr: SessionManager) -> None:
+    def test_load_nonhex_prefix_raises(self, mgr: SessionManager, session_dir: Path) -> None:
         """Non-hex characters in a prefix are rejected."""
-        mgr.save(SAMPLE_MESSAGES)
+        _write_sample(session_dir)
         with pytest.raises(ValueError, match="Invalid session ID"):
             mgr.load("xyz1")
 
-    def test_load_prefix_no_match_returns_none(self, mgr: SessionManager) -> None:
+    def test_load_prefix_no_match_returns_none(
+        self, mgr: SessionManager, session_dir: Path
+    ) -> None:
         """Valid prefix that matches nothing on disk returns None, not a crash."""
-        mgr.save(SAMPLE_MESSAGES)
+        _write_sample(session_dir)
         assert mgr.load("ffff") is None
 
-    def test_load_ambiguous_prefix_raises(self, mgr: SessionManager) -> None:
+    def test_load_ambiguous_prefix_raises(self, mgr: SessionManager, session_dir: Path) -> None:
         """When a prefix matches multiple sessions, raise AmbiguousSessionID."""
-        sid1 = mgr.save(SAMPLE_MESSAGES, session_id="abcd1234" + "0" * 24)
-        sid2 = mgr.save(SAMPLE_MESSAGES, session_id="abcd5678" + "0" * 24)
+        sid1 = _write_sample(session_dir, "abcd1234" + "0" * 24)
+        sid2 = _write_sample(session_dir, "abcd5678" + "0" * 24)
         with pytest.raises(AmbiguousSessionID) as excinfo:
             mgr.load("abcd")
         assert set(excinfo.value.candidates) == {sid1, sid2}
         assert excinfo.value.prefix == "abcd"
 
     def test_ambiguous_error_is_valueerror_subclass(
-        self, mgr: SessionManager
+        self, mgr: SessionManager, session_dir: Path
     ) -> None:
         """AmbiguousSessionID inherits from ValueError for backwards compat."""
-        mgr.save(SAMPLE_MESSAGES, session_id="abcd1234" + "0" * 24)
-        mgr.save(SAMPLE_MESSAGES, session_id="abcd5678" + "0" * 24)
+        _write_sample(session_dir, "abcd1234" + "0" * 24)
+        _write_sample(session_dir, "abcd5678" + "0" * 24)
         with pytest.raises(ValueError):
             mgr.load("abcd")
 
-    def test_load_full_id_does_not_scan(self, mgr: SessionManager) -> None:
+    def test_load_full_id_does_not_scan(self, mgr: SessionManager, session_dir: Path) -> None:
         """Full 32-hex IDs take the fast path and skip prefix resolution.
 
         A valid-format ID with no matching file should return None, not
         attempt to glob-match the directory.
         """
-        mgr.save(SAMPLE_MESSAGES)
+        _write_sample(session_dir)
         assert mgr.load("0" * 32) is None
 
     def test_load_ignores_non_session_files_in_dir(
         self, mgr: SessionManager, session_dir: Path
     ) -> None:
         """A stray file named `abcd_notes.json` must not satisfy an `abcd` lookup."""
-        sid = mgr.save(SAMPLE_MESSAGES, session_id="abcd" + "0" * 28)
+        sid = _write_sample(session_dir, "abcd" + "0" * 28)
         # Drop a stray file with a matching prefix but non-hex stem
         stray = session_dir / "abcd_notes.json"
-        stray.write_text('{"not": "a session"}')
+        stray.write_bytes(b'{"not": "a session"}')
         data = mgr.load("abcd")
         assert data is not None
         assert data["id"] == sid
@@ -312,7 +474,7 @@ class TestShortPrefixLoad:
         with pytest.raises(ValueError, match="Invalid session ID"):
             mgr.save(SAMPLE_MESSAGES, session_id="abcd")
 
-    def test_delete_still_requires_full_id(self, mgr: SessionManager) -> None:
-        mgr.save(SAMPLE_MESSAGES, session_id="abcd" + "0" * 28)
+    def test_delete_still_requires_full_id(self, mgr: SessionManager, session_dir: Path) -> None:
+        _write_sample(session_dir, "abcd" + "0" * 28)
         with pytest.raises(ValueError, match="Invalid session ID"):
             mgr.delete("abcd")
@@ -2,25 +2,42 @@
 
 from __future__ import annotations
 
-from unittest.mock import AsyncMock
+from dataclasses import replace
+from unittest.mock import MagicMock
+
+import pytest
 
 from natshell.agent.context import SystemContext
 from natshell.agent.loop import AgentLoop
-from natshell.app import SLASH_COMMANDS
+from natshell.app import SLASH_COMMANDS, match_slash_commands
 from natshell.config import AgentConfig, SafetyConfig
+from natshell.inference.engine import EngineInfo
 from natshell.safety.classifier import Risk, SafetyClassifier
 from natshell.tools.execute_shell import execute_shell
-from natshell.tools.registry import create_default_registry
+from natshell.tools.registry import ToolResult, create_default_registry
+
+# Only read by SafetyClassifier, so every agent can share it.
+_SAFETY_CONFIG = SafetyConfig(
+    mode="confirm",
+    always_confirm=[r"^rm\s", r"^sudo\s"],
+    blocked=[r"^rm\s+-[rR]f\s+/\s*$"],
+)
 
 
 def _make_agent(safety_mode: str = "confirm") -> AgentLoop:
-    """Create an agent with a mocked engine for slash command tests."""
-    engine = AsyncMock()
+    """Create an agent with a mocked engine for slash command tests.
+
+    None of these tests await the engine, so a plain MagicMock stands in;
+    an AsyncMock would also turn the synchronous engine_info() call into a
+    coroutine that is never awaited.
+    """
+    engine = MagicMock()
+    engine.engine_info.return_value = EngineInfo(engine_type="mock")
     tools = create_default_registry()
-    safety_config = SafetyConfig(
-        mode=safety_mode,
-        always_confirm=[r"^rm\s", r"^sudo\s"],
-        blocked=[r"^rm\s+-[rR]f\s+/\s*$"],
+    safety_config = (
+        _SAFETY_CONFIG
+        if safety_mode == _SAFETY_CONFIG.mode
+        else replace(_SAFETY_CONFIG, mode=safety_mode)
     )
     safety = SafetyClassifier(safety_config)
     agent_config = AgentConfig(max_steps=15, temperature=0.3, max_tokens=2048)
@@ -36,41 +53,38 @@ def _make_agent(safety_mode: str = "confirm") -> AgentLoop:
     return agent
 
 
-# ─── Dispatch routing ────────────────────────────────────────────────────────
-
-
-class TestSlashDispatch:
-    """Test that slash commands are correctly routed."""
-
-    def test_help_recognized(self):
-        parts = "/help".split(maxsplit=1)
-        assert parts[0].lower() == "/help"
+@pytest.fixture(scope="module")
+def cached_agent() -> AgentLoop:
+    """A confirm-mode agent shared by the tests that only read from it.
 
-    def test_clear_recognized(self):
-        parts = "/clear".split(maxsplit=1)
-        assert parts[0].lower() == "/clear"
+    Tests that append to ``messages`` or compact history build their own
+    with ``_make_agent()``.
+    """
+    return _make_agent()
 
-    def test_cmd_with_args(self):
-        parts = "/cmd echo hello".split(maxsplit=1)
-        assert parts[0].lower() == "/cmd"
-        assert parts[1] == "echo hello"
 
-    def test_cmd_no_args(self):
-        parts = "/cmd".split(maxsplit=1)
-        assert parts[0].lower() == "/cmd"
-        assert len(parts) == 1
+# ─── Dispatch routing ────────────────────────────────────────────────────────
 
-    def test_model_recognized(self):
-        parts = "/model".split(maxsplit=1)
-        assert parts[0].lower() == "/model"
 
-    def test_history_recognized(self):
-        parts = "/history".split(maxsplit=1)
-        assert parts[0].lower() == "/history"
+class TestSlashDispatch:
+    """Test that slash commands are correctly routed."""
 
-    def test_compact_recognized(self):
-        parts = "/compact".split(maxsplit=1)
-        assert parts[0].lower() == "/compact"
+    @pytest.mark.parametrize(
+        ("text", "expected", "rest"),
+        [
+            ("/help", "/help", None),
+            ("/clear", "/clear", None),
+            ("/cmd echo hello", "/cmd", "echo hello"),
+            ("/cmd", "/cmd", None),
+            ("/model", "/model", None),
+            ("/history", "/history", None),
+            ("/compact", "/compact", None),
+        ],
+    )
+    def test_dispatch(self, text, expected, rest):
+        parts = text.split(maxsplit=1)
+        assert parts[0].lower() == expected
+        assert (parts[1] if len(parts) > 1 else None) == rest
 
     def test_unknown_command(self):
         parts = "/foo".split(maxsplit=1)
@@ -108,23 +122,23 @@ class TestCmdExecution:
 class TestCmdSafety:
     """Test that /cmd applies safety classification."""
 
-    def test_safe_command(self):
-        agent = _make_agent()
+    def test_safe_command(self, cached_agent):
+        agent = cached_agent
         risk = agent.safety.classify_command("echo hello")
         assert risk == Risk.SAFE
 
-    def test_blocked_command(self):
-        agent = _make_agent()
+    def test_blocked_command(self, cached_agent):
+        agent = cached_agent
         risk = agent.safety.classify_command("rm -rf /")
         assert risk == Risk.BLOCKED
 
-    def test_confirm_command(self):
-        agent = _make_agent()
+    def test_confirm_command(self, cached_agent):
+        agent = cached_agent
         risk = agent.safety.classify_command("sudo reboot")
         assert risk == Risk.CONFIRM
 
-    def test_rm_requires_confirm(self):
-        agent = _make_agent()
+    def test_rm_requires_confirm(self, cached_agent):
+        agent = cached_agent
         risk = agent.safety.classify_command("rm file.txt")
         assert risk == Risk.CONFIRM
 
@@ -135,11 +149,12 @@ class TestCmdSafety:
 class TestHistoryInjection:
     """Test that /cmd results are injected into agent messages as user role."""
 
-    async def test_injection_after_cmd(self):
+    def test_injection_after_cmd(self):
         agent = _make_agent()
         initial_count = len(agent.messages)
 
-        result = await execute_shell("echo injected")
+        # The shell run itself is covered by TestCmdExecution.
+        result = ToolResult(output="injected\n", exit_code=0)
 
         # Simulate what _handle_cmd does
         output = result.output or result.error
@@ -160,9 +175,9 @@ class TestHistoryInjection:
         assert "echo injected" in injected["content"]
         assert "injected" in injected["content"]
 
-    async def test_injection_preserves_exit_code(self):
+    def test_injection_preserves_exit_code(self):
         agent = _make_agent()
-        result = await execute_shell("false")
+        result = ToolResult(exit_code=1)
         agent.messages.append(
             {
                 "role": "user",
@@ -181,8 +196,8 @@ class TestHistoryInjection:
 
 
 class TestHistoryInfo:
-    def test_message_count(self):
-        agent = _make_agent()
+    def test_message_count(self, cached_agent):
+        agent = cached_agent
         # After initialize: 1 system message
         assert len(agent.messages) == 1
         assert agent.messages[0]["role"] == "system"
@@ -195,25 +210,29 @@ class TestAutocomplete:
     """Test that SLASH_COMMANDS filtering works for autocomplete."""
 
     def _filter(self, text: str) -> list[str]:
-        """Replicate the filtering logic from on_input_changed."""
-        return [cmd for cmd, desc in SLASH_COMMANDS if cmd.startswith(text.lower())]
+        """The commands on_input_changed suggests for *text*."""
+        return [cmd for cmd, _ in match_slash_commands(text)]
+
+    @pytest.mark.parametrize("text", ["", "/", "/m", "/MO", "/model ", "/profile", "/q", "/z"])
+    def test_matches_linear_filter(self, text):
+        expected = [(c, d) for c, d in SLASH_COMMANDS if c.startswith(text.lower())]
+        assert match_slash_commands(text) == expected
 
     def test_slash_alone_matches_all(self):
         matches = self._filter("/")
         assert len(matches) == len(SLASH_COMMANDS)
 
-    def test_slash_h_matches_help_and_history(self):
-        matches = self._filter("/h")
-        assert "/help" in matches
-        assert "/history" in matches
-        assert len(matches) == 2
-
-    def test_slash_c_matches_clear_cmd_compact(self):
-        matches = self._filter("/c")
-        assert "/clear" in matches
-        assert "/cmd" in matches
-        assert "/compact" in matches
-        assert len(matches) == 3
+    @pytest.mark.parametrize(
+        ("text", "expected"),
+        [
+            ("/h", ["/help", "/history"]),
+            ("/c", ["/clear", "/cmd", "/compact"]),
+            ("/help", ["/help"]),
+            ("/z", []),
+        ],
+    )
+    def test_filter_matches_exactly(self, text, expected):
+        assert sorted(self._filter(text)) == expected
 
     def test_slash_m_matches_model_and_memory(self):
         matches = self._filter("/m")
@@ -221,14 +240,6 @@ class TestAutocomplete:
         assert "/memory" in matches
         assert all(m.startswith("/m") for m in matches)
 
-    def test_full_command_matches_exactly(self):
-        matches = self._filter("/help")
-        assert matches == ["/help"]
-
-    def test_no_match(self):
-        matches = self._filter("/z")
-        assert matches == []
-
     def test_space_in_input_hides_suggestions(self):
         """Once a space is typed (e.g. '/cmd ls'), suggestions should hide."""
         text = "/cmd ls"
@@ -258,17 +269,17 @@ class TestSkipPermissionsFlag:
         app = NatShellApp(agent=agent, skip_permissions=True)
         assert app._skip_permissions is True
 
-    def test_blocked_still_blocked_with_skip_permissions(self):
+    def test_blocked_still_blocked_with_skip_permissions(self, cached_agent):
         """BLOCKED commands are unaffected by skip_permissions — they are
         checked on a separate code path in the agent loop."""
-        agent = _make_agent()
+        agent = cached_agent
         risk = agent.safety.classify_command("rm -rf /")
         assert risk == Risk.BLOCKED
 
-    def test_confirm_command_still_classifies(self):
+    def test_confirm_command_still_classifies(self, cached_agent):
         """The safety classifier still returns CONFIRM for risky commands;
         skip_permissions only affects whether the callback is invoked."""
-        agent = _make_agent()
+        agent = cached_agent
         risk = agent.safety.classify_command("sudo reboot")
         assert risk == Risk.CONFIRM
 
@@ -322,6 +333,16 @@ class TestPlanPrompt:
         prompt = _build_plan_prompt("anything", "dir/")
         assert "preamble" in prompt.lower()
 
+    def test_instructions_built_once_per_tier(self):
+        from natshell.agent.plan_executor import _build_plan_prompt, _plan_prompt_instructions
+
+        _build_plan_prompt("first", "a/", n_ctx=8192)
+        hits = _plan_prompt_instructions.cache_info().hits
+        prompt = _build_plan_prompt("second", "b/", n_ctx=8192)
+        assert _plan_prompt_instructions.cache_info().hits == hits + 1
+        assert "second" in prompt
+        assert "b/" in prompt
+
 
 # ─── /compact history ──────────────────────────────────────────────────────
 
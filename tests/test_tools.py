@@ -2,12 +2,14 @@
 
 from __future__ import annotations
 
-import os
-import tempfile
+import subprocess
 from pathlib import Path
+from unittest.mock import MagicMock
 
 import pytest
 
+import natshell.tools.execute_shell as shell_mod
+from natshell.tools.edit_file import reset_limits as _reset_edit_limits
 from natshell.tools.execute_shell import (
     _SENSITIVE_ENV_VARS,
     _SENSITIVE_SUFFIXES,
@@ -21,55 +23,88 @@ from natshell.tools.execute_shell import (
     needs_sudo_password,
     set_sudo_password,
 )
+from natshell.tools.execute_shell import reset_limits as _reset_shell_limits
 from natshell.tools.list_directory import list_directory
 from natshell.tools.read_file import read_file
-from natshell.tools.registry import ToolResult, create_default_registry
+from natshell.tools.read_file import reset_limits as _reset_read_limits
+from natshell.tools.registry import ToolDefinition, ToolResult, create_default_registry
 from natshell.tools.search_files import search_files
 from natshell.tools.write_file import write_file
 
 
-@pytest.fixture(autouse=True)
-def _reset_tool_limits():
+@pytest.fixture
+def reset_tool_limits():
+    """Restore the default tool output limits after the test."""
     yield
-    from natshell.tools.edit_file import reset_limits as reset_edit
-    from natshell.tools.execute_shell import reset_limits as reset_shell
-    from natshell.tools.read_file import reset_limits as reset_read
+    _reset_edit_limits()
+    _reset_shell_limits()
+    _reset_read_limits()
 
-    reset_edit()
-    reset_shell()
-    reset_read()
+
+def _populate(directory: Path, files: dict[str, str | None]) -> None:
+    """Create *files* under *directory*; a ``None`` content means an empty file."""
+    for name, content in files.items():
+        path = directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if content is None:
+            path.touch()
+        else:
+            path.write_text(content)
 
 
 # ─── execute_shell ───────────────────────────────────────────────────────────
 
 
+@pytest.fixture
+def fake_run(monkeypatch) -> MagicMock:
+    """Stand in for subprocess.run, so execute_shell spawns no shell.
+
+    Returns an empty successful result unless a test sets ``return_value``;
+    ``call_args`` holds what execute_shell passed.
+    """
+    run = MagicMock(return_value=subprocess.CompletedProcess([], 0, "", ""))
+    monkeypatch.setattr(shell_mod.subprocess, "run", run)
+    return run
+
+
+@pytest.mark.usefixtures("reset_tool_limits")
 class TestExecuteShell:
     async def test_simple_echo(self):
         result = await execute_shell("echo hello")
         assert result.exit_code == 0
         assert "hello" in result.output
 
-    async def test_exit_code(self):
+    async def test_exit_code(self, fake_run):
+        fake_run.return_value = subprocess.CompletedProcess([], 1, "", "")
         result = await execute_shell("false")
-        assert result.exit_code != 0
+        assert result.exit_code == 1
 
-    async def test_stderr(self):
+    async def test_stderr(self, fake_run):
+        fake_run.return_value = subprocess.CompletedProcess([], 0, "", "err\n")
         result = await execute_shell("echo err >&2")
         assert "err" in result.error
 
-    async def test_timeout(self):
-        result = await execute_shell("sleep 10", timeout=1)
+    async def test_timeout(self, monkeypatch):
+        # Timeouts are whole seconds with a floor of 1, so a real sleep would
+        # hold the test for a full second.  Have subprocess.run time out
+        # straight away instead, checking the clamped timeout it was given.
+        def _timed_out(cmd, *, timeout, **kwargs):
+            assert timeout == 1
+            raise subprocess.TimeoutExpired(cmd, timeout)
+
+        monkeypatch.setattr(shell_mod.subprocess, "run", _timed_out)
+        result = await execute_shell("sleep 10", timeout=0)
         assert result.exit_code == 124
         assert "timed out" in result.error.lower()
 
-    async def test_timeout_clamped_to_max(self):
-        # Should not raise; timeout gets clamped to 300
+    async def test_timeout_clamped_to_max(self, fake_run):
         result = await execute_shell("echo ok", timeout=9999)
         assert result.exit_code == 0
+        assert fake_run.call_args.kwargs["timeout"] == 300
 
-    async def test_environment_lc_all(self):
-        result = await execute_shell("echo $LC_ALL")
-        assert result.output.strip() == "C"
+    async def test_environment_lc_all(self, fake_run):
+        await execute_shell("echo $LC_ALL")
+        assert fake_run.call_args.kwargs["env"]["LC_ALL"] == "C"
 
     async def test_multiline_output(self):
         result = await execute_shell("seq 1 5")
@@ -77,8 +112,9 @@ class TestExecuteShell:
         assert len(lines) == 5
 
     async def test_output_truncation(self):
-        # Generate large output
-        result = await execute_shell("seq 1 100000")
+        # Every seq line is at least two characters, so this is about twice
+        # the limit: enough to truncate without piping hundreds of KB.
+        result = await execute_shell(f"seq 1 {shell_mod._max_output_chars}")
         assert result.truncated
 
     async def test_truncate_function_short(self):
@@ -98,23 +134,19 @@ class TestExecuteShell:
 
 
 class TestAutoTimeout:
-    def test_nmap(self):
-        assert _min_timeout_for("nmap -sn 192.168.1.0/24") == 120
-
-    def test_apt_install(self):
-        assert _min_timeout_for("apt install foo") == 300
-
-    def test_make(self):
-        assert _min_timeout_for("make -j4") == 300
-
-    def test_echo_no_match(self):
-        assert _min_timeout_for("echo hello") == 0
-
-    def test_find_root(self):
-        assert _min_timeout_for("find / -name foo") == 120
-
-    def test_ls_no_match(self):
-        assert _min_timeout_for("ls -la") == 0
+    @pytest.mark.parametrize(
+        ("command", "expected"),
+        [
+            ("nmap -sn 192.168.1.0/24", 120),
+            ("apt install foo", 300),
+            ("make -j4", 300),
+            ("echo hello", 0),
+            ("find / -name foo", 120),
+            ("ls -la", 0),
+        ],
+    )
+    def test_min_timeout_for(self, command, expected):
+        assert _min_timeout_for(command) == expected
 
 
 # ─── sudo password injection ─────────────────────────────────────────────────
@@ -291,37 +323,29 @@ class TestSudoNeedsPassword:
 # ─── read_file ───────────────────────────────────────────────────────────────
 
 
+@pytest.mark.usefixtures("reset_tool_limits")
 class TestReadFile:
-    async def test_read_existing_file(self):
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
-            f.write("line1\nline2\nline3\n")
-            path = f.name
-        try:
-            result = await read_file(path)
-            assert result.exit_code == 0
-            assert "line1" in result.output
-            assert "line2" in result.output
-        finally:
-            os.unlink(path)
+    async def test_read_existing_file(self, tmp_path):
+        path = tmp_path / "x.txt"
+        path.write_text("line1\nline2\nline3\n")
+        result = await read_file(str(path))
+        assert result.exit_code == 0
+        assert "line1" in result.output
+        assert "line2" in result.output
 
     async def test_read_missing_file(self):
         result = await read_file("/nonexistent/file.txt")
         assert result.exit_code == 1
         assert "not found" in result.error.lower()
 
-    async def test_read_truncation(self):
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
-            for i in range(500):
-                f.write(f"line {i}\n")
-            path = f.name
-        try:
-            result = await read_file(path, max_lines=10)
-            assert result.truncated
-            assert "FILE TRUNCATED" in result.output
-            assert "offset=11" in result.output
-            assert "ALWAYS read the entire file before editing" in result.output
-        finally:
-            os.unlink(path)
+    async def test_read_truncation(self, tmp_path):
+        path = tmp_path / "x.txt"
+        path.write_text("".join(f"line {i}\n" for i in range(500)))
+        result = await read_file(str(path), max_lines=10)
+        assert result.truncated
+        assert "FILE TRUNCATED" in result.output
+        assert "offset=11" in result.output
+        assert "ALWAYS read the entire file before editing" in result.output
 
     async def test_read_directory_fails(self):
         result = await read_file("/tmp")
@@ -333,41 +357,31 @@ class TestReadFile:
 
 
 class TestWriteFile:
-    async def test_write_new_file(self):
-        with tempfile.TemporaryDirectory() as d:
-            path = os.path.join(d, "test.txt")
-            result = await write_file(path, "hello world")
-            assert result.exit_code == 0
-            assert Path(path).read_text() == "hello world"
+    async def test_write_new_file(self, tmp_path):
+        path = tmp_path / "test.txt"
+        result = await write_file(str(path), "hello world")
+        assert result.exit_code == 0
+        assert path.read_text() == "hello world"
 
-    async def test_write_creates_directories(self):
-        with tempfile.TemporaryDirectory() as d:
-            path = os.path.join(d, "sub", "dir", "test.txt")
-            result = await write_file(path, "nested")
-            assert result.exit_code == 0
-            assert Path(path).read_text() == "nested"
+    async def test_write_creates_directories(self, tmp_path):
+        path = tmp_path / "sub" / "dir" / "test.txt"
+        result = await write_file(str(path), "nested")
+        assert result.exit_code == 0
+        assert path.read_text() == "nested"
 
-    async def test_write_overwrite(self):
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
-            f.write("old content")
-            path = f.name
-        try:
-            result = await write_file(path, "new content", mode="overwrite")
-            assert result.exit_code == 0
-            assert Path(path).read_text() == "new content"
-        finally:
-            os.unlink(path)
+    async def test_write_overwrite(self, tmp_path):
+        path = tmp_path / "x.txt"
+        path.write_text("old content")
+        result = await write_file(str(path), "new content", mode="overwrite")
+        assert result.exit_code == 0
+        assert path.read_text() == "new content"
 
-    async def test_write_append(self):
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
-            f.write("first")
-            path = f.name
-        try:
-            result = await write_file(path, " second", mode="append")
-            assert result.exit_code == 0
-            assert Path(path).read_text() == "first second"
-        finally:
-            os.unlink(path)
+    async def test_write_append(self, tmp_path):
+        path = tmp_path / "x.txt"
+        path.write_text("first")
+        result = await write_file(str(path), " second", mode="append")
+        assert result.exit_code == 0
+        assert path.read_text() == "first second"
 
 
 # ─── list_directory ──────────────────────────────────────────────────────────
@@ -383,60 +397,66 @@ class TestListDirectory:
         result = await list_directory("/nonexistent/dir")
         assert result.exit_code == 1
 
-    async def test_list_hidden(self):
-        with tempfile.TemporaryDirectory() as d:
-            Path(d, ".hidden").touch()
-            Path(d, "visible").touch()
+    async def test_list_hidden(self, tmp_path):
+        _populate(tmp_path, {".hidden": None, "visible": None})
 
-            result_no_hidden = await list_directory(d, show_hidden=False)
-            assert ".hidden" not in result_no_hidden.output
-            assert "visible" in result_no_hidden.output
+        result_no_hidden = await list_directory(str(tmp_path), show_hidden=False)
+        assert ".hidden" not in result_no_hidden.output
+        assert "visible" in result_no_hidden.output
 
-            result_hidden = await list_directory(d, show_hidden=True)
-            assert ".hidden" in result_hidden.output
+        result_hidden = await list_directory(str(tmp_path), show_hidden=True)
+        assert ".hidden" in result_hidden.output
 
-    async def test_list_shows_dirs_and_files(self):
-        with tempfile.TemporaryDirectory() as d:
-            Path(d, "subdir").mkdir()
-            Path(d, "file.txt").write_text("test")
+    async def test_list_shows_dirs_and_files(self, tmp_path):
+        (tmp_path / "subdir").mkdir()
+        (tmp_path / "file.txt").write_text("test")
 
-            result = await list_directory(d)
-            assert "subdir" in result.output
-            assert "file.txt" in result.output
+        result = await list_directory(str(tmp_path))
+        assert "subdir" in result.output
+        assert "file.txt" in result.output
 
 
 # ─── search_files ────────────────────────────────────────────────────────────
 
 
+@pytest.fixture(scope="class")
+def search_root(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    return tmp_path_factory.mktemp("search")
+
+
+@pytest.fixture
+def search_dir(search_root: Path, request: pytest.FixtureRequest) -> Path:
+    """An empty directory for one test, inside the class-wide search root."""
+    d = search_root / request.node.name
+    d.mkdir()
+    return d
+
+
 class TestSearchFiles:
-    async def test_text_search(self):
-        with tempfile.TemporaryDirectory() as d:
-            Path(d, "test.txt").write_text("hello world\nfoo bar\n")
-            result = await search_files("hello", path=d)
-            assert result.exit_code == 0
-            assert "hello" in result.output
+    async def test_text_search(self, search_dir):
+        (search_dir / "test.txt").write_text("hello world\nfoo bar\n")
+        result = await search_files("hello", path=str(search_dir))
+        assert result.exit_code == 0
+        assert "hello" in result.output
 
-    async def test_no_match(self):
-        with tempfile.TemporaryDirectory() as d:
-            Path(d, "test.txt").write_text("nothing here\n")
-            result = await search_files("zzzznotfound", path=d)
-            assert "no matches" in result.output.lower()
+    async def test_no_match(self, search_dir):
+        (search_dir / "test.txt").write_text("nothing here\n")
+        result = await search_files("zzzznotfound", path=str(search_dir))
+        assert "no matches" in result.output.lower()
 
-    async def test_file_pattern_filter(self):
-        with tempfile.TemporaryDirectory() as d:
-            Path(d, "code.py").write_text("import os\n")
-            Path(d, "readme.md").write_text("import os\n")
-            result = await search_files("import", path=d, file_pattern="*.py")
-            assert "code.py" in result.output
-            assert "readme.md" not in result.output
+    async def test_file_pattern_filter(self, search_dir):
+        _populate(search_dir, {"code.py": "import os\n", "readme.md": "import os\n"})
+        result = await search_files("import", path=str(search_dir), file_pattern="*.py")
+        assert "code.py" in result.output
+        assert "readme.md" not in result.output
 
 
 # ─── registry ────────────────────────────────────────────────────────────────
 
 
 class TestRegistry:
-    def test_create_default_registry(self):
-        registry = create_default_registry()
+    def test_create_default_registry(self, default_registry):
+        registry = default_registry
         assert "execute_shell" in registry.tool_names
         assert "read_file" in registry.tool_names
         assert "write_file" in registry.tool_names
@@ -447,8 +467,21 @@ class TestRegistry:
         assert "git_tool" in registry.tool_names
         assert "natshell_help" in registry.tool_names
 
-    def test_get_tool_schemas(self):
-        registry = create_default_registry()
+    def test_default_registries_are_independent(self):
+        """Built-in tools are resolved once, but each call gets its own registry."""
+        first = create_default_registry()
+        first.limits.max_output_chars = 1
+        first.register(
+            ToolDefinition(name="extra", description="", parameters={}),
+            execute_shell,
+        )
+        second = create_default_registry()
+        assert second is not first
+        assert "extra" not in second.tool_names
+        assert second.limits.max_output_chars != 1
+
+    def test_get_tool_schemas(self, default_registry):
+        registry = default_registry
         schemas = registry.get_tool_schemas()
         assert len(schemas) == 13  # 12 original + skill tool
         for schema in schemas:
@@ -457,27 +490,27 @@ class TestRegistry:
             assert "name" in schema["function"]
             assert "parameters" in schema["function"]
 
-    async def test_execute_unknown_tool(self):
-        registry = create_default_registry()
+    async def test_execute_unknown_tool(self, default_registry):
+        registry = default_registry
         result = await registry.execute("nonexistent_tool", {})
         assert result.exit_code == 1
         assert "unknown tool" in result.error.lower()
 
-    async def test_execute_via_registry(self):
-        registry = create_default_registry()
+    async def test_execute_via_registry(self, default_registry):
+        registry = default_registry
         result = await registry.execute("execute_shell", {"command": "echo registry_test"})
         assert result.exit_code == 0
         assert "registry_test" in result.output
 
-    async def test_remap_wrong_arg_name(self):
+    async def test_remap_wrong_arg_name(self, default_registry):
         """LLM sends wrong arg name (e.g. 'param' instead of 'topic')."""
-        registry = create_default_registry()
+        registry = default_registry
         # natshell_help expects {"topic": "..."}, but send {"param": "..."}
         result = await registry.execute("natshell_help", {"param": "commands"})
         assert result.exit_code == 0
         assert "slash commands" in result.output.lower() or "/help" in result.output
 
-    async def test_remap_wrong_arg_name_multiple_params(self):
+    async def test_remap_wrong_arg_name_multiple_params(self, default_registry):
         """A single wrong arg name is remapped onto the tool's sole
         required parameter.
 
@@ -485,14 +518,14 @@ class TestRegistry:
         optional ones.  Sending ``{"wrong": "value"}`` matches the
         required-count remap strategy and lands on ``pattern="value"``.
         """
-        registry = create_default_registry()
+        registry = default_registry
         result = await registry.execute("search_files", {"wrong": "value"})
         # The remap succeeded and search_files ran.  We don't assert
         # on specific search output — we just want to confirm the
         # registry didn't blow up or return a kwarg-mismatch error.
         assert "wrong arguments" not in result.error
 
-    async def test_remap_required_arg_count(self):
+    async def test_remap_required_arg_count(self, default_registry):
         """Remap handles the common case: model sends all *required* args
         with one wrong name, and omits optional ones.
 
@@ -500,7 +533,7 @@ class TestRegistry:
         (Qwen3-Coder confabulates ``command`` from its shell tool-call
         training data.  ``timeout`` is omitted because it's optional.)
         """
-        registry = create_default_registry()
+        registry = default_registry
         result = await registry.execute(
             "run_code",
             {"language": "bash", "command": "echo remapped_ok"},
@@ -508,12 +541,12 @@ class TestRegistry:
         assert result.exit_code == 0
         assert "remapped_ok" in result.output
 
-    async def test_run_code_string_timeout(self):
+    async def test_run_code_string_timeout(self, default_registry):
         """Model sometimes passes ``timeout`` as a string in the tool-call
         JSON — run_code should coerce rather than crash with
         ``TypeError: '<' not supported between instances of 'int' and 'str'``.
         """
-        registry = create_default_registry()
+        registry = default_registry
         result = await registry.execute(
             "run_code",
             {"language": "bash", "code": "echo str_timeout_ok", "timeout": "30"},
@@ -521,9 +554,9 @@ class TestRegistry:
         assert result.exit_code == 0
         assert "str_timeout_ok" in result.output
 
-    async def test_run_code_invalid_timeout_falls_back(self):
+    async def test_run_code_invalid_timeout_falls_back(self, default_registry):
         """Non-numeric timeout strings fall back to the default, not crash."""
-        registry = create_default_registry()
+        registry = default_registry
         result = await registry.execute(
             "run_code",
             {"language": "bash", "code": "echo bad_timeout_ok", "timeout": "forever"},
@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+import re
+
+import pytest
 from rich.console import Group
 from rich.syntax import Syntax
 from rich.text import Text
@@ -16,18 +19,24 @@ from natshell.ui.widgets import (
     _format_tool_summary,
 )
 
+# The colour tags _color_diff gives removed, added and hunk-header lines.
+_COLOR_TAG_RE = re.compile(r"\[(?:red|green|cyan)\]")
+
 # ─── _escape ────────────────────────────────────────────────────────────────
 
 
 class TestEscape:
-    def test_escapes_brackets(self):
-        assert _escape("[bold]text[/]") == "\\[bold]text\\[/]"
-
-    def test_plain_text_unchanged(self):
-        assert _escape("hello world") == "hello world"
-
-    def test_empty_string(self):
-        assert _escape("") == ""
+    @pytest.mark.parametrize(
+        ("text", "expected"),
+        [
+            ("[bold]text[/]", "\\[bold]text\\[/]"),
+            ("hello world", "hello world"),
+            ("", ""),
+        ],
+        ids=["brackets", "plain", "empty"],
+    )
+    def test_escape(self, text, expected):
+        assert _escape(text) == expected
 
 
 # ─── _format_tool_summary ───────────────────────────────────────────────────
@@ -151,23 +160,20 @@ class TestFormatToolDetail:
 
 
 class TestColorDiff:
-    def test_removed_lines_red(self):
-        result = _color_diff(["-removed line"])
-        assert "[red]" in result
-
-    def test_added_lines_green(self):
-        result = _color_diff(["+added line"])
-        assert "[green]" in result
-
-    def test_hunk_headers_cyan(self):
-        result = _color_diff(["@@ -1,3 +1,3 @@"])
-        assert "[cyan]" in result
+    @pytest.mark.parametrize(
+        ("line", "tag"),
+        [
+            ("-removed line", "[red]"),
+            ("+added line", "[green]"),
+            ("@@ -1,3 +1,3 @@", "[cyan]"),
+        ],
+        ids=["removed", "added", "hunk-header"],
+    )
+    def test_line_colored(self, line, tag):
+        assert tag in _color_diff([line])
 
     def test_context_lines_not_colored(self):
-        result = _color_diff([" context line"])
-        assert "[red]" not in result
-        assert "[green]" not in result
-        assert "[cyan]" not in result
+        assert _COLOR_TAG_RE.search(_color_diff([" context line"])) is None
 
 
 # ─── Syntax highlighting integration ────────────────────────────────────────